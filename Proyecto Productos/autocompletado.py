@@ -0,0 +1,179 @@
+# autocompletado.py
+"""
+Autocompletado por prefijo para elegir productos y categorías. ⌨️
+
+En lugar de listar todo el catálogo para que el usuario busque un número o
+un ID, los selectores de `productos.py` muestran solo las primeras
+`MAX_SUGERENCIAS` coincidencias con lo que se escribió, y se van acotando a
+medida que se escribe más.
+
+Las coincidencias salen de un índice en memoria: una lista ordenada de
+claves `"nombre normalizado\\0id"` (sin mayúsculas ni acentos, como en
+`busqueda.normalizar`) sobre la que se hacen dos búsquedas binarias con
+`bisect`. Buscar un prefijo cuesta O(log n) y no depende de cuántos
+productos coincidan, así que responde en microsegundos aun con un millón de
+productos.
+
+El índice se mantiene al día igual que `instantanea.py`:
+- Las altas, modificaciones y bajas de este proceso llegan por
+  `db.suscribir_cambios` y solo se vuelven a leer esos productos (cada
+  clave se quita o se inserta en su lugar con `bisect`).
+- Si escribió otro proceso (ver `db.version_externa`) o una operación pudo
+  afectar a cualquier producto, se recarga completo.
+
+Uso:
+    import autocompletado
+    productos, total = autocompletado.sugerir_productos("caf")
+"""
+import threading
+from bisect import bisect_left, insort
+
+import database as db
+from busqueda import normalizar
+
+MAX_SUGERENCIAS = 10
+
+# Mayor que cualquier carácter que pueda seguir al prefijo en una clave
+_FIN_PREFIJO = "\U0010ffff"
+
+_indice = None
+_lock = threading.Lock()
+
+# IDs modificados desde la última actualización; None si hay que recargar todo
+_pendientes = set()
+
+class IndicePrefijos:
+    """Nombres normalizados ordenados, para buscar por prefijo con `bisect`."""
+
+    __slots__ = ("claves", "por_id", "version")
+
+    def __init__(self, version=None):
+        self.claves = []
+        self.por_id = {}
+        self.version = version
+
+    def cargar(self, pares):
+        """Agrega pares `(id, nombre)` de una vez y ordena al final."""
+        por_id = self.por_id
+        for id_item, nombre in pares:
+            por_id[id_item] = f"{normalizar(nombre)}\0{id_item}"
+        self.claves = sorted(por_id.values())
+
+    def agregar(self, id_item, nombre):
+        """Inserta un elemento en su lugar (reemplaza el anterior con el mismo ID)."""
+        self.quitar(id_item)
+        clave = self.por_id[id_item] = f"{normalizar(nombre)}\0{id_item}"
+        insort(self.claves, clave)
+
+    def quitar(self, id_item):
+        """Quita un elemento; no hace nada si no estaba."""
+        clave = self.por_id.pop(id_item, None)
+        if clave is not None:
+            del self.claves[bisect_left(self.claves, clave)]
+
+    def buscar(self, prefijo, cantidad=MAX_SUGERENCIAS):
+        """
+        Busca los elementos cuyo nombre comienza con `prefijo`.
+
+        Args:
+            prefijo (str): El comienzo del nombre; no distingue mayúsculas ni acentos.
+            cantidad (int): La cantidad máxima de IDs a retornar.
+
+        Retorna:
+            una tupla `(ids, total)`: los IDs de los primeros elementos en
+            orden alfabético y la cantidad total de coincidencias.
+        """
+        prefijo = normalizar(prefijo)
+        claves = self.claves
+        desde = bisect_left(claves, prefijo)
+        hasta = bisect_left(claves, prefijo + _FIN_PREFIJO, desde)
+        ids = [int(clave.rpartition("\0")[2]) for clave in claves[desde:min(hasta, desde + cantidad)]]
+        return ids, hasta - desde
+
+    def __len__(self):
+        return len(self.claves)
+
+def _al_cambiar(ids):
+    """Observador de `database`: acumula los IDs que hay que volver a leer."""
+    global _pendientes
+    with _lock:
+        if ids is None or _pendientes is None:
+            _pendientes = None
+        else:
+            _pendientes.update(ids)
+
+def indice_productos():
+    """
+    Retorna el índice de prefijos de los productos, cargándolo o actualizándolo si hace falta.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        IndicePrefijos: El índice al día con la base de datos.
+    """
+    global _indice, _pendientes
+    db.suscribir_cambios(_al_cambiar)
+    version = (db.DB_NAME, db.version_externa())
+    with _lock:
+        pendientes, _pendientes = _pendientes, set()
+    if _indice is None or _indice.version != version or pendientes is None:
+        nuevo = IndicePrefijos(version)
+        nuevo.cargar((id_prod, nombre) for id_prod, _, _, nombre
+                     in db.iterar_columnas_productos_db())
+        _indice = nuevo
+    elif pendientes:
+        for id_prod in pendientes:
+            _indice.quitar(id_prod)
+        for id_prod, _, _, nombre in db.iterar_columnas_productos_db(pendientes):
+            _indice.agregar(id_prod, nombre)
+    return _indice
+
+def descartar_indice():
+    """
+    Libera el índice de productos y deja de seguir los cambios de la base.
+
+    La función no devuelve ningún valor.
+    """
+    global _indice, _pendientes
+    db.cancelar_suscripcion_cambios(_al_cambiar)
+    with _lock:
+        _indice = None
+        _pendientes = set()
+
+def sugerir_productos(prefijo, cantidad=MAX_SUGERENCIAS):
+    """
+    Retorna los primeros productos cuyo nombre comienza con `prefijo`.
+
+    Args:
+        prefijo (str): El texto escrito por el usuario (vacío: todos).
+        cantidad (int): La cantidad máxima de productos a retornar.
+
+    Retorna:
+        una tupla `(productos, total)`: registros `modelos.Producto` en orden
+        alfabético y la cantidad total de coincidencias.
+    """
+    ids, total = indice_productos().buscar(prefijo, cantidad)
+    return db.obtener_productos_por_ids_db(ids), total
+
+def sugerir_categorias(prefijo, cantidad=MAX_SUGERENCIAS):
+    """
+    Retorna las primeras categorías cuyo nombre comienza con `prefijo`.
+
+    Las categorías son pocas (como máximo diez), así que el índice se arma en
+    cada llamada a partir de la caché de categorías de `database.py`.
+
+    Args:
+        prefijo (str): El texto escrito por el usuario (vacío: todas).
+        cantidad (int): La cantidad máxima de categorías a retornar.
+
+    Retorna:
+        una tupla `(categorias, total)`: registros `modelos.Categoria` en
+        orden alfabético y la cantidad total de coincidencias.
+    """
+    categorias = db.obtener_categorias_db()
+    indice = IndicePrefijos()
+    indice.cargar(categorias)
+    ids, total = indice.buscar(prefijo, cantidad)
+    por_id = {categoria.id: categoria for categoria in categorias}
+    return [por_id[id_cat] for id_cat in ids], total
@@ -0,0 +1,903 @@
+# benchmark.py
+"""
+Banco de pruebas de rendimiento de la capa de datos y los controladores. ⏱️
+
+Genera catálogos sintéticos de distintos tamaños (respetando el límite de 10
+categorías), ejecuta cada función de `database.py` y los flujos principales
+de `productos.py` y `categorias.py` sin intervención humana (las respuestas
+de `ui.obtener_input` se simulan y la salida por pantalla se descarta), y
+guarda percentiles de latencia, operaciones por segundo y memoria máxima en
+un archivo JSON que sirve como línea base.
+
+Uso:
+    python benchmark.py run --tamanos 1000 10000 100000 --salida base.json
+    python benchmark.py run --tamanos 1000000 --presupuesto 2 --salida grande.json
+    python benchmark.py compare base.json nuevo.json --umbral 0.25
+    python benchmark.py concurrencia --lectores 4 --escritores 1 --segundos 5
+    python benchmark.py memoria --productos 1000000
+    python benchmark.py carga --productos 1000000 --procesos 1 2 4 8
+    python benchmark.py arranque --repeticiones 20 --salida arranque.json
+    python benchmark.py respaldo --productos 1000000
+    python benchmark.py rss --productos 2000000
+
+`compare` termina con código 1 si alguna operación empeoró más que el umbral.
+`concurrencia` lanza varios procesos lectores y escritores sobre la misma
+base y termina con código 1 si alguno recibió un error de bloqueo o no logró
+avanzar. `memoria` compara cuánto ocupa el catálogo completo en memoria según
+la representación de cada fila (tupla, dict, `sqlite3.Row` o registro).
+`arranque` mide en milisegundos el arranque en frío de `main.py` (proceso
+completo y tiempo de importaciones según `-X importtime`). `carga` compara
+el ritmo de la importación secuencial con el de `carga_paralela.py` según la
+cantidad de procesos. `respaldo` mide cuánto tarda `respaldo.crear_respaldo`
+según las páginas por paso y cuánto demoran mientras tanto las consultas de
+otro hilo. `rss` compara el pico de memoria residente de las funciones que
+retornan listas (`obtener_productos_db`, `buscar_productos_db`) con el de
+los recorridos en flujo (`iterar_*_db`) y de la exportación.
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import autocompletado
+import database as db
+import historial_precios
+import instantanea
+import modelos
+
+NUM_CATEGORIAS = 10
+SEMILLA = 1234
+_SILABAS = ["ca", "fe", "to", "ma", "te", "li", "mon", "sal", "pan", "ro", "jo",
+            "vi", "no", "ce", "re", "za", "lu", "bo", "ga", "le", "sa", "di"]
+
+def generar_catalogo(num_productos, semilla=SEMILLA):
+    """
+    Crea en la base actual un catálogo sintético reproducible.
+
+    Args:
+        num_productos (int): La cantidad de productos a generar.
+        semilla (int): La semilla del generador aleatorio.
+
+    La función no devuelve ningún valor.
+    """
+    azar = random.Random(semilla)
+    for i in range(NUM_CATEGORIAS):
+        db.agregar_categoria_db(f"Categoría {i + 1}")
+    ids_categorias = [id_cat for id_cat, _ in db.obtener_categorias_db()]
+
+    def filas():
+        for i in range(num_productos):
+            nombre = "".join(azar.choice(_SILABAS) for _ in range(azar.randint(2, 4)))
+            yield (f"{nombre.capitalize()} {i}", azar.choice(ids_categorias),
+                   azar.randint(0, 100000))
+
+    db.agregar_productos_lote_db(filas())
+    db.obtener_conexion().execute("ANALYZE")
+
+@contextlib.contextmanager
+def entrada_simulada(respuestas):
+    """
+    Reemplaza temporalmente `ui.obtener_input` por una lista de respuestas y
+    descarta todo lo que se imprime.
+
+    Args:
+        respuestas: Las respuestas que recibirán, en orden, los prompts.
+    """
+    import ui
+    original = ui.obtener_input
+    pendientes = iter(respuestas)
+    ui.obtener_input = lambda mensaje_prompt: next(pendientes)
+    try:
+        with open(os.devnull, "w", encoding="utf-8") as nulo, contextlib.redirect_stdout(nulo):
+            yield
+    finally:
+        ui.obtener_input = original
+
+def _controlador(funcion, respuestas):
+    """Retorna una función que ejecuta un controlador con entradas simuladas."""
+    def ejecutar(i):
+        with entrada_simulada(respuestas(i)):
+            funcion()
+    return ejecutar
+
+# Consultas SQL directas con las que se comparan los reportes de `instantanea.py`
+SQL_RESUMEN = """
+    SELECT c.id, c.nombre, COUNT(p.id), COALESCE(SUM(p.precio), 0), AVG(p.precio),
+           MIN(p.precio), MAX(p.precio)
+    FROM categorias c LEFT JOIN productos p ON p.categoria_id = c.id
+    GROUP BY c.id ORDER BY c.nombre
+"""
+SQL_MEDIANA = """
+    SELECT precio FROM productos WHERE categoria_id = ? ORDER BY precio LIMIT 1 OFFSET ?
+"""
+SQL_PERCENTIL = """
+    SELECT precio FROM productos ORDER BY precio
+    LIMIT 1 OFFSET (SELECT (COUNT(*) - 1) * ? / 100 FROM productos)
+"""
+SQL_HISTOGRAMA = """
+    WITH r AS (SELECT MIN(precio) AS minimo, MAX(MAX(precio) - MIN(precio), 1) AS rango
+               FROM productos)
+    SELECT MIN(CAST((precio - minimo) * 10 / rango AS INTEGER), 9) AS cubeta, COUNT(*)
+    FROM productos, r GROUP BY cubeta
+"""
+SQL_MAS_CAROS = """
+    SELECT p.nombre, c.nombre, p.precio FROM productos p
+    JOIN categorias c ON p.categoria_id = c.id ORDER BY p.precio DESC LIMIT 10
+"""
+
+def _sql(sql, parametros=()):
+    """Retorna una operación que ejecuta una consulta SQL directa."""
+    return lambda i: db.obtener_conexion().execute(sql, parametros).fetchall()
+
+def _sql_resumen(i):
+    """Resumen por categoría con SQL: un GROUP BY y una consulta por cada mediana."""
+    conn = db.obtener_conexion()
+    return [(nombre, cantidad, total, promedio, minimo, maximo,
+             conn.execute(SQL_MEDIANA, (id_cat, cantidad // 2)).fetchone())
+            for id_cat, nombre, cantidad, total, promedio, minimo, maximo
+            in conn.execute(SQL_RESUMEN).fetchall()]
+
+def _recargar_instantanea(i):
+    """Descarta la instantánea y la vuelve a cargar completa."""
+    instantanea.descartar_instantanea()
+    instantanea.obtener_instantanea()
+
+def operaciones(num_productos):
+    """
+    Define las operaciones a medir sobre un catálogo de `num_productos`.
+
+    Cada operación recibe el número de repetición, que se usa para variar los
+    argumentos (por ejemplo, no eliminar dos veces el mismo producto).
+
+    Args:
+        num_productos (int): El tamaño del catálogo generado.
+
+    Retorna:
+        list: Pares `(nombre, función)`.
+    """
+    import categorias
+    import productos
+    import ui
+
+    azar = random.Random(SEMILLA)
+    # Las lecturas y modificaciones usan la primera mitad de los IDs y las
+    # eliminaciones la segunda, así nunca se busca un producto ya eliminado
+    ids_al_azar = [azar.randint(1, num_productos // 2) for _ in range(1000)]
+    mitad = db.obtener_pagina_productos_db(1, desde_nombre="M")[0][0]
+    ultimo = num_productos
+    creado = time.time()
+
+    def siguiente_a_eliminar(_):
+        # Agotada la segunda mitad, se repite el último (su DELETE no afecta filas)
+        nonlocal ultimo
+        ultimo = max(ultimo - 1, num_productos // 2 + 1)
+        return ultimo
+
+    return [
+        ("contar_categorias_db", lambda i: db.contar_categorias_db()),
+        ("obtener_categorias_db", lambda i: db.obtener_categorias_db()),
+        ("contar_productos_en_categoria_db", lambda i: db.contar_productos_en_categoria_db(1 + i % NUM_CATEGORIAS)),
+        ("existe_producto_db", lambda i: db.existe_producto_db(ids_al_azar[i % 1000])),
+        ("obtener_productos_db", lambda i: db.obtener_productos_db()),
+        ("iterar_productos_db", lambda i: sum(1 for _ in db.iterar_productos_db())),
+        ("obtener_pagina_productos_db", lambda i: db.obtener_pagina_productos_db()),
+        ("obtener_pagina_productos_db (siguiente)",
+         lambda i: db.obtener_pagina_productos_db(despues=(mitad[1], mitad[0]))),
+        ("buscar_productos_db", lambda i: db.buscar_productos_db(_SILABAS[i % len(_SILABAS)])),
+        ("agregar_producto_db", lambda i: db.agregar_producto_db(f"Nuevo {i}", 1, i)),
+        ("modificar_producto_db", lambda i: db.modificar_producto_db(ids_al_azar[i % 1000], "precio", i)),
+        ("eliminar_producto_db", lambda i: db.eliminar_producto_db(siguiente_a_eliminar(i))),
+        ("fijar_precio_lote_db (1000)", lambda i: db.fijar_precio_lote_db(ids_al_azar, i)),
+        ("ajustar_precio_porcentaje_db (categoría)",
+         lambda i: db.ajustar_precio_porcentaje_db(1, categoria_id=1 + i % NUM_CATEGORIAS)),
+        ("modificar_categoria_db", lambda i: db.modificar_categoria_db(1, f"Categoría 1 v{i}")),
+        ("instantanea (carga completa)", _recargar_instantanea),
+        ("instantanea.resumen_por_categoria", lambda i: instantanea.resumen_por_categoria()),
+        ("SQL resumen por categoría", _sql_resumen),
+        ("instantanea.percentiles_precio", lambda i: instantanea.percentiles_precio()),
+        ("SQL percentiles", lambda i: [_sql(SQL_PERCENTIL, (p,))(i) for p in instantanea.PERCENTILES]),
+        ("instantanea.histograma_precios", lambda i: instantanea.histograma_precios()),
+        ("SQL histograma", _sql(SQL_HISTOGRAMA)),
+        ("instantanea.productos_mas_caros", lambda i: instantanea.productos_mas_caros()),
+        ("SQL más caros", _sql(SQL_MAS_CAROS)),
+        ("instantanea.resumen_por_categoria (tras escritura)",
+         lambda i: (db.modificar_producto_db(ids_al_azar[i % 1000], "precio", i),
+                    instantanea.resumen_por_categoria())),
+        ("autocompletado.sugerir_productos",
+         lambda i: autocompletado.sugerir_productos(_SILABAS[i % len(_SILABAS)])),
+        ("autocompletado.sugerir_productos (tras escritura)",
+         lambda i: (db.modificar_producto_db(ids_al_azar[i % 1000], "nombre", f"Renombrado {i}"),
+                    autocompletado.sugerir_productos("ren"))),
+        ("precio_en_db", lambda i: db.precio_en_db(ids_al_azar[i % 1000], creado)),
+        ("historial_precio_db (rango)",
+         lambda i: db.historial_precio_db(ids_al_azar[i % 1000], creado, time.time())),
+        ("historial_precios.valor_catalogo", lambda i: historial_precios.valor_catalogo(creado)),
+        ("productos.agregar_nuevo_producto",
+         _controlador(productos.agregar_nuevo_producto, lambda i: ["1", f"Controlador {i}", "100"])),
+        ("productos.modificar_un_producto",
+         _controlador(productos.modificar_un_producto,
+                      lambda i: [f"#{ids_al_azar[i % 1000]}", "3", "50", "4"])),
+        ("productos.eliminar_un_producto",
+         _controlador(productos.eliminar_un_producto,
+                      # 'S' cancela si ya no quedan IDs por eliminar
+                      lambda i: ["V", str(siguiente_a_eliminar(i)), "S"])),
+        ("productos.buscar_un_producto",
+         _controlador(productos.buscar_un_producto, lambda i: [_SILABAS[i % len(_SILABAS)]])),
+        ("productos.visualizar_productos",
+         _controlador(productos.visualizar_productos, lambda i: ["S", "S", "A", "V"])),
+        ("ui.mostrar_lista_productos (todos)",
+         _controlador(lambda: ui.mostrar_lista_productos(db.iterar_productos_db()), lambda i: [])),
+        ("categorias.gestionar_categorias (listar)",
+         _controlador(categorias.gestionar_categorias, lambda i: ["2", "5"])),
+    ]
+
+def _percentil(valores_ordenados, p):
+    """Percentil `p` (0-100) por interpolación lineal sobre valores ya ordenados."""
+    if len(valores_ordenados) == 1:
+        return valores_ordenados[0]
+    posicion = (len(valores_ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    fraccion = posicion - inferior
+    return valores_ordenados[inferior] * (1 - fraccion) + valores_ordenados[superior] * fraccion
+
+def medir(funcion, presupuesto, min_repeticiones=3, max_repeticiones=1000):
+    """
+    Mide la latencia de una operación repitiéndola dentro de un presupuesto de tiempo.
+
+    Args:
+        funcion: La operación; recibe el número de repetición.
+        presupuesto (float): Segundos máximos a dedicar (se respetan las
+            repeticiones mínimas aunque se exceda).
+        min_repeticiones (int): Repeticiones mínimas.
+        max_repeticiones (int): Repeticiones máximas.
+
+    Retorna:
+        dict: Latencias en milisegundos (`p50`, `p95`, `p99`, `media`,
+        `min`, `max`), `repeticiones`, `ops_por_segundo` y `memoria_pico_kb`.
+    """
+    tiempos = []
+    inicio_total = time.perf_counter()
+    for i in range(max_repeticiones):
+        inicio = time.perf_counter()
+        funcion(i)
+        tiempos.append(time.perf_counter() - inicio)
+        if i + 1 >= min_repeticiones and time.perf_counter() - inicio_total >= presupuesto:
+            break
+
+    # La memoria se mide aparte porque tracemalloc agrega costo a cada asignación
+    tracemalloc.start()
+    funcion(len(tiempos))
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ordenados = sorted(t * 1000 for t in tiempos)
+    return {
+        "repeticiones": len(tiempos),
+        "p50": _percentil(ordenados, 50),
+        "p95": _percentil(ordenados, 95),
+        "p99": _percentil(ordenados, 99),
+        "media": statistics.fmean(ordenados),
+        "min": ordenados[0],
+        "max": ordenados[-1],
+        "ops_por_segundo": len(tiempos) / sum(tiempos) if sum(tiempos) > 0 else 0.0,
+        "memoria_pico_kb": pico / 1024,
+    }
+
+def ejecutar(tamanos, presupuesto, filtro=None):
+    """
+    Ejecuta todas las operaciones para cada tamaño de catálogo.
+
+    Cada tamaño usa una base nueva en un directorio temporal.
+
+    Args:
+        tamanos: Los tamaños de catálogo a generar.
+        presupuesto (float): Segundos a dedicar a cada operación.
+        filtro (str): Si se indica, solo se miden las operaciones cuyo nombre lo contenga.
+
+    Retorna:
+        dict: El informe completo, listo para guardarse como JSON.
+    """
+    informe = {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+            "presupuesto_s": presupuesto,
+        },
+        "resultados": {},
+    }
+    nombre_original = db.DB_NAME
+    for tamano in tamanos:
+        with tempfile.TemporaryDirectory() as carpeta:
+            db.DB_NAME = os.path.join(carpeta, "benchmark.db")
+            try:
+                db.inicializar_db()
+                inicio = time.perf_counter()
+                generar_catalogo(tamano)
+                print(f"[{tamano}] catálogo generado en {time.perf_counter() - inicio:.2f} s",
+                      file=sys.stderr)
+                resultados = informe["resultados"][str(tamano)] = {}
+                for nombre, funcion in operaciones(tamano):
+                    if filtro and filtro not in nombre:
+                        continue
+                    resultados[nombre] = medir(funcion, presupuesto)
+                    r = resultados[nombre]
+                    print(f"[{tamano}] {nombre}: p50={r['p50']:.3f} ms p99={r['p99']:.3f} ms "
+                          f"({r['ops_por_segundo']:,.0f} ops/s, {r['memoria_pico_kb']:,.0f} KiB)",
+                          file=sys.stderr)
+            finally:
+                db.cerrar_conexiones()
+                db.DB_NAME = nombre_original
+    return informe
+
+def _proceso_concurrente(ruta, perfil, rol, segundos, semilla, resultados):
+    """
+    Cuerpo de cada proceso de la prueba de concurrencia.
+
+    Los lectores alternan páginas, búsquedas y comprobaciones de existencia;
+    los escritores agregan y modifican productos. Cada proceso informa por
+    `resultados` cuántas operaciones hizo y cuántos errores de bloqueo tuvo.
+    """
+    db.DB_NAME = ruta
+    db.PERFIL = perfil
+    azar = random.Random(semilla)
+    operaciones_hechas = errores = 0
+    limite = time.perf_counter() + segundos
+    while time.perf_counter() < limite:
+        try:
+            if rol == "escritor":
+                db.agregar_producto_db(f"Concurrente {semilla}-{operaciones_hechas}", 1, operaciones_hechas)
+                db.modificar_producto_db(azar.randint(1, 1000), "precio", operaciones_hechas)
+            else:
+                letra = chr(azar.randint(ord("A"), ord("Z")))
+                db.obtener_pagina_productos_db(desde_nombre=letra)
+                db.buscar_productos_db(azar.choice(_SILABAS))
+                db.existe_producto_db(azar.randint(1, 1000))
+            operaciones_hechas += 1
+        except sqlite3.OperationalError as error:
+            if not db._es_bloqueo(error):
+                raise
+            errores += 1
+    db.cerrar_conexiones()
+    resultados.put((rol, semilla, operaciones_hechas, errores))
+
+def probar_concurrencia(lectores, escritores, segundos, num_productos, perfil):
+    """
+    Ejecuta lectores y escritores en procesos separados sobre la misma base.
+
+    Args:
+        lectores (int): La cantidad de procesos lectores.
+        escritores (int): La cantidad de procesos escritores.
+        segundos (float): La duración de la prueba.
+        num_productos (int): El tamaño del catálogo inicial.
+        perfil (str): El perfil de almacenamiento a usar (ver `db.PERFILES`).
+
+    Retorna:
+        list: Tuplas `(rol, id_proceso, operaciones, errores_de_bloqueo)`.
+    """
+    contexto = multiprocessing.get_context("spawn")
+    nombre_original, perfil_original = db.DB_NAME, db.PERFIL
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "concurrencia.db")
+        db.DB_NAME, db.PERFIL = ruta, perfil
+        try:
+            db.inicializar_db()
+            generar_catalogo(num_productos)
+        finally:
+            db.cerrar_conexiones()
+            db.DB_NAME, db.PERFIL = nombre_original, perfil_original
+
+        resultados = contexto.Queue()
+        roles = ["lector"] * lectores + ["escritor"] * escritores
+        procesos = [contexto.Process(target=_proceso_concurrente,
+                                     args=(ruta, perfil, rol, segundos, i, resultados))
+                    for i, rol in enumerate(roles)]
+        for proceso in procesos:
+            proceso.start()
+        filas = [resultados.get() for _ in procesos]
+        for proceso in procesos:
+            proceso.join()
+    return sorted(filas)
+
+def medir_carga_paralela(num_productos, lista_procesos):
+    """
+    Importa un mismo CSV sintético con la carga secuencial y con la paralela
+    usando distintas cantidades de procesos, cada vez sobre una base nueva.
+
+    Args:
+        num_productos (int): La cantidad de filas del archivo.
+        lista_procesos (list): Las cantidades de procesos a probar.
+
+    Retorna:
+        list: Tuplas `(modo, filas_por_segundo, segundos)`.
+    """
+    import carga_masiva
+    import carga_paralela
+    azar = random.Random(SEMILLA)
+    nombre_original = db.DB_NAME
+    resultados = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_csv = os.path.join(carpeta, "catalogo.csv")
+        with open(ruta_csv, "w", newline="", encoding="utf-8") as archivo:
+            archivo.write("nombre,categoria,precio\n")
+            for i in range(num_productos):
+                nombre = "".join(azar.choice(_SILABAS) for _ in range(azar.randint(2, 4)))
+                archivo.write(f"{nombre.capitalize()} {i},Categoría {azar.randint(1, NUM_CATEGORIAS)},"
+                              f"{azar.randint(0, 100000)}\n")
+        modos = [("secuencial", None)] + [(f"{n} procesos", n) for n in lista_procesos]
+        for i, (modo, procesos) in enumerate(modos):
+            db.DB_NAME = os.path.join(carpeta, f"carga-{i}.db")
+            try:
+                db.inicializar_db()
+                for j in range(NUM_CATEGORIAS):
+                    db.agregar_categoria_db(f"Categoría {j + 1}")
+                if procesos is None:
+                    resumen = carga_masiva.importar_productos(ruta_csv)
+                else:
+                    resumen = carga_paralela.importar_productos(ruta_csv, procesos=procesos)
+                resultados.append((modo, resumen["filas_por_segundo"], resumen["segundos"]))
+            finally:
+                db.cerrar_conexiones()
+                db.DB_NAME = nombre_original
+    return resultados
+
+# Variantes de `medir_respaldo`: (nombre, páginas por paso, pausa, extensión)
+CONFIGURACIONES_RESPALDO = [
+    ("un solo paso", -1, 0, ".db"),
+    ("1024 páginas/paso", 1024, 0.002, ".db"),
+    ("256 páginas/paso", 256, 0.002, ".db"),
+    ("64 páginas/paso", 64, 0.002, ".db"),
+    ("256 páginas/paso + gzip", 256, 0.002, ".db.gz"),
+]
+
+def medir_respaldo(num_productos, segundos_base=1.0):
+    """
+    Mide la duración de un respaldo en línea y su efecto en las consultas.
+
+    Mientras se crea cada respaldo, otro hilo consulta productos al azar
+    (`obtener_productos_por_ids_db`, que no usa la caché) y registra cuánto
+    tarda cada consulta. Primero se mide ese hilo solo, como referencia.
+
+    Args:
+        num_productos (int): El tamaño del catálogo generado.
+        segundos_base (float): La duración de la medición sin respaldo.
+
+    Retorna:
+        list: Diccionarios con las claves `modo`, `segundos` (del respaldo),
+        `mib` (tamaño del archivo), `consultas`, `p50`, `p99` y `max` (en ms).
+    """
+    import respaldo
+    nombre_original = db.DB_NAME
+    resultados = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        db.DB_NAME = os.path.join(carpeta, "respaldo.db")
+        try:
+            db.inicializar_db()
+            generar_catalogo(num_productos)
+
+            def consultar(detener, tiempos):
+                azar = random.Random(SEMILLA)
+                while not detener.is_set():
+                    inicio = time.perf_counter()
+                    db.obtener_productos_por_ids_db([azar.randint(1, num_productos)])
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+
+            modos = [("sin respaldo", None, None, None)] + CONFIGURACIONES_RESPALDO
+            for i, (modo, paginas, pausa, extension) in enumerate(modos):
+                detener, tiempos = threading.Event(), []
+                lector = threading.Thread(target=consultar, args=(detener, tiempos))
+                lector.start()
+                if paginas is None:
+                    time.sleep(segundos_base)
+                    resumen = {"segundos": 0.0, "bytes": 0}
+                else:
+                    resumen = respaldo.crear_respaldo(
+                        os.path.join(carpeta, f"copia-{i}{extension}"), paginas, pausa)
+                detener.set()
+                lector.join()
+                latencias = _latencias(tiempos)
+                resultados.append({"modo": modo, "segundos": resumen["segundos"],
+                                   "mib": resumen["bytes"] / 2**20, "consultas": len(tiempos),
+                                   "p50": latencias["p50"], "p99": latencias["p99"],
+                                   "max": latencias["max"]})
+        finally:
+            db.cerrar_conexiones()
+            db.DB_NAME = nombre_original
+    return resultados
+
+def _exportar_rss(carpeta):
+    """Recorrido de `medir_rss`: exporta el catálogo a CSV y retorna las filas escritas."""
+    import carga_masiva
+    return carga_masiva.exportar_productos(os.path.join(carpeta, "exportados.csv"))["filas"]
+
+# Recorridos de `medir_rss`: (nombre, función que recibe la carpeta de
+# trabajo, recorre el resultado y retorna la cantidad de filas)
+RECORRIDOS_RSS = [
+    ("obtener_productos_db (lista)", lambda carpeta: len(db.obtener_productos_db())),
+    ("iterar_productos_db", lambda carpeta: sum(1 for _ in db.iterar_productos_db())),
+    ("iterar_bloques_productos_db",
+     lambda carpeta: sum(len(bloque) for bloque in db.iterar_bloques_productos_db())),
+    ("buscar_productos_db (lista)",
+     lambda carpeta: len(db.buscar_productos_db(_SILABAS[0], 10**9))),
+    ("iterar_busqueda_productos_db",
+     lambda carpeta: sum(1 for _ in db.iterar_busqueda_productos_db(_SILABAS[0], 10**9))),
+    ("precios_en_db (lista)", lambda carpeta: len(list(db.precios_en_db(time.time())))),
+    ("historial_precios.valor_catalogo",
+     lambda carpeta: sum(fila["productos"] for fila in historial_precios.valor_catalogo(time.time()))),
+    ("carga_masiva.exportar_productos", _exportar_rss),
+]
+
+def _memoria_residente():
+    """
+    Retorna `(rss_actual, rss_pico)` del proceso en bytes.
+
+    En Linux se leen `VmRSS` y `VmHWM` de `/proc/self/status`. En otros
+    sistemas solo está el pico de `resource.getrusage`, que además arrastra
+    el del proceso padre, así que sirve como referencia más gruesa.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as archivo:
+            campos = dict(linea.split(":", 1) for linea in archivo if ":" in linea)
+        return int(campos["VmRSS"].split()[0]) * 1024, int(campos["VmHWM"].split()[0]) * 1024
+    except (OSError, KeyError):
+        import resource
+        escala = 1 if sys.platform == "darwin" else 1024   # ru_maxrss: bytes en macOS, KiB en Linux
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * escala
+        return pico, pico
+
+def _proceso_rss(ruta, indice, resultados):
+    """
+    Cuerpo de cada proceso de `medir_rss`: abre la base, lleva el pico de RSS
+    al valor actual y ejecuta un único recorrido.
+    """
+    db.DB_NAME = ruta
+    db.obtener_categorias_db()
+    # En Linux, escribir 5 en clear_refs reinicia el pico (VmHWM) al RSS actual
+    with contextlib.suppress(OSError):
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as archivo:
+            archivo.write("5")
+    base, _ = _memoria_residente()
+    nombre, recorrer = RECORRIDOS_RSS[indice]
+    inicio = time.perf_counter()
+    filas = recorrer(os.path.dirname(ruta))
+    segundos = time.perf_counter() - inicio
+    _, pico = _memoria_residente()
+    db.cerrar_conexiones()
+    resultados.put((indice, nombre, filas, max(pico - base, 0) / 2**20, segundos))
+
+def medir_rss(num_productos):
+    """
+    Compara el pico de memoria residente (RSS) de las funciones que retornan
+    listas con el de sus variantes en flujo.
+
+    Cada recorrido de `RECORRIDOS_RSS` se ejecuta en un proceso nuevo y se
+    informa cuánto creció el pico de RSS sobre el RSS que el proceso tenía
+    tras abrir la base (ver `_memoria_residente`). El crecimiento incluye la
+    caché de páginas de SQLite y las páginas del archivo mapeadas en memoria
+    (`mmap_size`), que son las mismas en ambas variantes.
+
+    Args:
+        num_productos (int): El tamaño del catálogo generado.
+
+    Retorna:
+        list: Tuplas `(recorrido, filas, mib, segundos)`.
+    """
+    contexto = multiprocessing.get_context("spawn")
+    nombre_original = db.DB_NAME
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "rss.db")
+        db.DB_NAME = ruta
+        try:
+            db.inicializar_db()
+            generar_catalogo(num_productos)
+        finally:
+            db.cerrar_conexiones()
+            db.DB_NAME = nombre_original
+
+        filas = []
+        for indice in range(len(RECORRIDOS_RSS)):
+            resultados = contexto.Queue()
+            proceso = contexto.Process(target=_proceso_rss, args=(ruta, indice, resultados))
+            proceso.start()
+            filas.append(resultados.get()[1:])
+            proceso.join()
+    return filas
+
+def _latencias(tiempos_ms):
+    """Resume una lista de duraciones en milisegundos con las claves de `medir`."""
+    ordenados = sorted(tiempos_ms)
+    return {
+        "repeticiones": len(ordenados),
+        "p50": _percentil(ordenados, 50),
+        "p95": _percentil(ordenados, 95),
+        "p99": _percentil(ordenados, 99),
+        "media": statistics.fmean(ordenados),
+        "min": ordenados[0],
+        "max": ordenados[-1],
+    }
+
+def medir_arranque(repeticiones):
+    """
+    Mide el arranque en frío de `main.py`: cada repetición lanza un intérprete
+    nuevo con `-X importtime` sobre una base con una categoría, elige "Salir"
+    en el menú principal y registra el tiempo total del proceso y el tiempo
+    de las importaciones.
+
+    Args:
+        repeticiones (int): La cantidad de arranques a medir (se hace uno
+            más antes, para que el caché de disco y los `.pyc` estén listos).
+
+    Retorna:
+        una tupla `(informe, modulos)`: `informe` tiene el formato de
+        `ejecutar` (así se puede comparar con `compare`) y `modulos` es la
+        lista `(modulo, ms)` de las importaciones más costosas del último arranque.
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    # Se mide el arranque habitual, con los `.pyc` ya escritos
+    entorno = {clave: valor for clave, valor in os.environ.items()
+               if clave != "PYTHONDONTWRITEBYTECODE"}
+    totales, importaciones = [], []
+    with tempfile.TemporaryDirectory() as carpeta:
+        nombre_original = db.DB_NAME
+        db.DB_NAME = os.path.join(carpeta, db.DB_NAME)
+        try:
+            db.inicializar_db()
+            db.agregar_categoria_db("Categoría 1")
+        finally:
+            db.cerrar_conexiones()
+            db.DB_NAME = nombre_original
+        for i in range(repeticiones + 1):
+            inicio = time.perf_counter()
+            proceso = subprocess.run([sys.executable, "-X", "importtime", script], input="5\n",
+                                     cwd=carpeta, env=entorno, capture_output=True, text=True, check=True)
+            total_ms = (time.perf_counter() - inicio) * 1000
+            # Líneas "import time: propio | acumulado | módulo"; las de primer
+            # nivel (sin sangría) suman el tiempo de todas las importaciones
+            modulos = []
+            for linea in proceso.stderr.splitlines():
+                partes = linea.split("|")
+                if len(partes) == 3 and partes[1].strip().isdigit() and not partes[2].startswith("  "):
+                    modulos.append((partes[2].strip(), int(partes[1]) / 1000))
+            if i:
+                totales.append(total_ms)
+                importaciones.append(sum(ms for _, ms in modulos))
+    informe = {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+        },
+        "resultados": {"arranque": {
+            "main.py hasta salir": _latencias(totales),
+            "importaciones (-X importtime)": _latencias(importaciones),
+        }},
+    }
+    return informe, sorted(modulos, key=lambda par: par[1], reverse=True)[:10]
+
+class _ProductoConSlots:
+    """Clase común con `__slots__`, solo como referencia en `medir_memoria_filas`."""
+
+    __slots__ = modelos.Producto._fields
+
+    def __init__(self, id, nombre, categoria, precio):
+        self.id = id
+        self.nombre = nombre
+        self.categoria = categoria
+        self.precio = precio
+
+# Representaciones de una fila de producto: (nombre, row_factory)
+REPRESENTACIONES = [
+    ("tupla", None),
+    ("dict", lambda cursor, fila: dict(zip(modelos.Producto._fields, fila))),
+    ("sqlite3.Row", sqlite3.Row),
+    ("clase con __slots__", lambda cursor, fila: _ProductoConSlots(*fila)),
+    ("modelos.Producto", modelos.fila_producto),
+]
+
+SQL_PRODUCTOS = """
+    SELECT p.id, p.nombre, c.nombre, p.precio FROM productos p
+    JOIN categorias c ON p.categoria_id = c.id ORDER BY p.nombre
+"""
+
+def medir_memoria_filas(num_productos):
+    """
+    Carga el catálogo completo con cada representación de fila y mide su
+    memoria (con tracemalloc) y su tiempo de lectura (en otra pasada, sin
+    tracemalloc, que la haría más lenta).
+
+    Los bytes por fila incluyen las cadenas de nombre y categoría, que son
+    iguales para todas las representaciones; la diferencia entre ellas es lo
+    que cuesta el contenedor de cada fila.
+
+    Args:
+        num_productos (int): El tamaño del catálogo a generar.
+
+    Retorna:
+        list: Diccionarios con `representacion`, `bytes_por_fila`,
+        `total_mib` y `segundos`.
+    """
+    nombre_original = db.DB_NAME
+    resultados = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        db.DB_NAME = os.path.join(carpeta, "memoria.db")
+        try:
+            db.inicializar_db()
+            generar_catalogo(num_productos)
+            conn = db.obtener_conexion()
+            for nombre, fabrica in REPRESENTACIONES:
+                cursor = conn.execute(SQL_PRODUCTOS)
+                cursor.row_factory = fabrica
+                inicio = time.perf_counter()
+                filas = cursor.fetchall()
+                segundos = time.perf_counter() - inicio
+                del filas
+
+                tracemalloc.start()
+                cursor = conn.execute(SQL_PRODUCTOS)
+                cursor.row_factory = fabrica
+                filas = cursor.fetchall()
+                memoria, _ = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                del filas
+                resultados.append({
+                    "representacion": nombre,
+                    "bytes_por_fila": round(memoria / max(num_productos, 1), 1),
+                    "total_mib": round(memoria / 2**20, 1),
+                    "segundos": round(segundos, 3),
+                })
+        finally:
+            db.cerrar_conexiones()
+            db.DB_NAME = nombre_original
+    return resultados
+
+def comparar(base, nuevo, umbral, metrica="p50"):
+    """
+    Compara dos informes y detecta regresiones.
+
+    Args:
+        base (dict): El informe de referencia.
+        nuevo (dict): El informe a evaluar.
+        umbral (float): La variación relativa tolerada (0.25 = 25% más lento).
+        metrica (str): La latencia a comparar (`p50`, `p95`, `p99` o `media`).
+
+    Retorna:
+        list: Tuplas `(tamano, operacion, valor_base, valor_nuevo, cambio, es_regresion)`.
+    """
+    filas = []
+    for tamano, operaciones_base in base["resultados"].items():
+        operaciones_nuevas = nuevo["resultados"].get(tamano, {})
+        for nombre, datos_base in operaciones_base.items():
+            if nombre not in operaciones_nuevas:
+                continue
+            valor_base = datos_base[metrica]
+            valor_nuevo = operaciones_nuevas[nombre][metrica]
+            cambio = (valor_nuevo - valor_base) / valor_base if valor_base > 0 else 0.0
+            filas.append((tamano, nombre, valor_base, valor_nuevo, cambio, cambio > umbral))
+    return filas
+
+def main(argv=None):
+    """Punto de entrada: subcomandos `run`, `compare`, `concurrencia`, `memoria`, `arranque` y `carga`."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("run", help="Genera catálogos y mide todas las operaciones.")
+    p.add_argument("--tamanos", type=int, nargs="+", default=[1000, 10000, 100000])
+    p.add_argument("--presupuesto", type=float, default=0.5,
+                   help="Segundos dedicados a cada operación (por defecto 0.5).")
+    p.add_argument("--filtro", help="Solo mide las operaciones que contengan este texto.")
+    p.add_argument("--salida", default="benchmark.json", help="Archivo JSON de resultados.")
+
+    p = sub.add_parser("compare", help="Compara dos archivos de resultados.")
+    p.add_argument("base")
+    p.add_argument("nuevo")
+    p.add_argument("--umbral", type=float, default=0.25,
+                   help="Aumento relativo tolerado antes de marcar una regresión (por defecto 0.25).")
+    p.add_argument("--metrica", choices=("p50", "p95", "p99", "media"), default="p50")
+
+    p = sub.add_parser("concurrencia", help="Lectores y escritores en procesos simultáneos.")
+    p.add_argument("--lectores", type=int, default=4)
+    p.add_argument("--escritores", type=int, default=1)
+    p.add_argument("--segundos", type=float, default=5)
+    p.add_argument("--productos", type=int, default=10000)
+    p.add_argument("--perfil", choices=sorted(db.PERFILES), default=db.PERFIL)
+
+    p = sub.add_parser("memoria", help="Memoria por fila según su representación.")
+    p.add_argument("--productos", type=int, default=1000000)
+
+    p = sub.add_parser("arranque", help="Tiempo de arranque en frío de main.py.")
+    p.add_argument("--repeticiones", type=int, default=10)
+    p.add_argument("--salida", help="Guarda los resultados en JSON (comparables con compare).")
+
+    p = sub.add_parser("carga", help="Ritmo de importación secuencial y en paralelo.")
+    p.add_argument("--productos", type=int, default=500000)
+    p.add_argument("--procesos", type=int, nargs="+", default=[1, 2, 4])
+
+    p = sub.add_parser("respaldo", help="Duración del respaldo en línea y su efecto en las consultas.")
+    p.add_argument("--productos", type=int, default=200000)
+
+    p = sub.add_parser("rss", help="Pico de RSS de los listados completos frente a los recorridos en flujo.")
+    p.add_argument("--productos", type=int, default=2000000)
+
+    args = parser.parse_args(argv)
+    if args.comando == "rss":
+        for recorrido, filas, mib, segundos in medir_rss(args.productos):
+            print(f"{recorrido:>34}: {filas:>10,} filas, +{mib:8.1f} MiB de RSS, {segundos:6.2f} s")
+        return 0
+
+    if args.comando == "respaldo":
+        for fila in medir_respaldo(args.productos):
+            print(f"{fila['modo']:>24}: respaldo {fila['segundos']:6.2f} s, {fila['mib']:7.1f} MiB | "
+                  f"consultas p50={fila['p50']:.3f} ms p99={fila['p99']:.3f} ms "
+                  f"max={fila['max']:.1f} ms ({fila['consultas']:,})")
+        return 0
+
+    if args.comando == "arranque":
+        informe, modulos = medir_arranque(args.repeticiones)
+        for nombre, r in informe["resultados"]["arranque"].items():
+            print(f"{nombre:>30}: p50={r['p50']:.1f} ms min={r['min']:.1f} ms max={r['max']:.1f} ms")
+        print("\nImportaciones más costosas:")
+        for modulo, ms in modulos:
+            print(f"{modulo:>30}: {ms:.1f} ms")
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8") as archivo:
+                json.dump(informe, archivo, indent=2, ensure_ascii=False)
+        return 0
+
+    if args.comando == "carga":
+        for modo, ritmo, segundos in medir_carga_paralela(args.productos, args.procesos):
+            print(f"{modo:>12}: {ritmo:>10,.0f} filas/s ({segundos:.2f} s)")
+        return 0
+
+    if args.comando == "memoria":
+        for fila in medir_memoria_filas(args.productos):
+            print(f"{fila['representacion']:>20}: {fila['bytes_por_fila']:>7.1f} bytes/fila, "
+                  f"{fila['total_mib']:>8.1f} MiB, lectura {fila['segundos']:.3f} s")
+        return 0
+
+    if args.comando == "concurrencia":
+        filas = probar_concurrencia(args.lectores, args.escritores, args.segundos,
+                                    args.productos, args.perfil)
+        fallas = 0
+        for rol, id_proceso, operaciones_hechas, errores in filas:
+            fallas += errores > 0 or operaciones_hechas == 0
+            print(f"{rol:>8} #{id_proceso}: {operaciones_hechas:,} operaciones "
+                  f"({operaciones_hechas / args.segundos:,.0f}/s), {errores} errores de bloqueo")
+        print(f"\nPerfil '{args.perfil}': {'sin bloqueos' if not fallas else f'{fallas} procesos con problemas'}.")
+        return 1 if fallas else 0
+
+    if args.comando == "run":
+        informe = ejecutar(args.tamanos, args.presupuesto, args.filtro)
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+        return 0
+
+    with open(args.base, encoding="utf-8") as archivo:
+        base = json.load(archivo)
+    with open(args.nuevo, encoding="utf-8") as archivo:
+        nuevo = json.load(archivo)
+    filas = comparar(base, nuevo, args.umbral, args.metrica)
+    regresiones = 0
+    for tamano, nombre, valor_base, valor_nuevo, cambio, es_regresion in filas:
+        marca = "REGRESIÓN" if es_regresion else "ok"
+        regresiones += es_regresion
+        print(f"{marca:>9} [{tamano}] {nombre}: {valor_base:.3f} -> {valor_nuevo:.3f} ms ({cambio:+.1%})")
+    print(f"\n{regresiones} regresiones sobre {len(filas)} operaciones ({args.metrica}, umbral {args.umbral:.0%}).")
+    return 1 if regresiones else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+# busqueda.py
+"""
+Módulo del motor de búsqueda de productos. 🔍
+
+Mantiene un índice de texto completo sobre los nombres de los productos para
+que `database.buscar_productos_db` no tenga que recorrer toda la tabla con
+`LIKE '%termino%'`.
+
+- Si SQLite trae FTS5, se usa la tabla virtual `productos_fts` (con contenido
+  externo en `productos`), sincronizada mediante triggers. El tokenizador
+  `unicode61 remove_diacritics 2` hace que la búsqueda ignore mayúsculas y
+  acentos ("cafe" encuentra "Café"), y cada palabra se busca como prefijo.
+- Si FTS5 no está disponible, se construye en memoria un índice de los
+  comienzos de las palabras de los nombres normalizados, que se reconstruye
+  cuando cambian los datos. Aplica la misma regla (cada palabra buscada es
+  el comienzo de una palabra del nombre), así que un término encuentra los
+  mismos productos con o sin FTS5; solo puede cambiar el orden entre
+  resultados de igual relevancia.
+
+Las funciones reciben la conexión como parámetro; este módulo no abre
+conexiones por su cuenta.
+"""
+import re
+import sqlite3
+import unicodedata
+from collections import defaultdict
+
+import modelos
+
+LIMITE_RESULTADOS = 50
+
+_SQL_CREAR_FTS = """
+    CREATE VIRTUAL TABLE productos_fts USING fts5(
+        nombre,
+        content='productos',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+"""
+
+_SQL_TRIGGERS_FTS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+        INSERT INTO productos_fts(rowid, nombre) VALUES (new.id, new.nombre);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, nombre)
+        VALUES ('delete', old.id, old.nombre);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS productos_fts_au AFTER UPDATE OF nombre ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, nombre)
+        VALUES ('delete', old.id, old.nombre);
+        INSERT INTO productos_fts(rowid, nombre) VALUES (new.id, new.nombre);
+    END
+    """,
+]
+
+_SQL_BUSCAR_FTS = """
+    SELECT p.id, p.nombre, c.nombre, p.precio FROM productos_fts f
+    JOIN productos p ON p.id = f.rowid
+    JOIN categorias c ON p.categoria_id = c.id
+    WHERE productos_fts MATCH ? ORDER BY f.rank LIMIT ?
+"""
+
+# Estado del motor para cada archivo de base de datos: si usa FTS5 y, en caso
+# contrario, el índice en memoria y la versión de datos con que se armó.
+_fts_por_ruta = {}
+_comienzos_por_ruta = {}
+
+def normalizar(texto):
+    """
+    Pasa un texto a minúsculas y le quita los acentos y diacríticos.
+
+    Args:
+        texto (str): El texto a normalizar.
+
+    Retorna:
+        str: El texto normalizado ("Café" -> "cafe").
+    """
+    if texto.isascii():
+        # Sin acentos que quitar: alcanza con pasar a minúsculas
+        return texto.lower()
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+def _palabras_normalizadas(texto):
+    """Separa un texto ya normalizado en palabras, como el tokenizador de FTS5."""
+    return re.findall(r"\w+", texto)
+
+def _palabras(termino):
+    """Separa un término de búsqueda normalizado en palabras."""
+    return _palabras_normalizadas(normalizar(termino))
+
+def fts5_disponible(conn):
+    """
+    Indica si la biblioteca SQLite en uso fue compilada con FTS5.
+
+    Args:
+        conn (sqlite3.Connection): Una conexión abierta.
+
+    Retorna:
+        bool: True si se pueden crear tablas FTS5.
+    """
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.prueba_fts5 USING fts5(x)")
+        conn.execute("DROP TABLE temp.prueba_fts5")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def _existe_tabla_fts(conn):
+    """Indica si la base ya tiene la tabla `productos_fts`."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'productos_fts'"
+    ).fetchone() is not None
+
+def preparar_indice(conn, ruta=None):
+    """
+    Crea (si hace falta) la tabla FTS5 y sus triggers de sincronización.
+
+    Si la tabla se crea sobre una base que ya tenía productos, se reconstruye
+    el índice a partir del contenido actual.
+
+    Args:
+        conn (sqlite3.Connection): Una conexión abierta a la base.
+        ruta (str): El archivo de la base, usado para recordar el modo elegido
+            (opcional).
+
+    Retorna:
+        bool: True si se usa FTS5, False si se usará el índice en memoria.
+    """
+    if not fts5_disponible(conn):
+        if ruta is not None:
+            _fts_por_ruta[ruta] = False
+        return False
+    if not _existe_tabla_fts(conn):
+        conn.execute(_SQL_CREAR_FTS)
+        conn.execute("INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')")
+    for sql in _SQL_TRIGGERS_FTS:
+        conn.execute(sql)
+    if ruta is not None:
+        _fts_por_ruta[ruta] = True
+    return True
+
+def _consulta_fts(termino):
+    """
+    Convierte el texto del usuario en una expresión MATCH de FTS5.
+
+    Cada palabra se cita (para neutralizar la sintaxis de FTS5) y se busca
+    como prefijo; todas las palabras deben aparecer.
+    """
+    return " ".join(f'"{palabra}"*' for palabra in _palabras(termino))
+
+class _IndiceComienzos:
+    """
+    Índice invertido en memoria de los comienzos de las palabras de los
+    nombres de productos (sus primeros 1, 2 y 3 caracteres).
+
+    Se usa como alternativa cuando SQLite no incluye FTS5 y aplica la misma
+    regla que FTS5 con `unicode61`: cada palabra buscada debe ser el
+    comienzo de alguna palabra del nombre ("tele" encuentra "Televisor",
+    pero "visor" no).
+    """
+
+    def __init__(self, filas):
+        self.nombres = {}
+        self.palabras = {}
+        self.comienzos = defaultdict(set)
+        for id_prod, nombre in filas:
+            normal = normalizar(nombre)
+            palabras = tuple(_palabras_normalizadas(normal))
+            self.nombres[id_prod] = normal
+            self.palabras[id_prod] = palabras
+            for palabra in palabras:
+                for largo in range(1, min(len(palabra), 3) + 1):
+                    self.comienzos[palabra[:largo]].add(id_prod)
+
+    def _candidatos(self, palabra):
+        """IDs con alguna palabra que comienza con `palabra`."""
+        candidatos = self.comienzos.get(palabra[:3], set())
+        if len(palabra) <= 3:
+            return set(candidatos)
+        return {i for i in candidatos
+                if any(p.startswith(palabra) for p in self.palabras[i])}
+
+    def buscar(self, palabras, limite):
+        """
+        Retorna los IDs cuyo nombre tiene palabras que comienzan con cada una
+        de `palabras`; primero los nombres más cortos, como el orden por
+        relevancia de FTS5, que favorece a los nombres con menos palabras.
+        """
+        if not palabras:
+            return []
+        candidatos = self._candidatos(palabras[0])
+        for palabra in palabras[1:]:
+            if not candidatos:
+                break
+            candidatos &= self._candidatos(palabra)
+        return sorted(candidatos, key=lambda i: (len(self.nombres[i]), self.nombres[i]))[:limite]
+
+def _buscar_en_memoria(conn, ruta, termino, limite, version):
+    """Resuelve la búsqueda con el índice en memoria, reconstruyéndolo si cambió la base."""
+    guardado = _comienzos_por_ruta.get(ruta)
+    if guardado is None or guardado[0] != version:
+        indice = _IndiceComienzos(conn.execute("SELECT id, nombre FROM productos"))
+        _comienzos_por_ruta[ruta] = (version, indice)
+    else:
+        indice = guardado[1]
+    ids = indice.buscar(_palabras(termino), limite)
+    if not ids:
+        return []
+    marcadores = ", ".join("?" for _ in ids)
+    cursor = conn.execute(f"""
+        SELECT p.id, p.nombre, c.nombre, p.precio FROM productos p
+        JOIN categorias c ON p.categoria_id = c.id WHERE p.id IN ({marcadores})
+    """, ids)
+    cursor.row_factory = modelos.fila_producto
+    orden = {id_prod: pos for pos, id_prod in enumerate(ids)}
+    return sorted(cursor, key=lambda producto: orden[producto.id])
+
+def consultar(conn, ruta, termino, limite=LIMITE_RESULTADOS, version=None):
+    """
+    Resuelve una búsqueda sin leer todavía las filas de SQLite.
+
+    Recibe los mismos argumentos que `buscar`.
+
+    Retorna:
+        un cursor ya ejecutado (con FTS5), del que se leen los registros
+        `modelos.Producto` a medida que se necesitan, o una lista (con el
+        índice en memoria, que ordena por relevancia).
+    """
+    if not _palabras(termino):
+        return []
+    usa_fts = _fts_por_ruta.get(ruta)
+    if usa_fts is None:
+        # La tabla la crea la migración correspondiente (ver `migraciones.py`)
+        # solo si SQLite incluye FTS5; aquí basta con comprobar si existe.
+        usa_fts = _fts_por_ruta[ruta] = _existe_tabla_fts(conn)
+    if usa_fts:
+        cursor = conn.execute(_SQL_BUSCAR_FTS, (_consulta_fts(termino), limite))
+        cursor.row_factory = modelos.fila_producto
+        return cursor
+    return _buscar_en_memoria(conn, ruta, termino, limite, version)
+
+def buscar(conn, ruta, termino, limite=LIMITE_RESULTADOS, version=None):
+    """
+    Busca productos por nombre usando el mejor índice disponible.
+
+    Args:
+        conn (sqlite3.Connection): Una conexión abierta a la base.
+        ruta (str): El archivo de la base.
+        termino (str): El texto a buscar; cada palabra se busca como comienzo
+            de una palabra del nombre, sin distinguir mayúsculas ni acentos.
+        limite (int): La cantidad máxima de resultados.
+        version: Un valor que cambia cada vez que se modifican los datos; se
+            usa para invalidar el índice en memoria.
+
+    Retorna:
+        una lista de registros `modelos.Producto`, ordenada por relevancia.
+    """
+    resultado = consultar(conn, ruta, termino, limite, version)
+    return resultado if isinstance(resultado, list) else resultado.fetchall()
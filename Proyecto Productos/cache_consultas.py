@@ -0,0 +1,169 @@
+# cache_consultas.py
+"""
+Caché LRU de resultados de consultas. 🧠
+
+Los listados y las búsquedas se repiten mucho ("Visualizar productos", la
+misma búsqueda varias veces) y, mientras los datos no cambien, cada
+repetición vuelve a hacer el mismo JOIN y el mismo ordenamiento. Este módulo
+guarda esos resultados en memoria, indexados por consulta y parámetros, con
+dos límites: `MAX_ENTRADAS` resultados y `MAX_BYTES` bytes estimados. Al
+superarlos se descartan los menos usados recientemente.
+
+Cada resultado se guarda junto con la versión de los datos con la que se
+calculó (ver `db.version_datos`: el contador de escrituras de este proceso
+más `PRAGMA data_version`, que cambia cuando escribe otro proceso). Cuando la
+versión cambia se descartan todos los resultados de esa partición. Como
+`PRAGMA data_version` solo se puede comparar dentro de una misma conexión,
+cada conexión (una por hilo y por base) tiene su propia partición.
+
+`database.py` aplica la caché a las funciones de lectura con `_con_cache`;
+este módulo no conoce la base de datos.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+MAX_ENTRADAS = 256
+MAX_BYTES = 32 * 2**20
+
+# Cantidad de elementos que se miden para estimar el tamaño de una lista
+MUESTRA_TAMANO = 32
+
+_lock = threading.Lock()
+_entradas = OrderedDict()   # (particion, clave) -> (resultado, bytes)
+_versiones = {}             # particion -> versión de los datos de sus entradas
+_bytes = 0
+_estadisticas = {"aciertos": 0, "fallos": 0, "invalidaciones": 0, "descartes": 0}
+
+def _tamano(valor):
+    """
+    Estima los bytes que ocupa un resultado, incluidos sus elementos.
+
+    En listas y tuplas largas solo se miden `MUESTRA_TAMANO` elementos
+    repartidos a lo largo de la secuencia y se extrapola al total.
+    """
+    tamano = sys.getsizeof(valor)
+    if isinstance(valor, (list, tuple)) and valor:
+        paso = max(1, len(valor) // MUESTRA_TAMANO)
+        muestra = valor[::paso][:MUESTRA_TAMANO]
+        tamano += sum(_tamano(elemento) for elemento in muestra) * len(valor) // len(muestra)
+    return tamano
+
+def inmutable(resultado):
+    """
+    Convierte las listas de un resultado en tuplas.
+
+    Los resultados se guardan así y se entregan sin copiar: como los
+    registros también son inmutables, nadie puede alterar lo que está en la
+    caché y un acierto cuesta lo mismo con 10 filas que con un millón. Quien
+    necesite modificar el resultado debe hacer su propia copia con `list()`.
+    """
+    if type(resultado) is list:
+        return tuple(resultado)
+    if type(resultado) is tuple:
+        return tuple(tuple(valor) if type(valor) is list else valor for valor in resultado)
+    return resultado
+
+def _quitar(llave):
+    global _bytes
+    _, tamano = _entradas.pop(llave)
+    _bytes -= tamano
+
+def _invalidar(particion):
+    """Descarta los resultados de una partición cuyos datos cambiaron."""
+    for llave in [llave for llave in _entradas if llave[0] == particion]:
+        _quitar(llave)
+    _estadisticas["invalidaciones"] += 1
+
+def obtener(particion, clave, version, calcular):
+    """
+    Retorna el resultado guardado de una consulta, o lo calcula y lo guarda.
+
+    Args:
+        particion: Identifica la conexión con que se consulta (por ejemplo,
+            la ruta de la base y la conexión).
+        clave: La consulta y sus parámetros; debe ser hashable.
+        version: La versión de los datos de la partición en este momento.
+        calcular: Función sin argumentos que ejecuta la consulta.
+
+    Retorna:
+        El resultado de `calcular` pasado por `inmutable` (el mismo objeto
+        en cada acierto).
+    """
+    global _bytes
+    llave = (particion, clave)
+    with _lock:
+        if _versiones.get(particion) != version:
+            if particion in _versiones:
+                _invalidar(particion)
+            _versiones[particion] = version
+        guardado = _entradas.get(llave)
+        if guardado is not None:
+            _entradas.move_to_end(llave)
+            _estadisticas["aciertos"] += 1
+            return guardado[0]
+        _estadisticas["fallos"] += 1
+
+    resultado = inmutable(calcular())
+    tamano = _tamano(resultado)
+    if tamano > MAX_BYTES:
+        return resultado
+    with _lock:
+        # Si los datos cambiaron mientras se calculaba, el resultado ya no sirve
+        if _versiones.get(particion) == version and llave not in _entradas:
+            _entradas[llave] = (resultado, tamano)
+            _bytes += tamano
+            while len(_entradas) > MAX_ENTRADAS or _bytes > MAX_BYTES:
+                _quitar(next(iter(_entradas)))
+                _estadisticas["descartes"] += 1
+    return resultado
+
+def descartar_particion(particion):
+    """
+    Descarta los resultados de una partición, por ejemplo al cerrar su conexión.
+
+    Args:
+        particion: La partición, como se pasó a `obtener`.
+
+    La función no devuelve ningún valor.
+    """
+    with _lock:
+        if _versiones.pop(particion, None) is not None:
+            for llave in [llave for llave in _entradas if llave[0] == particion]:
+                _quitar(llave)
+
+def vaciar():
+    """
+    Descarta todos los resultados guardados (las estadísticas se conservan).
+
+    Args:
+        Esta función no recibe parámetros.
+
+    La función no devuelve ningún valor.
+    """
+    global _bytes
+    with _lock:
+        _entradas.clear()
+        _versiones.clear()
+        _bytes = 0
+
+def estadisticas():
+    """
+    Retorna el uso de la caché.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        dict: Con las claves `aciertos`, `fallos`, `tasa_aciertos` (0 a 1),
+        `invalidaciones` (veces que se descartó una partición porque cambiaron
+        los datos), `descartes` (resultados quitados por los límites),
+        `entradas`, `bytes`, `max_entradas` y `max_bytes`.
+    """
+    with _lock:
+        datos = dict(_estadisticas)
+        datos.update(entradas=len(_entradas), bytes=_bytes)
+    consultas = datos["aciertos"] + datos["fallos"]
+    datos["tasa_aciertos"] = datos["aciertos"] / consultas if consultas else 0.0
+    datos.update(max_entradas=MAX_ENTRADAS, max_bytes=MAX_BYTES)
+    return datos
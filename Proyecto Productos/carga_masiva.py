@@ -0,0 +1,270 @@
+# carga_masiva.py
+"""
+Módulo de importación y exportación masiva de datos. 🚚
+
+Permite cargar catálogos grandes de productos y categorías desde archivos
+CSV o JSONL, y exportarlos en los mismos formatos. Los archivos se procesan
+en flujo (streaming): se leen por bloques de tamaño configurable y cada bloque
+se inserta con `executemany` dentro de una sola transacción, por lo que la
+memoria usada no depende del tamaño del archivo.
+
+Formato esperado de las filas de productos: `nombre`, `categoria` (nombre de
+la categoría) y `precio` (entero no negativo). Para categorías solo `nombre`.
+"""
+import csv
+import json
+import time
+from itertools import islice
+
+import database as db
+
+TAM_LOTE_POR_DEFECTO = 5000
+LIMITE_CATEGORIAS = 10
+COLUMNAS_PRODUCTOS = ["id", "nombre", "categoria", "precio"]
+
+def detectar_formato(ruta):
+    """
+    Determina el formato de un archivo a partir de su extensión.
+
+    Args:
+        ruta (str): La ruta del archivo.
+
+    Retorna:
+        str: `'csv'` o `'jsonl'`.
+
+    Lanza:
+        ValueError: Si la extensión no corresponde a un formato soportado.
+    """
+    ruta_min = ruta.lower()
+    if ruta_min.endswith(".csv"):
+        return "csv"
+    if ruta_min.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    raise ValueError(f"Formato no soportado para '{ruta}'. Use .csv o .jsonl")
+
+def _leer_registros(archivo, formato):
+    """
+    Genera un diccionario por cada fila del archivo, sin leerlo completo.
+
+    Args:
+        archivo: El archivo de texto ya abierto.
+        formato (str): `'csv'` o `'jsonl'`.
+
+    Retorna:
+        un generador de diccionarios con los campos de cada fila.
+    """
+    if formato == "csv":
+        yield from csv.DictReader(archivo)
+    else:
+        for linea in archivo:
+            if linea.strip():
+                yield json.loads(linea)
+
+def _en_lotes(iterable, tam_lote):
+    """
+    Agrupa los elementos de un iterable en listas de `tam_lote` elementos.
+
+    Args:
+        iterable: Los elementos a agrupar.
+        tam_lote (int): La cantidad máxima de elementos por lote.
+
+    Retorna:
+        un generador de listas.
+    """
+    iterador = iter(iterable)
+    while True:
+        lote = list(islice(iterador, tam_lote))
+        if not lote:
+            return
+        yield lote
+
+def _validar_producto(num_fila, registro):
+    """
+    Aplica a una fila importada las mismas reglas que el alta interactiva.
+
+    Args:
+        num_fila (int): El número de fila, usado en los mensajes de error.
+        registro (dict): Los campos leídos del archivo.
+
+    Retorna:
+        una tupla `(nombre, nombre_categoria, precio)` ya normalizada.
+
+    Lanza:
+        ValueError: Si el nombre o la categoría están vacíos o el precio no es
+        un entero no negativo.
+    """
+    nombre = str(registro.get("nombre") or "").strip()
+    categoria = str(registro.get("categoria") or "").strip()
+    if not nombre:
+        raise ValueError(f"Fila {num_fila}: el nombre no puede estar vacío.")
+    if not categoria:
+        raise ValueError(f"Fila {num_fila}: la categoría no puede estar vacía.")
+    try:
+        precio = int(registro.get("precio"))
+    except (TypeError, ValueError):
+        raise ValueError(f"Fila {num_fila}: el precio debe ser un número entero.") from None
+    if precio < 0:
+        raise ValueError(f"Fila {num_fila}: el precio no puede ser un número negativo.")
+    return nombre, categoria, precio
+
+class _ResolutorCategorias:
+    """
+    Traduce nombres de categoría a IDs usando un diccionario en memoria.
+
+    Las categorías se consultan una sola vez; si `crear` es True, las que no
+    existen se crean respetando el límite de categorías del sistema.
+    """
+
+    def __init__(self, crear):
+        self.crear = crear
+        self.ids = {nombre: id_cat for id_cat, nombre in db.obtener_categorias_db()}
+
+    def resolver(self, num_fila, nombre):
+        id_cat = self.ids.get(nombre)
+        if id_cat is not None:
+            return id_cat
+        if not self.crear:
+            raise ValueError(f"Fila {num_fila}: la categoría '{nombre}' no existe.")
+        if len(self.ids) >= LIMITE_CATEGORIAS:
+            raise ValueError(f"Fila {num_fila}: se alcanzó el límite de "
+                             f"{LIMITE_CATEGORIAS} categorías al crear '{nombre}'.")
+        db.agregar_categoria_db(nombre)
+        self.ids = {n: i for i, n in db.obtener_categorias_db()}
+        return self.ids[nombre]
+
+def _resumen(filas, inicio):
+    """Arma el diccionario de resultado con el total de filas y el ritmo."""
+    segundos = time.perf_counter() - inicio
+    return {
+        "filas": filas,
+        "segundos": segundos,
+        "filas_por_segundo": filas / segundos if segundos > 0 else 0.0,
+    }
+
+def importar_productos(ruta, formato=None, tam_lote=TAM_LOTE_POR_DEFECTO,
+                       crear_categorias=False, progreso=None):
+    """
+    Importa productos desde un archivo CSV o JSONL por lotes.
+
+    Cada lote se valida completo antes de insertarse, y se inserta con
+    `executemany` dentro de su propia transacción. Si una fila es inválida se
+    lanza `ValueError`; los lotes anteriores ya quedan confirmados.
+
+    Args:
+        ruta (str): La ruta del archivo a importar.
+        formato (str): `'csv'` o `'jsonl'`; si es None se deduce de la extensión.
+        tam_lote (int): La cantidad de filas por transacción.
+        crear_categorias (bool): Si es True, crea las categorías inexistentes.
+        progreso: Función opcional que se llama tras cada lote con los
+            argumentos `(filas_importadas, filas_por_segundo)`.
+
+    Retorna:
+        dict: Un resumen con las claves `filas`, `segundos` y `filas_por_segundo`.
+    """
+    formato = formato or detectar_formato(ruta)
+    categorias = _ResolutorCategorias(crear_categorias)
+    inicio = time.perf_counter()
+    total = 0
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        registros = enumerate(_leer_registros(archivo, formato), start=1)
+        for lote in _en_lotes(registros, tam_lote):
+            filas = []
+            for num_fila, registro in lote:
+                nombre, categoria, precio = _validar_producto(num_fila, registro)
+                filas.append((nombre, categorias.resolver(num_fila, categoria), precio))
+            total += db.agregar_productos_lote_db(filas)
+            if progreso:
+                progreso(total, _resumen(total, inicio)["filas_por_segundo"])
+    return _resumen(total, inicio)
+
+def importar_categorias(ruta, formato=None):
+    """
+    Importa categorías desde un archivo CSV o JSONL.
+
+    Las categorías que ya existen se omiten. Se respeta el límite de
+    categorías del sistema.
+
+    Args:
+        ruta (str): La ruta del archivo a importar.
+        formato (str): `'csv'` o `'jsonl'`; si es None se deduce de la extensión.
+
+    Retorna:
+        dict: Un resumen con las claves `filas`, `segundos` y `filas_por_segundo`.
+    """
+    formato = formato or detectar_formato(ruta)
+    categorias = _ResolutorCategorias(crear=True)
+    inicio = time.perf_counter()
+    creadas = 0
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        for num_fila, registro in enumerate(_leer_registros(archivo, formato), start=1):
+            nombre = str(registro.get("nombre") or "").strip()
+            if not nombre:
+                raise ValueError(f"Fila {num_fila}: el nombre no puede estar vacío.")
+            if nombre not in categorias.ids:
+                categorias.resolver(num_fila, nombre)
+                creadas += 1
+    return _resumen(creadas, inicio)
+
+def exportar_productos(ruta, formato=None, progreso=None, cada=TAM_LOTE_POR_DEFECTO):
+    """
+    Exporta todos los productos a un archivo CSV o JSONL en flujo.
+
+    Los productos se leen del cursor y se escriben por bloques de `cada`
+    filas (`db.iterar_bloques_productos_db`), sin construir la lista
+    completa en memoria: solo hay un bloque a la vez.
+
+    Args:
+        ruta (str): La ruta del archivo de destino.
+        formato (str): `'csv'` o `'jsonl'`; si es None se deduce de la extensión.
+        progreso: Función opcional que se llama cada `cada` filas con los
+            argumentos `(filas_exportadas, filas_por_segundo)`.
+        cada (int): Cada cuántas filas se informa el progreso; también es el
+            tamaño de los bloques.
+
+    Retorna:
+        dict: Un resumen con las claves `filas`, `segundos` y `filas_por_segundo`.
+    """
+    formato = formato or detectar_formato(ruta)
+    inicio = time.perf_counter()
+    total = 0
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo) if formato == "csv" else None
+        if escritor:
+            escritor.writerow(COLUMNAS_PRODUCTOS)
+        for bloque in db.iterar_bloques_productos_db(cada):
+            if escritor:
+                escritor.writerows(bloque)
+            else:
+                archivo.write("".join(json.dumps(dict(zip(COLUMNAS_PRODUCTOS, fila)),
+                                                 ensure_ascii=False) + "\n" for fila in bloque))
+            total += len(bloque)
+            if progreso and len(bloque) == cada:
+                progreso(total, _resumen(total, inicio)["filas_por_segundo"])
+    return _resumen(total, inicio)
+
+def exportar_categorias(ruta, formato=None):
+    """
+    Exporta todas las categorías a un archivo CSV o JSONL.
+
+    Args:
+        ruta (str): La ruta del archivo de destino.
+        formato (str): `'csv'` o `'jsonl'`; si es None se deduce de la extensión.
+
+    Retorna:
+        dict: Un resumen con las claves `filas`, `segundos` y `filas_por_segundo`.
+    """
+    formato = formato or detectar_formato(ruta)
+    inicio = time.perf_counter()
+    total = 0
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo) if formato == "csv" else None
+        if escritor:
+            escritor.writerow(["id", "nombre"])
+        for id_cat, nombre in db.iterar_categorias_db():
+            if escritor:
+                escritor.writerow((id_cat, nombre))
+            else:
+                archivo.write(json.dumps({"id": id_cat, "nombre": nombre},
+                                         ensure_ascii=False) + "\n")
+            total += 1
+    return _resumen(total, inicio)
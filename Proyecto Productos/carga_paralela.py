@@ -0,0 +1,251 @@
+# carga_paralela.py
+"""
+Importación de productos en paralelo, con varios procesos. 🏭
+
+Para archivos muy grandes la importación de `carga_masiva.py` queda limitada
+a un núcleo: la mayor parte del tiempo se va en leer, validar y resolver las
+categorías de cada fila, no en escribir. Aquí ese trabajo se reparte:
+
+1. El archivo se divide en tramos de bytes (`TAM_TRAMO` bytes, ajustados al
+   comienzo de una línea).
+2. Un pool de procesos lee cada tramo, valida sus filas con las mismas reglas
+   que el alta interactiva (`carga_masiva._validar_producto`) y traduce los
+   nombres de categoría a IDs.
+3. El proceso principal es el único escritor: recibe los tramos en el orden
+   del archivo e inserta las filas válidas en lotes de `tam_lote`, cada uno
+   en su propia transacción. Nunca hay más de `EN_VUELO_POR_PROCESO` tramos
+   por proceso esperando, así que la memoria no depende del tamaño del
+   archivo aunque la base escriba más lento de lo que se valida.
+
+A diferencia de la importación secuencial, una fila inválida no detiene la
+carga: se anota en el archivo de errores (JSON Lines con `fila`, `error` y
+`registro`) y se sigue con las demás. `registro` es siempre la fila tal como
+se leyó del archivo: un objeto con las columnas (CSV) o claves (JSONL)
+originales, sin validar ni convertir, o el texto de la línea si no se pudo
+interpretar como objeto JSON. Sin archivo de errores, la primera
+fila inválida lanza `ValueError` como en `carga_masiva.importar_productos`.
+
+El ritmo crece con la cantidad de procesos hasta que el escritor (SQLite,
+con sus índices y disparadores) pasa a ser el límite.
+
+Limitación: los tramos se cortan en saltos de línea, así que un CSV con
+campos entre comillas que contengan saltos de línea debe importarse con
+`carga_masiva.importar_productos`.
+
+Uso:
+    import carga_paralela
+    carga_paralela.importar_productos("catalogo.csv", procesos=4,
+                                      archivo_errores="rechazadas.jsonl")
+"""
+import csv
+import io
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import database as db
+from carga_masiva import (TAM_LOTE_POR_DEFECTO, _ResolutorCategorias, _resumen,
+                          _validar_producto, detectar_formato)
+
+TAM_TRAMO = 4 * 2**20
+EN_VUELO_POR_PROCESO = 2
+
+# Categorías conocidas por cada proceso del pool (nombre -> ID)
+_categorias = {}
+
+def _iniciar_proceso(categorias):
+    """Inicializador del pool: recibe las categorías existentes al empezar."""
+    global _categorias
+    _categorias = categorias
+
+def _tramos(ruta, formato, tam_tramo):
+    """
+    Divide un archivo en tramos de bytes que empiezan y terminan en un salto de línea.
+
+    Args:
+        ruta (str): La ruta del archivo.
+        formato (str): `'csv'` o `'jsonl'`.
+        tam_tramo (int): El tamaño aproximado de cada tramo en bytes.
+
+    Retorna:
+        una tupla `(campos, tramos)`: los nombres de columna del encabezado
+        si es CSV (o None) y una lista de pares `(inicio, fin)`.
+    """
+    tamano = os.path.getsize(ruta)
+    with open(ruta, "rb") as archivo:
+        campos = None
+        if formato == "csv":
+            encabezado = archivo.readline().decode("utf-8")
+            campos = next(csv.reader([encabezado]), None)
+        tramos = []
+        inicio = archivo.tell()
+        while inicio < tamano:
+            archivo.seek(min(inicio + tam_tramo, tamano))
+            archivo.readline()
+            fin = archivo.tell()
+            tramos.append((inicio, fin))
+            inicio = fin
+    return campos, tramos
+
+def _procesar_tramo(ruta, formato, campos, inicio, fin):
+    """
+    Lee y valida las filas de un tramo del archivo (se ejecuta en el pool).
+
+    Las filas se numeran desde 1 dentro del tramo; el escritor les suma las
+    filas de los tramos anteriores.
+
+    Retorna:
+        una tupla `(cantidad, validas, sin_categoria, rechazadas)`:
+        - `validas`: tuplas `(nombre, categoria, precio)` listas para insertar;
+          `categoria` es el ID, o el nombre si el pool no la conocía.
+        - `sin_categoria`: tuplas `(posicion, num_fila, registro)` de las
+          filas de `validas` con la categoría sin resolver.
+        - `rechazadas`: tuplas `(num_fila, registro)`.
+
+        `registro` es la fila original: el diccionario leído, o el texto de
+        la línea si no es un objeto JSON.
+    """
+    with open(ruta, "rb") as archivo:
+        archivo.seek(inicio)
+        texto = archivo.read(fin - inicio).decode("utf-8")
+    lineas = io.StringIO(texto, newline="")
+    if formato == "csv":
+        registros = csv.DictReader(lineas, fieldnames=campos)
+    else:
+        registros = (_leer_json(linea) for linea in lineas if linea.strip())
+
+    validas, sin_categoria, rechazadas = [], [], []
+    cantidad = 0
+    for cantidad, registro in enumerate(registros, start=1):
+        try:
+            if isinstance(registro, str):
+                raise ValueError
+            nombre, categoria, precio = _validar_producto(cantidad, registro)
+        except ValueError:
+            rechazadas.append((cantidad, registro))
+            continue
+        id_cat = _categorias.get(categoria)
+        if id_cat is None:
+            sin_categoria.append((len(validas), cantidad, registro))
+            id_cat = categoria
+        validas.append((nombre, id_cat, precio))
+    return cantidad, validas, sin_categoria, rechazadas
+
+def _leer_json(linea):
+    """Interpreta una línea JSON; retorna la línea sin el salto si no es un objeto válido."""
+    try:
+        registro = json.loads(linea)
+    except ValueError:
+        return linea.rstrip("\r\n")
+    return registro if isinstance(registro, dict) else linea.rstrip("\r\n")
+
+def _motivo_rechazo(num_fila, registro):
+    """Arma el mensaje de error de una fila rechazada, con su número real de fila."""
+    if isinstance(registro, str):
+        return f"Fila {num_fila}: la línea no es un objeto JSON válido."
+    try:
+        _validar_producto(num_fila, registro)
+    except ValueError as error:
+        return str(error)
+    return f"Fila {num_fila}: fila inválida."
+
+def importar_productos(ruta, formato=None, tam_lote=TAM_LOTE_POR_DEFECTO,
+                       crear_categorias=False, procesos=None, archivo_errores=None,
+                       progreso=None, tam_tramo=TAM_TRAMO):
+    """
+    Importa productos desde un archivo CSV o JSONL validando en varios procesos.
+
+    Args:
+        ruta (str): La ruta del archivo a importar.
+        formato (str): `'csv'` o `'jsonl'`; si es None se deduce de la extensión.
+        tam_lote (int): La cantidad de filas por transacción.
+        crear_categorias (bool): Si es True, crea las categorías inexistentes.
+        procesos (int): La cantidad de procesos del pool; por defecto, uno por núcleo.
+        archivo_errores (str): Archivo JSON Lines donde se anotan las filas
+            rechazadas, una por línea con `fila`, `error` y `registro` (la
+            fila original tal como se leyó, o el texto de la línea si no se
+            pudo interpretar). Si es None, la primera fila inválida detiene
+            la carga.
+        progreso: Función opcional que se llama tras cada lote con los
+            argumentos `(filas_importadas, filas_por_segundo)`.
+        tam_tramo (int): El tamaño en bytes de cada tramo del archivo.
+
+    Retorna:
+        dict: Un resumen con las claves `filas`, `rechazadas`, `procesos`,
+        `segundos` y `filas_por_segundo`.
+
+    Lanza:
+        ValueError: Si hay una fila inválida y no se indicó `archivo_errores`.
+            Los lotes anteriores ya quedan confirmados.
+    """
+    formato = formato or detectar_formato(ruta)
+    procesos = procesos or os.cpu_count() or 1
+    categorias = _ResolutorCategorias(crear_categorias)
+    inicio = time.perf_counter()
+    campos, tramos = _tramos(ruta, formato, tam_tramo)
+
+    estado = {"filas": 0, "rechazadas": 0, "leidas": 0}
+    pendientes = []
+    errores = open(archivo_errores, "w", encoding="utf-8") if archivo_errores else None
+
+    def escribir(lote):
+        estado["filas"] += db.agregar_productos_lote_db(lote)
+        if progreso:
+            progreso(estado["filas"], _resumen(estado["filas"], inicio)["filas_por_segundo"])
+
+    def rechazar(num_fila, motivo, registro):
+        if errores is None:
+            raise ValueError(motivo)
+        errores.write(json.dumps({"fila": num_fila, "error": motivo, "registro": registro},
+                                 ensure_ascii=False) + "\n")
+        estado["rechazadas"] += 1
+
+    def recibir(futuro):
+        cantidad, validas, sin_categoria, malas = futuro.result()
+        previas = estado["leidas"]
+        descartadas = False
+        for num_fila, registro in malas:
+            rechazar(previas + num_fila, _motivo_rechazo(previas + num_fila, registro), registro)
+        for posicion, num_fila, registro in sin_categoria:
+            nombre, categoria, precio = validas[posicion]
+            try:
+                validas[posicion] = (nombre, categorias.resolver(previas + num_fila, categoria),
+                                     precio)
+            except ValueError as error:
+                validas[posicion] = None
+                descartadas = True
+                rechazar(previas + num_fila, str(error), registro)
+        if descartadas:
+            validas = [fila for fila in validas if fila is not None]
+        estado["leidas"] += cantidad
+        pendientes.extend(validas)
+        while len(pendientes) >= tam_lote:
+            escribir(pendientes[:tam_lote])
+            del pendientes[:tam_lote]
+
+    try:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso,
+                                 initargs=(dict(categorias.ids),)) as pool:
+            en_vuelo = deque()
+            try:
+                for tramo in tramos:
+                    if len(en_vuelo) >= procesos * EN_VUELO_POR_PROCESO:
+                        # Cola llena: se escribe el tramo más antiguo antes de leer otro
+                        recibir(en_vuelo.popleft())
+                    en_vuelo.append(pool.submit(_procesar_tramo, ruta, formato, campos, *tramo))
+                while en_vuelo:
+                    recibir(en_vuelo.popleft())
+            except BaseException:
+                for futuro in en_vuelo:
+                    futuro.cancel()
+                raise
+        if pendientes:
+            escribir(pendientes)
+    finally:
+        if errores:
+            errores.close()
+    resumen = _resumen(estado["filas"], inicio)
+    resumen.update(rechazadas=estado["rechazadas"], procesos=procesos)
+    return resumen
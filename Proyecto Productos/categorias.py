@@ -57,7 +57,7 @@ def modificar_una_categoria():
         try:
             id_cat_str = ui.obtener_input("Ingrese el ID de la categoría a modificar: ")
             id_cat = int(id_cat_str)
-            if id_cat in [c[0] for c in categorias]:
+            if db.existe_categoria_db(id_cat):
                 break # El ID es válido y existe
             else:
                 ui.mostrar_mensaje_error("ID no válido. Intente de nuevo.")
@@ -95,7 +95,45 @@ def eliminar_una_categoria():
         try:
             id_cat_str = ui.obtener_input("Ingrese el ID de la categoría a eliminar: ")
             id_cat = int(id_cat_str)
-            if id_cat in [c[0] for c in categorias]:
+            if db.existe_categoria_db(id_cat):
                 break # El ID es válido y existe
             else:
-                ui.mostrar
\ No newline at end of file
+                ui.mostrar_mensaje_error("ID no válido. Intente de nuevo.")
+        except ValueError:
+            ui.mostrar_mensaje_error(" Debe ingresar un ID numérico.")
+
+    # Regla de negocio: no se puede eliminar una categoría con productos
+    if db.contar_productos_en_categoria_db(id_cat) > 0:
+        ui.mostrar_mensaje_error("No se puede eliminar la categoría porque tiene productos asociados.")
+        return
+
+    try:
+        db.eliminar_categoria_db(id_cat)
+        ui.mostrar_mensaje_exito("Categoría eliminada.")
+    except sqlite3.IntegrityError:
+        ui.mostrar_mensaje_error("No se puede eliminar la categoría porque tiene productos asociados.")
+
+def gestionar_categorias():
+    """
+    Bucle principal para la gestión de categorías.
+
+    Args:
+        Esta función no recibe parámetros.
+    La función no devuelve ningún valor.
+    """
+    while True:
+        ui.mostrar_menu_categorias()
+        opcion = ui.obtener_input("Seleccione una opción: ")
+
+        if opcion == '1':
+            agregar_nueva_categoria()
+        elif opcion == '2':
+            ui.mostrar_lista_categorias(db.obtener_categorias_db())
+        elif opcion == '3':
+            modificar_una_categoria()
+        elif opcion == '4':
+            eliminar_una_categoria()
+        elif opcion == '5':
+            break
+        else:
+            ui.mostrar_mensaje_error(" Opción inválida.")
@@ -0,0 +1,428 @@
+# cli.py
+"""
+Interfaz de línea de comandos no interactiva. ⌨️
+
+Permite usar el gestor desde scripts, cron o tuberías sin pasar por los
+menús de `main.py`. Cada subcomando llama directamente a `database.py` (o a
+`carga_masiva.py`) y escribe su resultado en formato legible por máquinas:
+JSON Lines (un objeto por línea, el formato por defecto) o TSV.
+
+Para que cada invocación termine rápido, los módulos se importan solo
+cuando el subcomando los necesita, y nunca se carga `colorama` ni `ui`.
+
+Ejemplos:
+    python cli.py list --formato tsv
+    python cli.py add "Café molido" --categoria Bebidas --precio 1500
+    python cli.py search cafe --limite 10
+    python cli.py update 12 --precio 1800
+    python cli.py delete 12 13 14
+    python cli.py import catalogo.csv --lote 10000 --crear-categorias
+    python cli.py import catalogo.csv --procesos 4 --errores rechazadas.jsonl
+    python cli.py export catalogo.jsonl
+    python cli.py changes --desde-id 1500
+    python cli.py prices 12 --desde 2026-04-01 --hasta 2026-06-30
+    python cli.py valuation --en 2026-06-30 --categoria Bebidas
+    python cli.py prices-export precios.hpc
+    python cli.py prices-retain --dias-completos 90 --dias-maximos 730
+    python cli.py backup respaldos/productos.db.gz
+    python cli.py restore respaldos/productos.db.gz
+    python cli.py --fragmentos datos rebalance --cantidad 4 --importar productos.db
+    python cli.py --fragmentos datos list --limite 20
+
+Códigos de salida: 0 si la operación terminó bien, 1 si falló por datos
+inválidos o por la base de datos, 2 si los argumentos son incorrectos.
+"""
+import argparse
+import json
+import sys
+
+# Los mismos campos que `modelos.Producto`
+COLUMNAS_PRODUCTO = ("id", "nombre", "categoria", "precio")
+COLUMNAS_CATEGORIA = ("id", "nombre")
+# Los mismos campos que `modelos.Cambio`
+COLUMNAS_CAMBIO = ("id", "lote", "momento", "origen", "operacion", "producto_id",
+                   "antes", "despues")
+# Los mismos campos que `modelos.PrecioHistorico`
+COLUMNAS_PRECIO = ("producto_id", "momento", "precio", "categoria_id")
+COLUMNAS_VALUACION = ("categoria_id", "categoria", "productos", "valor")
+
+class ErrorCli(Exception):
+    """Error de uso o de datos que se informa al usuario sin traza."""
+
+def _escribir_filas(filas, columnas, formato, salida=sys.stdout):
+    """
+    Escribe filas en JSON Lines o TSV a medida que se van generando.
+
+    Args:
+        filas: Un iterable de tuplas.
+        columnas: Los nombres de las columnas de cada tupla.
+        formato (str): `'json'` o `'tsv'`.
+        salida: El archivo de salida.
+
+    Retorna:
+        int: La cantidad de filas escritas.
+    """
+    total = 0
+    if formato == "tsv":
+        salida.write("\t".join(columnas) + "\n")
+    for fila in filas:
+        if formato == "tsv":
+            salida.write("\t".join(str(v).replace("\t", " ") for v in fila) + "\n")
+        else:
+            salida.write(json.dumps(dict(zip(columnas, fila)), ensure_ascii=False) + "\n")
+        total += 1
+    return total
+
+def _escribir_resultado(resultado, formato, salida=sys.stdout):
+    """Escribe un único objeto de resultado en el formato pedido."""
+    _escribir_filas([tuple(resultado.values())], tuple(resultado), formato, salida)
+
+def _resolver_categoria(db, valor):
+    """Acepta el nombre o el ID de una categoría y retorna su ID."""
+    id_cat = db.obtener_id_categoria_db(valor)
+    if id_cat is None and valor.isdigit() and db.existe_categoria_db(int(valor)):
+        id_cat = int(valor)
+    if id_cat is None:
+        raise ErrorCli(f"La categoría '{valor}' no existe.")
+    return id_cat
+
+def _momento(valor):
+    """Tipo de argparse: acepta segundos Unix o una fecha ISO (`2026-06-30`, hora local)."""
+    from datetime import datetime
+    try:
+        return float(valor)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(valor).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{valor}' no es una fecha ni un momento válido.")
+
+def _validar_nombre(nombre):
+    """Aplica la regla del alta interactiva: el nombre no puede estar vacío."""
+    nombre = nombre.strip()
+    if not nombre:
+        raise ErrorCli("El nombre no puede estar vacío.")
+    return nombre
+
+def _validar_precio(precio):
+    """Aplica la regla del alta interactiva: el precio no puede ser negativo."""
+    if precio < 0:
+        raise ErrorCli("El precio no puede ser un número negativo.")
+    return precio
+
+def _cmd_add(args, db):
+    """Subcomando `add`: agrega un producto con las validaciones del alta interactiva."""
+    nombre = _validar_nombre(args.nombre)
+    id_cat = _resolver_categoria(db, args.categoria)
+    db.agregar_producto_db(nombre, id_cat, _validar_precio(args.precio))
+    _escribir_resultado({"agregado": nombre}, args.formato)
+
+def _cmd_list(args, db):
+    """Subcomando `list`: emite los productos en flujo, o una página con --limite."""
+    if args.limite is None:
+        _escribir_filas(db.iterar_productos_db(), COLUMNAS_PRODUCTO, args.formato)
+    else:
+        filas, _ = db.obtener_pagina_productos_db(args.limite, desde_nombre=args.desde)
+        _escribir_filas(filas, COLUMNAS_PRODUCTO, args.formato)
+
+def _cmd_search(args, db):
+    """Subcomando `search`: emite los productos encontrados, los más relevantes primero."""
+    _escribir_filas(db.iterar_busqueda_productos_db(args.termino, args.limite),
+                    COLUMNAS_PRODUCTO, args.formato)
+
+def _cmd_categories(args, db):
+    """Subcomando `categories`: emite las categorías ordenadas por nombre."""
+    _escribir_filas(db.iterar_categorias_db(), COLUMNAS_CATEGORIA, args.formato)
+
+def _cmd_update(args, db):
+    """Subcomando `update`: aplica todos los cambios pedidos en una sola transacción."""
+    cambios = {}
+    if args.nombre is not None:
+        cambios["nombre"] = _validar_nombre(args.nombre)
+    if args.categoria is not None:
+        cambios["categoria_id"] = _resolver_categoria(db, args.categoria)
+    if args.precio is not None:
+        cambios["precio"] = _validar_precio(args.precio)
+    if not cambios:
+        raise ErrorCli("Indique al menos uno de --nombre, --categoria o --precio.")
+    if not db.existe_producto_db(args.id):
+        raise ErrorCli(f"No existe el producto con ID {args.id}.")
+    with db.transaccion():
+        for campo, valor in cambios.items():
+            db.modificar_producto_db(args.id, campo, valor)
+    _escribir_resultado({"actualizado": args.id}, args.formato)
+
+def _cmd_delete(args, db):
+    """Subcomando `delete`: elimina los IDs indicados e informa cuántos existían."""
+    _escribir_resultado({"eliminados": db.eliminar_productos_lote_db(args.ids)}, args.formato)
+
+def _solo_sin_fragmentos(args):
+    """Rechaza los subcomandos que trabajan sobre un único archivo de base."""
+    if args.fragmentos:
+        raise ErrorCli(f"El subcomando '{args.comando}' no está disponible con --fragmentos.")
+
+def _cmd_import(args, db):
+    """Subcomando `import`: carga un archivo con `carga_masiva`."""
+    _solo_sin_fragmentos(args)
+    import carga_masiva
+
+    def progreso(filas, ritmo):
+        print(f"{filas} filas ({ritmo:,.0f} filas/s)", file=sys.stderr)
+
+    if args.categorias:
+        resumen = carga_masiva.importar_categorias(args.ruta, args.tipo)
+    elif args.procesos or args.errores:
+        import carga_paralela
+        resumen = carga_paralela.importar_productos(
+            args.ruta, args.tipo, args.lote, args.crear_categorias, args.procesos,
+            args.errores, progreso if args.progreso else None)
+    else:
+        resumen = carga_masiva.importar_productos(
+            args.ruta, args.tipo, args.lote, args.crear_categorias,
+            progreso if args.progreso else None)
+    _escribir_resultado(resumen, args.formato)
+
+def _cmd_export(args, db):
+    """Subcomando `export`: escribe un archivo con `carga_masiva`."""
+    _solo_sin_fragmentos(args)
+    import carga_masiva
+    if args.categorias:
+        resumen = carga_masiva.exportar_categorias(args.ruta, args.tipo)
+    else:
+        resumen = carga_masiva.exportar_productos(args.ruta, args.tipo)
+    _escribir_resultado(resumen, args.formato)
+
+def _cmd_changes(args, db):
+    """Subcomando `changes`: emite los cambios del diario posteriores a un ID o un momento.
+    Quien sincroniza guarda el último `id` recibido y lo pasa en la consulta siguiente."""
+    _solo_sin_fragmentos(args)
+    _escribir_filas(db.cambios_desde_db(args.desde_id, args.limite, args.desde),
+                    COLUMNAS_CAMBIO, args.formato)
+
+def _cmd_prices(args, db):
+    """Subcomando `prices`: emite la evolución del precio de un producto."""
+    _solo_sin_fragmentos(args)
+    _escribir_filas(db.historial_precio_db(args.id, args.desde, args.hasta),
+                    COLUMNAS_PRECIO, args.formato)
+
+def _cmd_valuation(args, db):
+    """Subcomando `valuation`: emite el valor del catálogo por categoría en una fecha."""
+    _solo_sin_fragmentos(args)
+    import historial_precios
+    id_cat = _resolver_categoria(db, args.categoria) if args.categoria else None
+    filas = historial_precios.valor_catalogo(args.en, id_cat)
+    _escribir_filas((tuple(fila.values()) for fila in filas), COLUMNAS_VALUACION, args.formato)
+
+def _cmd_prices_export(args, db):
+    """Subcomando `prices-export`: exporta el historial de precios en formato columnar."""
+    _solo_sin_fragmentos(args)
+    import historial_precios
+    _escribir_resultado(historial_precios.exportar_columnar(args.ruta, args.desde, args.hasta),
+                        args.formato)
+
+def _cmd_prices_retain(args, db):
+    """Subcomando `prices-retain`: reduce y poda el historial de precios antiguo."""
+    _solo_sin_fragmentos(args)
+    import historial_precios
+    _escribir_resultado(historial_precios.aplicar_retencion(
+        args.dias_completos, args.intervalo, args.dias_maximos), args.formato)
+
+def _cmd_backup(args, db):
+    """Subcomando `backup`: crea un respaldo en línea con `respaldo.py`."""
+    _solo_sin_fragmentos(args)
+    import respaldo
+
+    def progreso(copiadas, total):
+        print(f"{copiadas}/{total} páginas", file=sys.stderr)
+
+    _escribir_resultado(respaldo.crear_respaldo(args.destino, args.paginas, args.pausa,
+                                                progreso if args.progreso else None),
+                        args.formato)
+
+def _cmd_verify_backup(args, db):
+    """Subcomando `verify-backup`: verifica un respaldo; falla si no está sano."""
+    import respaldo
+    verificacion = respaldo.verificar_respaldo(args.ruta)
+    _escribir_resultado(verificacion, args.formato)
+    if not verificacion["ok"]:
+        raise ErrorCli(f"El respaldo '{args.ruta}' no está sano.")
+
+def _cmd_restore(args, db):
+    """Subcomando `restore`: reemplaza la base por el contenido de un respaldo verificado."""
+    _solo_sin_fragmentos(args)
+    import respaldo
+    _escribir_resultado(respaldo.restaurar_respaldo(args.ruta), args.formato)
+
+def _cmd_rebalance(args, db):
+    """Subcomando `rebalance`: crea o reparte el catálogo fragmentado de --fragmentos."""
+    import fragmentos
+    if not args.fragmentos:
+        raise ErrorCli("Indique la carpeta del catálogo con --fragmentos.")
+
+    def progreso(movidos):
+        print(f"{movidos} productos movidos", file=sys.stderr)
+
+    _escribir_resultado(fragmentos.rebalancear(args.fragmentos, args.cantidad, args.estrategia,
+                                               args.importar, progreso if args.progreso else None),
+                        args.formato)
+
+def crear_parser():
+    """
+    Construye el parser de argumentos con todos los subcomandos.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        argparse.ArgumentParser: El parser configurado.
+    """
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="Gestor de productos sin menús interactivos.")
+    parser.add_argument("--db", help="Archivo de la base de datos (por defecto productos.db).")
+    parser.add_argument("--fragmentos", metavar="CARPETA",
+                        help="Usa el catálogo fragmentado de esa carpeta (ver fragmentos.py).")
+    parser.add_argument("--formato", choices=("json", "tsv"), default="json",
+                        help="Formato de salida: JSON Lines o TSV (por defecto json).")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("add", help="Agrega un producto.")
+    p.add_argument("nombre")
+    p.add_argument("--categoria", required=True, help="Nombre o ID de la categoría.")
+    p.add_argument("--precio", type=int, required=True)
+    p.set_defaults(funcion=_cmd_add)
+
+    p = sub.add_parser("list", help="Lista los productos ordenados por nombre.")
+    p.add_argument("--limite", type=int, help="Máximo de productos (por defecto todos).")
+    p.add_argument("--desde", help="Empieza en el primer nombre mayor o igual (requiere --limite).")
+    p.set_defaults(funcion=_cmd_list)
+
+    p = sub.add_parser("search", help="Busca productos por nombre.")
+    p.add_argument("termino")
+    p.add_argument("--limite", type=int, default=50)
+    p.set_defaults(funcion=_cmd_search)
+
+    p = sub.add_parser("categories", help="Lista las categorías.")
+    p.set_defaults(funcion=_cmd_categories)
+
+    p = sub.add_parser("update", help="Modifica un producto.")
+    p.add_argument("id", type=int)
+    p.add_argument("--nombre")
+    p.add_argument("--categoria", help="Nombre o ID de la nueva categoría.")
+    p.add_argument("--precio", type=int)
+    p.set_defaults(funcion=_cmd_update)
+
+    p = sub.add_parser("delete", help="Elimina productos por ID.")
+    p.add_argument("ids", type=int, nargs="+")
+    p.set_defaults(funcion=_cmd_delete)
+
+    p = sub.add_parser("import", help="Importa productos (o categorías) desde CSV o JSONL.")
+    p.add_argument("ruta")
+    p.add_argument("--tipo", choices=("csv", "jsonl"), help="Formato del archivo (por defecto, según la extensión).")
+    p.add_argument("--lote", type=int, default=5000, help="Filas por transacción.")
+    p.add_argument("--crear-categorias", action="store_true", help="Crea las categorías que no existan.")
+    p.add_argument("--categorias", action="store_true", help="El archivo contiene categorías.")
+    p.add_argument("--procesos", type=int,
+                   help="Valida en paralelo con esta cantidad de procesos (ver carga_paralela.py).")
+    p.add_argument("--errores", metavar="ARCHIVO",
+                   help="Carga en paralelo y anota las filas rechazadas en este archivo JSONL.")
+    p.add_argument("--progreso", action="store_true", help="Informa el avance por stderr.")
+    p.set_defaults(funcion=_cmd_import)
+
+    p = sub.add_parser("export", help="Exporta productos (o categorías) a CSV o JSONL.")
+    p.add_argument("ruta")
+    p.add_argument("--tipo", choices=("csv", "jsonl"), help="Formato del archivo (por defecto, según la extensión).")
+    p.add_argument("--categorias", action="store_true", help="Exporta las categorías.")
+    p.set_defaults(funcion=_cmd_export)
+
+    p = sub.add_parser("changes", help="Lista los cambios de productos registrados en el diario.")
+    p.add_argument("--desde-id", type=int, default=0, help="Solo cambios con ID mayor.")
+    p.add_argument("--desde", type=float, help="Solo cambios desde este momento (segundos Unix).")
+    p.add_argument("--limite", type=int, default=1000)
+    p.set_defaults(funcion=_cmd_changes)
+
+    p = sub.add_parser("prices", help="Lista la evolución del precio de un producto.")
+    p.add_argument("id", type=int)
+    p.add_argument("--desde", type=_momento, help="Fecha ISO o segundos Unix (incluye el precio vigente).")
+    p.add_argument("--hasta", type=_momento, help="Fecha ISO o segundos Unix.")
+    p.set_defaults(funcion=_cmd_prices)
+
+    p = sub.add_parser("valuation", help="Valor del catálogo por categoría en una fecha.")
+    p.add_argument("--en", type=_momento, required=True, help="Fecha ISO o segundos Unix.")
+    p.add_argument("--categoria", help="Nombre o ID de la categoría (por defecto todas).")
+    p.set_defaults(funcion=_cmd_valuation)
+
+    p = sub.add_parser("prices-export", help="Exporta el historial de precios en formato columnar.")
+    p.add_argument("ruta")
+    p.add_argument("--desde", type=_momento, help="Fecha ISO o segundos Unix.")
+    p.add_argument("--hasta", type=_momento, help="Fecha ISO o segundos Unix.")
+    p.set_defaults(funcion=_cmd_prices_export)
+
+    p = sub.add_parser("prices-retain", help="Reduce y poda el historial de precios antiguo.")
+    p.add_argument("--dias-completos", type=float, default=90,
+                   help="Días que se conservan con todos los cambios (por defecto 90).")
+    p.add_argument("--intervalo", type=float, default=86400,
+                   help="Resolución en segundos del historial más antiguo (por defecto un día).")
+    p.add_argument("--dias-maximos", type=float, help="Descarta el historial más antiguo que esto.")
+    p.set_defaults(funcion=_cmd_prices_retain)
+
+    p = sub.add_parser("backup", help="Crea un respaldo en línea de la base (.gz para comprimir).")
+    p.add_argument("destino")
+    p.add_argument("--paginas", type=int, default=256,
+                   help="Páginas copiadas por paso; -1 copia todo de una vez (por defecto 256).")
+    p.add_argument("--pausa", type=float, default=0.002,
+                   help="Segundos de espera entre pasos (por defecto 0.002).")
+    p.add_argument("--progreso", action="store_true", help="Informa el avance por stderr.")
+    p.set_defaults(funcion=_cmd_backup)
+
+    p = sub.add_parser("verify-backup", help="Verifica un respaldo con PRAGMA quick_check.")
+    p.add_argument("ruta")
+    p.set_defaults(funcion=_cmd_verify_backup, abre_base=False)
+
+    p = sub.add_parser("restore", help="Reemplaza la base por el contenido de un respaldo.")
+    p.add_argument("ruta")
+    p.set_defaults(funcion=_cmd_restore)
+
+    p = sub.add_parser("rebalance", help="Crea o reparte un catálogo fragmentado (requiere --fragmentos).")
+    p.add_argument("--cantidad", type=int, required=True, help="Cantidad de fragmentos.")
+    p.add_argument("--estrategia", choices=("id", "categoria"), default="id",
+                   help="Reparto por ID de producto o por categoría (por defecto id).")
+    p.add_argument("--importar", metavar="BASE", help="Copia los productos de una base sin fragmentar.")
+    p.add_argument("--progreso", action="store_true", help="Informa el avance por stderr.")
+    p.set_defaults(funcion=_cmd_rebalance, abre_base=False)
+    return parser
+
+def main(argv=None):
+    """
+    Punto de entrada de la línea de comandos.
+
+    Args:
+        argv (list): Los argumentos a procesar; por defecto, los del proceso.
+
+    Retorna:
+        int: El código de salida.
+    """
+    args = crear_parser().parse_args(argv)
+    import sqlite3
+    import database as db
+    if args.db:
+        db.DB_NAME = args.db
+    datos = db
+    try:
+        if args.fragmentos and getattr(args, "abre_base", True):
+            import fragmentos
+            datos = fragmentos.CatalogoFragmentado(args.fragmentos)
+        if getattr(args, "abre_base", True):
+            datos.inicializar_db()
+        args.funcion(args, datos)
+        return 0
+    except (ErrorCli, ValueError, sqlite3.Error, OSError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    finally:
+        if datos is not db:
+            datos.cerrar()
+        db.cerrar_conexiones()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,84 +12,757 @@ permitiendo que otros módulos (como `productos.py` o `categorias.py`)
 operen con los datos sin necesidad de conocer los detalles de la implementación
 de la base de datos.
 """
+import functools
+import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from itertools import groupby
+
+import busqueda
+import cache_consultas
+import instrumentacion
+import migraciones
+import modelos
 
 DB_NAME = "productos.db"
 
+# Tamaño de la caché de sentencias preparadas de cada conexión. Como la
+# conexión vive durante toda la sesión, cada SQL se compila una sola vez.
+CACHE_SENTENCIAS = 256
+
+# Perfiles de almacenamiento: PRAGMAs que se aplican a cada conexión nueva.
+# - "wal": lectores y un escritor trabajan a la vez sin bloquearse, y cada
+#   confirmación no fuerza un fsync (synchronous=NORMAL es seguro en WAL).
+# - "clasico": el comportamiento original de SQLite (rollback journal y
+#   synchronous=FULL), para sistemas de archivos donde WAL no es posible
+#   (por ejemplo, carpetas de red).
+PERFILES = {
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,        # en KiB: 64 MiB
+        "mmap_size": 268435456,      # 256 MiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 2000,        # en milisegundos
+    },
+    "clasico": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 2000,
+    },
+}
+PERFIL = os.environ.get("PRODUCTOS_PERFIL", "wal")
+
+# Si tras `busy_timeout` la base sigue bloqueada, se reintenta el inicio de la
+# transacción con espera exponencial (con variación aleatoria) antes de fallar.
+REINTENTOS_BLOQUEO = 5
+ESPERA_INICIAL_S = 0.05
+
+# Cada cuántas transacciones confirmadas se hace un checkpoint pasivo del WAL
+CHECKPOINT_CADA = 500
+
+# Cada hilo mantiene su propia conexión de larga duración; `_conexiones`
+# guarda todas las abiertas para poder cerrarlas al terminar el programa.
+_local = threading.local()
+_conexiones = []
+_lock_conexiones = threading.Lock()
+_generacion = 0
+
+# Contador de escrituras confirmadas por este proceso. Junto con
+# `PRAGMA data_version` (que cambia con escrituras de otros procesos) permite
+# saber si los datos cambiaron desde la última consulta.
+_version_escrituras = 0
+
+# Escrituras de otros procesos, por base. `PRAGMA data_version` de una
+# conexión también cambia cuando confirma otra conexión de este mismo proceso
+# (por ejemplo, el hilo de `escritura_diferida`), así que no sirve por sí solo
+# para distinguirlas. Se consulta en una conexión aparte que nunca escribe (la
+# "sonda") y cada transacción de este proceso la pone al día antes y después
+# de confirmar: lo que cambie fuera de eso lo escribió otro proceso.
+# Cada entrada es `ruta -> [conexión, data_version, escrituras_externas]`;
+# la conexión es None tras `cerrar_conexiones` y se vuelve a abrir al consultar.
+_sondas = {}
+_lock_sondas = threading.Lock()
+
+# Caché de categorías. Cada hilo guarda una copia por base junto con la generación y el
+# `PRAGMA data_version` con que la cargó: las escrituras de categorías de este
+# proceso incrementan la generación y las de otros procesos cambian
+# `data_version`, y en ambos casos la copia se vuelve a cargar.
+_generacion_categorias = 0
+_estadisticas_categorias = {"aciertos": 0, "fallos": 0}
+
+# Cantidad de productos por página en los listados paginados
+TAM_PAGINA = 20
+
+# Funciones avisadas después de cada transacción confirmada con los IDs de
+# los productos que cambiaron (ver `suscribir_cambios`).
+_observadores = []
+
+# Máximo de parámetros por consulta `IN (...)`
+TAM_LOTE_IDS = 500
+
+# Filas que se piden a SQLite en cada `fetchmany` de los recorridos en flujo
+# (`iterar_*_db`): acota la memoria sin pagar una llamada por fila
+TAM_BLOQUE_LECTURA = 1000
+
+# Cantidad de operaciones recientes del diario entre las que se buscan las
+# que se pueden deshacer o rehacer
+LIMITE_HISTORIAL = 1000
+
+# Función que se llama antes de entregar una conexión (ver
+# `fijar_espera_escrituras`); None si no hay escrituras diferidas.
+_esperar_escrituras = None
+
+def _abrir_conexion(ruta):
+    """
+    Abre una conexión nueva a una base de datos y aplica la configuración
+    inicial: claves foráneas activadas y los PRAGMAs del perfil de
+    almacenamiento `PERFIL` (ver `PERFILES`). La conexión se crea con la clase de
+    `instrumentacion.py`, que solo mide cuando la instrumentación está activa.
+
+    Args:
+        ruta (str): El archivo de la base de datos.
+
+    Retorna:
+        sqlite3.Connection: La conexión recién abierta.
+    """
+    # check_same_thread=False solo permite que `cerrar_conexiones` las cierre
+    # desde el hilo principal; cada conexión se usa únicamente en su hilo.
+    conn = sqlite3.connect(ruta, cached_statements=CACHE_SENTENCIAS,
+                           check_same_thread=False,
+                           factory=instrumentacion.ConexionInstrumentada)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    perfil = PERFILES[PERFIL]
+    # busy_timeout va primero: cambiar journal_mode puede esperar un bloqueo
+    conn.execute(f"PRAGMA busy_timeout = {int(perfil['busy_timeout'])}")
+    for pragma, valor in perfil.items():
+        if pragma != "busy_timeout":
+            conn.execute(f"PRAGMA {pragma} = {valor}")
+    return conn
+
+def _registros(cursor, fabrica):
+    """Hace que el cursor entregue registros de `modelos.py` en lugar de tuplas."""
+    cursor.row_factory = fabrica
+    return cursor
+
+def _cerrar_cursor(cursor):
+    """Cierra un cursor; si la conexión ya se cerró, no hay nada que liberar."""
+    try:
+        cursor.close()
+    except sqlite3.ProgrammingError:
+        pass
+
+def _en_bloques(cursor, tam_bloque=TAM_BLOQUE_LECTURA):
+    """
+    Lee un cursor ya ejecutado de a `tam_bloque` filas con `fetchmany` y
+    entrega cada bloque como lista.
+
+    El cursor se cierra al terminar o cuando se abandona el recorrido
+    (`close()` del generador o al descartarlo), de modo que la sentencia no
+    queda abierta reteniendo la lectura en curso.
+    """
+    cursor.arraysize = tam_bloque
+    try:
+        while True:
+            bloque = cursor.fetchmany()
+            if not bloque:
+                return
+            yield bloque
+    finally:
+        _cerrar_cursor(cursor)
+
+def _en_flujo(cursor, tam_bloque=TAM_BLOQUE_LECTURA):
+    """Como `_en_bloques`, pero entrega las filas de a una."""
+    cursor.arraysize = tam_bloque
+    try:
+        while True:
+            bloque = cursor.fetchmany()
+            if not bloque:
+                return
+            yield from bloque
+    finally:
+        _cerrar_cursor(cursor)
+
+def _es_bloqueo(error):
+    """Indica si un `OperationalError` se debe a que la base está bloqueada u ocupada."""
+    mensaje = str(error).lower()
+    return "locked" in mensaje or "busy" in mensaje
+
+def _comenzar_escritura(conn):
+    """
+    Inicia una transacción de escritura con `BEGIN IMMEDIATE`.
+
+    Tomar el bloqueo de escritura al comienzo evita que la transacción falle
+    a mitad de camino cuando otro proceso escribe a la vez. Si la base sigue
+    ocupada después de `busy_timeout`, se reintenta con espera exponencial.
+
+    Args:
+        conn (sqlite3.Connection): La conexión del hilo actual.
+
+    La función no devuelve ningún valor.
+
+    Lanza:
+        sqlite3.OperationalError: Si la base sigue bloqueada tras todos los reintentos.
+    """
+    espera = ESPERA_INICIAL_S
+    for intento in range(REINTENTOS_BLOQUEO + 1):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            return
+        except sqlite3.OperationalError as error:
+            if not _es_bloqueo(error) or intento == REINTENTOS_BLOQUEO:
+                raise
+            import random
+            time.sleep(espera * random.uniform(0.5, 1.5))
+            espera *= 2
+
+def checkpoint(modo="PASSIVE"):
+    """
+    Traslada al archivo principal las páginas acumuladas en el WAL.
+
+    Se ejecuta automáticamente cada `CHECKPOINT_CADA` transacciones en modo
+    `PASSIVE` (no espera a lectores ni escritores) y al cerrar las
+    conexiones en modo `TRUNCATE`. No hace nada si el perfil no usa WAL.
+
+    Args:
+        modo (str): `PASSIVE`, `FULL`, `RESTART` o `TRUNCATE`.
+
+    Retorna:
+        tuple: `(ocupado, paginas_en_wal, paginas_trasladadas)` según
+        `PRAGMA wal_checkpoint`, o None si no se usa WAL.
+    """
+    return _checkpoint(obtener_conexion(), modo)
+
+def _checkpoint(conn, modo):
+    """Ejecuta `PRAGMA wal_checkpoint` sobre una conexión (ver `checkpoint`)."""
+    if PERFILES[PERFIL].get("journal_mode", "").upper() != "WAL":
+        return None
+    try:
+        return conn.execute(f"PRAGMA wal_checkpoint({modo})").fetchone()
+    except sqlite3.OperationalError:
+        return None
+
+def _ruta_actual():
+    """Retorna la base con la que trabaja el hilo actual: la de `usando_base` o `DB_NAME`."""
+    return getattr(_local, "ruta_activa", None) or DB_NAME
+
+@contextmanager
+def usando_base(ruta):
+    """
+    Hace que, dentro del bloque y en el hilo actual, las funciones de este
+    módulo trabajen sobre `ruta` en lugar de `DB_NAME`.
+
+    Cada hilo mantiene una conexión persistente por cada base que usa, así
+    que alternar entre bases no abre conexiones nuevas. Lo usa
+    `fragmentos.py` para aplicar estas mismas funciones a cada fragmento.
+
+    Args:
+        ruta (str): El archivo de la base de datos.
+    """
+    anterior = getattr(_local, "ruta_activa", None)
+    _local.ruta_activa = ruta
+    try:
+        yield
+    finally:
+        _local.ruta_activa = anterior
+
 def obtener_conexion():
     """
-    Establece y retorna una conexión a la base de datos.
+    Retorna la conexión persistente del hilo actual.
+
+    La conexión se abre la primera vez que se solicita y se reutiliza en las
+    llamadas siguientes, evitando abrir y cerrar el archivo en cada operación.
+    Hay una conexión por cada base (`DB_NAME` o la de `usando_base`); tras
+    `cerrar_conexiones`, se abre una nueva.
+
     Args:
         Esta función no recibe parámetros.
- 
+
+    Retorna:
+        sqlite3.Connection: La conexión del hilo actual.
     """
-    conn = sqlite3.connect(DB_NAME)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    if _esperar_escrituras is not None:
+        _esperar_escrituras()
+    ruta = _ruta_actual()
+    conexiones = getattr(_local, "conexiones", None)
+    if conexiones is None or _local.generacion != _generacion:
+        conexiones = _local.conexiones = {}
+    conn = conexiones.get(ruta)
+    if conn is None:
+        conn = _abrir_conexion(ruta)
+        with _lock_conexiones:
+            _conexiones.append(conn)
+            _local.generacion = _generacion
+        conexiones[ruta] = conn
     return conn
 
+@contextmanager
+def transaccion():
+    """
+    Delimita una transacción explícita sobre la conexión del hilo actual.
+
+    Confirma los cambios al salir del bloque sin errores y los revierte si se
+    produce una excepción. Las transacciones anidadas se integran en la
+    transacción externa, que es la única que confirma; no se puede anidar una
+    transacción sobre otra base (ver `usando_base`). La transacción toma el
+    bloqueo de escritura al comenzar (ver `_comenzar_escritura`).
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        sqlite3.Connection: La conexión sobre la que se deben ejecutar las sentencias.
+    """
+    conn = obtener_conexion()
+    externa = getattr(_local, "en_transaccion", None)
+    if externa is not None:
+        if externa is not conn:
+            raise RuntimeError("No se puede anidar una transacción sobre otra base de datos")
+        yield conn
+        return
+    global _version_escrituras
+    _comenzar_escritura(conn)
+    _local.en_transaccion = conn
+    _local.cambios = []
+    _local.lote = None
+    _local.categorias_modificadas = False
+    try:
+        yield conn
+        with _lock_sondas:
+            sonda = _sondas.get(_ruta_actual())
+            if sonda is not None and sonda[0] is not None:
+                # Con el bloqueo de escritura tomado, nadie más puede confirmar
+                _sondear(sonda)
+            conn.commit()
+            if sonda is not None and sonda[0] is not None:
+                _sondear(sonda, contar=False)
+        _version_escrituras += 1
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _local.en_transaccion = None
+        _local.lote = None
+        # Tras confirmar o revertir, la caché de categorías puede tener
+        # cambios que ya no valen (ver `_categorias_modificadas`)
+        if _local.categorias_modificadas:
+            invalidar_cache_categorias()
+    if _local.cambios:
+        _notificar_cambios(_local.cambios)
+    if _version_escrituras % CHECKPOINT_CADA == 0:
+        checkpoint()
+
+def fijar_espera_escrituras(funcion):
+    """
+    Registra la función que confirma las escrituras diferidas pendientes.
+
+    `obtener_conexion` la llama antes de entregar cada conexión, de modo que
+    cualquier lectura o escritura posterior ve las operaciones que
+    `escritura_diferida.py` todavía tenía en cola.
+
+    Args:
+        funcion: La función a llamar, o None para quitarla.
+
+    La función no devuelve ningún valor.
+    """
+    global _esperar_escrituras
+    _esperar_escrituras = funcion
+
+def _iniciar_lote(conn, descripcion, origen="usuario", revierte=None):
+    """
+    Registra en `diario_lotes` la operación en curso; los triggers del
+    diario asocian a ella cada cambio de `productos` que siga. Si la
+    operación ya tiene lote (llamadas anidadas), no hace nada.
+    """
+    if getattr(_local, "lote", None) is None:
+        _local.lote = conn.execute(
+            "INSERT INTO diario_lotes (momento, origen, revierte, descripcion) VALUES (?, ?, ?, ?)",
+            (time.time(), origen, revierte, descripcion)).lastrowid
+
+def terminar_operacion():
+    """
+    Marca el fin de una operación dentro de una transacción que agrupa varias.
+
+    La escritura siguiente abre un lote nuevo en el diario, así que cada
+    operación se deshace por separado aunque todas se confirmen juntas.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    La función no devuelve ningún valor.
+    """
+    _local.lote = None
+
+def suscribir_cambios(funcion):
+    """
+    Registra una función que se llama tras cada transacción confirmada que
+    modificó productos o categorías.
+
+    La función recibe un `frozenset` con los IDs de los productos afectados
+    (vacío si solo cambiaron categorías), o None si la operación pudo
+    afectar a cualquier producto (por ejemplo, un borrado por filtro o una
+    carga masiva). Solo se informan las escrituras de este proceso.
+
+    Args:
+        funcion: La función a llamar.
+
+    La función no devuelve ningún valor.
+    """
+    if funcion not in _observadores:
+        _observadores.append(funcion)
+
+def cancelar_suscripcion_cambios(funcion):
+    """
+    Deja de avisar a una función registrada con `suscribir_cambios`.
+
+    Args:
+        funcion: La función registrada.
+
+    La función no devuelve ningún valor.
+    """
+    if funcion in _observadores:
+        _observadores.remove(funcion)
+
+def _registrar_cambios(ids=()):
+    """Anota en la transacción en curso los productos que modifica (None: cualquiera)."""
+    if _observadores:
+        _local.cambios.append(None if ids is None else frozenset(ids))
+
+def _notificar_cambios(cambios):
+    """
+    Avisa a los observadores los cambios de una transacción confirmada.
+
+    Si un observador falla se sigue avisando a los demás, y al final se
+    relanza la primera excepción.
+    """
+    ids = None if None in cambios else frozenset().union(*cambios)
+    fallo = None
+    for funcion in list(_observadores):
+        try:
+            funcion(ids)
+        except Exception as error:
+            fallo = fallo or error
+    if fallo is not None:
+        raise fallo
+
+def version_datos():
+    """
+    Retorna un valor que cambia cada vez que se modifican los datos, ya sea
+    desde este proceso o desde otro que use el mismo archivo.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        tuple: El par `(escrituras_locales, PRAGMA data_version)`.
+    """
+    conn = obtener_conexion()
+    return _version_escrituras, conn.execute("PRAGMA data_version").fetchone()[0]
+
+def _sondear(sonda, contar=True):
+    """
+    Lee `PRAGMA data_version` en la sonda y, si `contar`, anota como externa
+    la escritura que lo haya cambiado. Se llama con `_lock_sondas` tomado.
+    """
+    data_version = sonda[0].execute("PRAGMA data_version").fetchone()[0]
+    if contar and data_version != sonda[1]:
+        sonda[2] += 1
+    sonda[1] = data_version
+
+def version_externa():
+    """
+    Retorna un contador de las escrituras de otros procesos sobre la base del hilo actual.
+
+    A diferencia de `version_datos`, no cambia con las escrituras de este
+    proceso, sin importar desde qué hilo o conexión se confirmaron; quien
+    se entere de esas por `suscribir_cambios` puede actualizarse de a poco
+    y recargar todo solo cuando cambie este valor.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        int: La cantidad de veces que se detectó una escritura externa.
+    """
+    # Como en `obtener_conexion`: primero se confirman las escrituras diferidas
+    if _esperar_escrituras is not None:
+        _esperar_escrituras()
+    ruta = _ruta_actual()
+    with _lock_sondas:
+        sonda = _sondas.setdefault(ruta, [None, None, 0])
+        if sonda[0] is None:
+            # Sin sonda no se sabe qué se escribió mientras tanto: cuenta como externo
+            sonda[0] = sqlite3.connect(ruta, check_same_thread=False)
+            sonda[2] += 1
+            with _lock_conexiones:
+                _conexiones.append(sonda[0])
+            _sondear(sonda, contar=False)
+        else:
+            _sondear(sonda)
+        return sonda[2]
+
+def _con_cache(funcion):
+    """
+    Guarda los resultados de una función de lectura en `cache_consultas`.
+
+    La clave es el nombre de la función con sus argumentos, y el resultado se
+    descarta cuando cambia `version_datos()`. Dentro de una transacción no se
+    usa la caché, porque la propia transacción puede tener cambios todavía
+    sin contar en la versión.
+
+    Las listas del resultado se entregan como tuplas (ver
+    `cache_consultas.inmutable`), también cuando no se usa la caché, para
+    que el tipo no dependa de si hubo un acierto.
+    """
+    @functools.wraps(funcion)
+    def consulta(*args, **kwargs):
+        if getattr(_local, "en_transaccion", None) is not None:
+            return cache_consultas.inmutable(funcion(*args, **kwargs))
+        clave = (funcion.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(clave)
+        except TypeError:
+            return cache_consultas.inmutable(funcion(*args, **kwargs))
+        conn = obtener_conexion()
+        return cache_consultas.obtener((_ruta_actual(), id(conn)), clave, version_datos(),
+                                       lambda: funcion(*args, **kwargs))
+    return consulta
+
+def _categorias_en_cache():
+    """
+    Retorna las categorías desde la caché, cargándolas si no son válidas.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        dict: Con las claves `lista` (registros `Categoria` ordenados por
+        nombre), `por_id` (id -> nombre) y `por_nombre` (nombre -> id).
+    """
+    conn = obtener_conexion()
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    ruta = _ruta_actual()
+    clave = (_generacion_categorias, data_version)
+    cache = getattr(_local, "categorias", None)
+    if cache is None:
+        cache = _local.categorias = {}
+    guardado = cache.get(ruta)
+    if guardado is not None and guardado[0] == clave:
+        _estadisticas_categorias["aciertos"] += 1
+        return guardado[1]
+    _estadisticas_categorias["fallos"] += 1
+    lista = _registros(conn.execute("SELECT id, nombre FROM categorias ORDER BY nombre"),
+                       modelos.fila_categoria).fetchall()
+    datos = {
+        "lista": lista,
+        "por_id": dict(lista),
+        "por_nombre": {nombre: id_cat for id_cat, nombre in lista},
+    }
+    cache[ruta] = (clave, datos)
+    return datos
+
+def invalidar_cache_categorias():
+    """
+    Descarta la caché de categorías de todos los hilos.
+
+    Se llama automáticamente después de cada escritura en `categorias`.
+
+    Args:
+        Esta función no recibe parámetros.
+    La función no devuelve ningún valor.
+    """
+    global _generacion_categorias
+    _generacion_categorias += 1
+
+def _categorias_modificadas():
+    """
+    Invalida la caché de categorías tras escribir en `categorias` dentro de
+    una transacción: en el momento, para que las lecturas siguientes de la
+    misma transacción vean el cambio, y de nuevo cuando termina la
+    transacción externa, para no conservar un cambio que se revirtió.
+    """
+    invalidar_cache_categorias()
+    _local.categorias_modificadas = True
+
+def estadisticas_cache_categorias():
+    """
+    Retorna los contadores de uso de la caché de categorías.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        dict: Con las claves `aciertos` (consultas resueltas en memoria) y
+        `fallos` (consultas que tuvieron que leer la base).
+    """
+    return dict(_estadisticas_categorias)
+
+def cerrar_conexiones():
+    """
+    Cierra todas las conexiones abiertas por el módulo.
+
+    Debe llamarse al finalizar el programa. Tras llamarla, la siguiente
+    operación abrirá una conexión nueva.
+
+    Args:
+        Esta función no recibe parámetros.
+    La función no devuelve ningún valor.
+    """
+    global _generacion
+    if getattr(_local, "conexiones", None) and _local.generacion == _generacion:
+        for conn in _local.conexiones.values():
+            _checkpoint(conn, "TRUNCATE")
+    with _lock_sondas, _lock_conexiones:
+        for conn in _conexiones:
+            conn.close()
+        _conexiones.clear()
+        for sonda in _sondas.values():
+            sonda[0] = None
+        _generacion += 1
+    cache_consultas.vaciar()
+
+def cerrar_conexiones_hilo():
+    """
+    Cierra las conexiones del hilo actual, sin tocar las de los demás hilos.
+
+    Deben llamarla los hilos que terminan (por ejemplo, el escritor de
+    `escritura_diferida`) para no dejar su conexión abierta hasta el final
+    del programa.
+
+    Args:
+        Esta función no recibe parámetros.
+    La función no devuelve ningún valor.
+    """
+    conexiones = getattr(_local, "conexiones", None)
+    if not conexiones:
+        return
+    with _lock_conexiones:
+        vigentes = _local.generacion == _generacion
+        for ruta, conn in conexiones.items():
+            cache_consultas.descartar_particion((ruta, id(conn)))
+            if vigentes:
+                _conexiones.remove(conn)
+                conn.close()
+    _local.conexiones = None
+    _local.categorias = None
+
 def inicializar_db():
     """
-    Crea las tablas `categorias` y `productos` si no existen.
+    Crea o actualiza el esquema de la base de datos.
+
+    Aplica las migraciones pendientes de `migraciones.py` (tablas, índices e
+    índice de búsqueda). Si la base ya está en la última versión no ejecuta
+    ninguna sentencia de esquema.
 
     Args:
         Esta función no recibe parámetros.
 
-  
+    La función no devuelve ningún valor.
+    """
+    migraciones.aplicar_migraciones(obtener_conexion())
+    cache_consultas.vaciar()
+
+def restaurar_db(origen):
+    """
+    Reemplaza todo el contenido de la base actual por el de otra base.
+
+    Copia las páginas de `origen` con la API de respaldo de SQLite en un solo
+    paso, así que los demás lectores ven la base anterior o la restaurada,
+    nunca una mezcla. Luego aplica las migraciones que le falten a la copia y
+    descarta las cachés; los observadores de `suscribir_cambios` reciben None.
+
+    Args:
+        origen (sqlite3.Connection): Una conexión abierta a la base a restaurar.
+
+    La función no devuelve ningún valor.
+
+    Lanza:
+        RuntimeError: Si se llama dentro de una `transaccion()`.
     """
+    global _version_escrituras
+    if getattr(_local, "en_transaccion", None) is not None:
+        raise RuntimeError("No se puede restaurar la base dentro de una transacción")
     conn = obtener_conexion()
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS categorias (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT NOT NULL UNIQUE
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS productos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT NOT NULL,
-            categoria_id INTEGER NOT NULL,
-            precio INTEGER NOT NULL,
-            FOREIGN KEY (categoria_id) REFERENCES categorias (id) ON DELETE RESTRICT
-        )
-    """)
-    conn.commit()
-    conn.close()
+    origen.backup(conn)
+    _version_escrituras += 1
+    migraciones.aplicar_migraciones(conn)
+    invalidar_cache_categorias()
+    cache_consultas.vaciar()
+    _notificar_cambios([None])
 
 def contar_categorias_db():
     """
     Cuenta y retorna el número total de categorías en la base de datos.
 
+    Se resuelve con la caché de categorías, sin consultar la base.
+
     Args:
         Esta función no recibe parámetros.
 
     Retorna:
         int: El número total de filas en la tabla `categorias`.
     """
-    conn = obtener_conexion()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM categorias")
-    total = cursor.fetchone()[0]
-    conn.close()
-    return total
+    return len(_categorias_en_cache()["lista"])
 
 def obtener_categorias_db():
     """
     Retorna una lista de todas las categorías, ordenadas por nombre.
 
+    Se sirve desde la caché de categorías; la base solo se consulta la
+    primera vez o después de que las categorías cambien.
+
     Args:
         Esta función no recibe parámetros.
 
     Retorna:
-          una lista de tuplas, donde cada tupla representa una
-        categoría con el formato `(id, nombre)`.
+        una lista de registros `modelos.Categoria` (`id`, `nombre`).
     """
-    conn = obtener_conexion()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, nombre FROM categorias ORDER BY nombre")
-    categorias = cursor.fetchall()
-    conn.close()
-    return categorias
+    return list(_categorias_en_cache()["lista"])
+
+def iterar_categorias_db():
+    """
+    Recorre las categorías ordenadas por nombre sin copiar la lista.
+
+    Las categorías son como máximo diez y ya están en la caché, así que se
+    recorre directamente esa lista; cuando cambian, la caché arma una lista
+    nueva y este recorrido sigue sobre la anterior.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        un iterador de registros `modelos.Categoria` (`id`, `nombre`).
+    """
+    return iter(_categorias_en_cache()["lista"])
+
+def existe_categoria_db(id_cat):
+    """
+    Indica si existe una categoría con el ID dado.
+
+    Se resuelve con el diccionario de la caché de categorías, sin recorrer
+    ninguna lista.
+
+    Args:
+        id_cat (int): El ID de la categoría a verificar.
+
+    Retorna:
+        bool: True si la categoría existe.
+    """
+    return id_cat in _categorias_en_cache()["por_id"]
+
+def obtener_id_categoria_db(nombre):
+    """
+    Retorna el ID de la categoría con el nombre dado, usando la caché.
+
+    Args:
+        nombre (str): El nombre exacto de la categoría.
+
+    Retorna:
+        int: El ID de la categoría, o None si no existe.
+    """
+    return _categorias_en_cache()["por_nombre"].get(nombre)
 
 def agregar_categoria_db(nombre):
     """
@@ -100,11 +773,10 @@ def agregar_categoria_db(nombre):
 
      La función no devuelve ningún valor.
     """
-    conn = obtener_conexion()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO categorias (nombre) VALUES (?)", (nombre,))
-    conn.commit()
-    conn.close()
+    with transaccion() as conn:
+        conn.execute("INSERT INTO categorias (nombre) VALUES (?)", (nombre,))
+        _registrar_cambios()
+        _categorias_modificadas()
 
 def modificar_categoria_db(id_cat, nuevo_nombre):
     """
@@ -116,11 +788,10 @@ def modificar_categoria_db(id_cat, nuevo_nombre):
     
     La función no devuelve ningún valor.
     """
-    conn = obtener_conexion()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE categorias SET nombre = ? WHERE id = ?", (nuevo_nombre, id_cat))
-    conn.commit()
-    conn.close()
+    with transaccion() as conn:
+        conn.execute("UPDATE categorias SET nombre = ? WHERE id = ?", (nuevo_nombre, id_cat))
+        _registrar_cambios()
+        _categorias_modificadas()
 
 def contar_productos_en_categoria_db(id_cat):
     """
@@ -133,11 +804,8 @@ def contar_productos_en_categoria_db(id_cat):
         int: El número de productos que pertenecen a la categoría dada.
     """
     conn = obtener_conexion()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM productos WHERE categoria_id = ?", (id_cat,))
-    total = cursor.fetchone()[0]
-    conn.close()
-    return total
+    return conn.execute("SELECT COUNT(*) FROM productos WHERE categoria_id = ?",
+                        (id_cat,)).fetchone()[0]
 
 def eliminar_categoria_db(id_cat):
     """
@@ -152,38 +820,158 @@ def eliminar_categoria_db(id_cat):
 
     La función no devuelve ningún valor.
     """
-    conn = obtener_conexion()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM categorias WHERE id = ?", (id_cat,))
-    conn.commit()
-    conn.close()
+    with transaccion() as conn:
+        conn.execute("DELETE FROM categorias WHERE id = ?", (id_cat,))
+        _registrar_cambios()
+        _categorias_modificadas()
+
+def sincronizar_categorias_db(categorias):
+    """
+    Deja la tabla `categorias` igual a la lista dada, conservando los IDs.
 
+    Se usa para replicar las categorías en cada fragmento de `fragmentos.py`.
+
+    Args:
+        categorias: Una lista de pares `(id, nombre)`.
+
+    La función no devuelve ningún valor.
+
+    Lanza:
+        sqlite3.IntegrityError: Si hay que eliminar una categoría que tiene
+        productos en esta base (no se aplica ningún cambio).
+    """
+    categorias = list(categorias)
+    with transaccion() as conn:
+        actuales = dict(conn.execute("SELECT id, nombre FROM categorias"))
+        if actuales == dict(categorias):
+            return
+        # Primero se borran las que sobran, para liberar sus nombres
+        conn.executemany("DELETE FROM categorias WHERE id = ?",
+                         ((id_cat,) for id_cat in actuales.keys() - dict(categorias).keys()))
+        conn.executemany("""
+            INSERT INTO categorias (id, nombre) VALUES (?, ?)
+            ON CONFLICT (id) DO UPDATE SET nombre = excluded.nombre
+        """, categorias)
+        _registrar_cambios()
+        _categorias_modificadas()
+
+_SQL_LISTADO_PRODUCTOS = """
+    SELECT p.id, p.nombre, c.nombre, p.precio FROM productos p
+    JOIN categorias c ON p.categoria_id = c.id ORDER BY p.nombre
+"""
+
+@_con_cache
 def obtener_productos_db():
     """
-    Retorna una lista de todos los productos con el nombre de su categoría.
+    Retorna todos los productos con el nombre de su categoría.
 
     Realiza un JOIN entre las tablas `productos` y `categorias` para incluir
-    el nombre de la categoría en lugar de su ID.
+    el nombre de la categoría en lugar de su ID. El resultado ocupa memoria en
+    proporción al catálogo; para recorrerlo completo conviene
+    `iterar_productos_db` o `iterar_bloques_productos_db`.
 
     Args:
         Esta función no recibe parámetros.
 
     Retorna:
-        una lista de tuplas, donde cada tupla representa un
-        producto con el formato `(id_producto, nombre_producto, nombre_categoria, precio)`.
+        una tupla de registros `modelos.Producto` (`id`, `nombre`,
+        `categoria`, `precio`) ordenada por nombre.
     """
     conn = obtener_conexion()
-    cursor = conn.cursor()
-    sql = """
+    return _registros(conn.execute(_SQL_LISTADO_PRODUCTOS), modelos.fila_producto).fetchall()
+
+@_con_cache
+def obtener_pagina_productos_db(tam_pagina=TAM_PAGINA, despues=None, antes=None,
+                                desde_nombre=None):
+    """
+    Retorna una página de productos ordenados por `(nombre, id)`.
+
+    Usa paginación por clave (keyset): en lugar de `OFFSET`, cada página
+    continúa desde la clave `(nombre, id)` de la fila límite de la anterior,
+    por lo que el costo de cada página es el mismo sin importar cuántos
+    productos haya ni en qué página se esté. Se resuelve con el índice
+    `idx_productos_nombre`.
+
+    Args:
+        tam_pagina (int): La cantidad máxima de productos por página.
+        despues (tuple): La clave `(nombre, id)` de la última fila de la página
+            actual, para obtener la página siguiente.
+        antes (tuple): La clave `(nombre, id)` de la primera fila de la página
+            actual, para obtener la página anterior.
+        desde_nombre (str): Si se indica, la página empieza en el primer
+            producto cuyo nombre sea mayor o igual (por ejemplo, una letra).
+
+    Retorna:
+        una tupla `(productos, hay_mas)`: `productos` es una tupla de
+        registros `modelos.Producto` en orden ascendente, y `hay_mas` indica si existen más filas en la dirección
+        pedida.
+    """
+    conn = obtener_conexion()
+    columnas = """
         SELECT p.id, p.nombre, c.nombre, p.precio FROM productos p
-        JOIN categorias c ON p.categoria_id = c.id ORDER BY p.nombre
+        JOIN categorias c ON p.categoria_id = c.id
     """
-    cursor.execute(sql)
-    productos = cursor.fetchall()
-    conn.close()
-    return productos
+    if antes is not None:
+        sql = columnas + """
+            WHERE (p.nombre, p.id) < (?, ?) ORDER BY p.nombre DESC, p.id DESC LIMIT ?
+        """
+        filas = _registros(conn.execute(sql, (antes[0], antes[1], tam_pagina + 1)),
+                           modelos.fila_producto).fetchall()
+        hay_mas = len(filas) > tam_pagina
+        return filas[:tam_pagina][::-1], hay_mas
+    if despues is not None:
+        sql = columnas + "WHERE (p.nombre, p.id) > (?, ?) ORDER BY p.nombre, p.id LIMIT ?"
+        parametros = (despues[0], despues[1], tam_pagina + 1)
+    elif desde_nombre is not None:
+        sql = columnas + "WHERE p.nombre >= ? ORDER BY p.nombre, p.id LIMIT ?"
+        parametros = (desde_nombre, tam_pagina + 1)
+    else:
+        sql = columnas + "ORDER BY p.nombre, p.id LIMIT ?"
+        parametros = (tam_pagina + 1,)
+    filas = _registros(conn.execute(sql, parametros), modelos.fila_producto).fetchall()
+    return filas[:tam_pagina], len(filas) > tam_pagina
 
-def agregar_producto_db(nombre, cat_id, precio):
+def obtener_productos_por_ids_db(ids):
+    """
+    Retorna los productos con los IDs indicados, en ese mismo orden.
+
+    Args:
+        ids: Una lista de IDs; los que no existen se omiten.
+
+    Retorna:
+        una lista de registros `modelos.Producto`.
+    """
+    conn = obtener_conexion()
+    por_id = {}
+    for i in range(0, len(ids), TAM_LOTE_IDS):
+        lote = ids[i:i + TAM_LOTE_IDS]
+        marcadores = ", ".join("?" * len(lote))
+        sql = f"""
+            SELECT p.id, p.nombre, c.nombre, p.precio FROM productos p
+            JOIN categorias c ON p.categoria_id = c.id WHERE p.id IN ({marcadores})
+        """
+        for producto in _registros(conn.execute(sql, lote), modelos.fila_producto):
+            por_id[producto.id] = producto
+    return [por_id[id_prod] for id_prod in ids if id_prod in por_id]
+
+def existe_producto_db(id_prod):
+    """
+    Indica si existe un producto con el ID dado.
+
+    Es una búsqueda puntual por clave primaria, por lo que su costo no
+    depende del tamaño del catálogo.
+
+    Args:
+        id_prod (int): El ID del producto a verificar.
+
+    Retorna:
+        bool: True si el producto existe.
+    """
+    conn = obtener_conexion()
+    return bool(conn.execute("SELECT EXISTS (SELECT 1 FROM productos WHERE id = ?)",
+                             (id_prod,)).fetchone()[0])
+
+def agregar_producto_db(nombre, cat_id, precio, id_prod=None):
     """
     Agrega un nuevo producto a la tabla `productos`.
 
@@ -191,39 +979,63 @@ def agregar_producto_db(nombre, cat_id, precio):
         nombre (str): El nombre del producto.
         cat_id (int): El ID de la categoría a la que pertenece el producto.
         precio (int): El precio del producto.
+        id_prod (int): Un ID explícito (lo usa `fragmentos.py`); por defecto
+            lo asigna SQLite.
 
     La función no devuelve ningún valor.
     """
-    conn = obtener_conexion()
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO productos (nombre, categoria_id, precio) VALUES (?, ?, ?)",
-                   (nombre, cat_id, precio))
-    conn.commit()
-    conn.close()
+    with transaccion() as conn:
+        _iniciar_lote(conn, f"Agregar el producto '{nombre}'")
+        cursor = conn.execute(
+            "INSERT INTO productos (id, nombre, categoria_id, precio) VALUES (?, ?, ?, ?)",
+            (id_prod, nombre, cat_id, precio))
+        _registrar_cambios((cursor.lastrowid,))
 
-def buscar_productos_db(termino):
+@_con_cache
+def buscar_productos_db(termino, limite=busqueda.LIMITE_RESULTADOS):
     """
-    Busca productos cuyo nombre contenga un término de búsqueda.
+    Busca productos cuyo nombre contenga las palabras de un término de búsqueda.
 
-    La búsqueda no distingue entre mayúsculas y minúsculas.
+    La búsqueda no distingue entre mayúsculas, minúsculas ni acentos, y cada
+    palabra se interpreta como prefijo ("tele" encuentra "Televisor"). Se
+    resuelve con el índice de `busqueda.py` (FTS5 o un índice en memoria) en
+    lugar de recorrer toda la tabla.
 
     Args:
         termino (str): El texto a buscar dentro del nombre de los productos.
+        limite (int): La cantidad máxima de resultados.
 
     Retorna:
-       una lista de tuplas con los productos encontrados.
-        Cada tupla tiene el formato `(nombre_producto, nombre_categoria, precio)`.
+        una tupla de registros `modelos.Producto` con los productos
+        encontrados, los más relevantes primero.
     """
     conn = obtener_conexion()
-    cursor = conn.cursor()
-    sql = """
-        SELECT p.nombre, c.nombre, p.precio FROM productos p
-        JOIN categorias c ON p.categoria_id = c.id WHERE lower(p.nombre) LIKE ?
+    return busqueda.buscar(conn, _ruta_actual(), termino, limite, version_datos())
+
+def iterar_busqueda_productos_db(termino, limite=busqueda.LIMITE_RESULTADOS,
+                                 tam_bloque=TAM_BLOQUE_LECTURA):
     """
-    cursor.execute(sql, (f'%{termino}%',))
-    resultados = cursor.fetchall()
-    conn.close()
-    return resultados
+    Como `buscar_productos_db`, pero entrega los resultados en flujo, para
+    búsquedas con un `limite` alto (exportar o procesar todo lo que
+    coincide). No pasa por la caché de consultas.
+
+    Con FTS5 las filas se leen del cursor de a `tam_bloque`; con el índice
+    en memoria el orden por relevancia ya está calculado y solo se
+    recorre esa lista.
+
+    Args:
+        termino (str): El texto a buscar dentro del nombre de los productos.
+        limite (int): La cantidad máxima de resultados.
+        tam_bloque (int): La cantidad de filas que se leen de SQLite por vez.
+
+    Retorna:
+        un iterador de registros `modelos.Producto`, los más relevantes primero.
+    """
+    conn = obtener_conexion()
+    resultado = busqueda.consultar(conn, _ruta_actual(), termino, limite, version_datos())
+    if isinstance(resultado, sqlite3.Cursor):
+        return _en_flujo(resultado, tam_bloque)
+    return iter(resultado)
 
 def eliminar_producto_db(id_prod):
     """
@@ -234,11 +1046,10 @@ def eliminar_producto_db(id_prod):
 
     La función no devuelve ningún valor.
     """
-    conn = obtener_conexion()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM productos WHERE id = ?", (id_prod,))
-    conn.commit()
-    conn.close()
+    with transaccion() as conn:
+        _iniciar_lote(conn, f"Eliminar el producto {id_prod}")
+        conn.execute("DELETE FROM productos WHERE id = ?", (id_prod,))
+        _registrar_cambios((id_prod,))
 
 def modificar_producto_db(id_prod, campo_a_modificar, nuevo_valor):
     """
@@ -266,9 +1077,683 @@ def modificar_producto_db(id_prod, campo_a_modificar, nuevo_valor):
         raise ValueError("Campo no válido para modificar")
 
     sql = f"UPDATE productos SET {campo_a_modificar} = ? WHERE id = ?"
-    
+
+    with transaccion() as conn:
+        _iniciar_lote(conn, f"Modificar {campo_a_modificar} del producto {id_prod}")
+        conn.execute(sql, (nuevo_valor, id_prod))
+        _registrar_cambios((id_prod,))
+
+def agregar_productos_lote_db(filas):
+    """
+    Inserta varios productos en una única transacción usando `executemany`.
+
+    Args:
+        filas: Un iterable de tuplas con el formato `(nombre, categoria_id, precio)`.
+
+    Retorna:
+        int: La cantidad de productos insertados.
+    """
+    with transaccion() as conn:
+        _iniciar_lote(conn, "Cargar productos")
+        cursor = conn.executemany(
+            "INSERT INTO productos (nombre, categoria_id, precio) VALUES (?, ?, ?)", filas)
+        _registrar_cambios(None)
+        return cursor.rowcount
+
+def siguiente_id_producto_db(modulo=1, resto=0):
+    """
+    Retorna el próximo ID de producto que cumple `id % modulo == resto`.
+
+    Es mayor que todos los IDs que la base asignó alguna vez (según
+    `sqlite_sequence`), así que nunca reutiliza el de un producto eliminado.
+    `fragmentos.py` lo usa para que cada fragmento asigne IDs de una clase de
+    resto distinta y los IDs no se repitan entre fragmentos. Debe llamarse
+    dentro de la misma `transaccion()` que el alta.
+
+    Args:
+        modulo (int): La cantidad de clases de resto.
+        resto (int): La clase de resto del ID buscado.
+
+    Retorna:
+        int: El ID a usar.
+    """
+    conn = obtener_conexion()
+    fila = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'productos'").fetchone()
+    siguiente = (fila[0] if fila else 0) + 1
+    return siguiente + (resto - siguiente) % modulo
+
+def fijar_secuencia_productos_db(minimo):
+    """
+    Hace que los próximos IDs de productos sean mayores que `minimo`.
+
+    Args:
+        minimo (int): El mayor ID que no se debe volver a asignar.
+
+    La función no devuelve ningún valor.
+    """
+    with transaccion() as conn:
+        if not conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'productos'",
+                            (minimo,)).rowcount:
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('productos', ?)", (minimo,))
+
+def copiar_productos_db(filas):
+    """
+    Inserta productos conservando su ID; los que ya existen se actualizan.
+
+    Se usa para mover productos entre bases (ver `fragmentos.py`), por lo que
+    copiar dos veces las mismas filas deja el mismo resultado.
+
+    Args:
+        filas: Un iterable de tuplas `(id, nombre, categoria_id, precio)`.
+
+    Retorna:
+        int: La cantidad de productos insertados o actualizados.
+    """
+    ids = []
+
+    def _con_ids():
+        for fila in filas:
+            ids.append(fila[0])
+            yield fila
+
+    with transaccion() as conn:
+        _iniciar_lote(conn, "Copiar productos desde otra base")
+        cursor = conn.executemany("""
+            INSERT INTO productos (id, nombre, categoria_id, precio) VALUES (?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET nombre = excluded.nombre,
+                categoria_id = excluded.categoria_id, precio = excluded.precio
+        """, _con_ids())
+        _registrar_cambios(ids)
+        return cursor.rowcount
+
+def iterar_productos_db(tam_bloque=TAM_BLOQUE_LECTURA):
+    """
+    Recorre todos los productos con el nombre de su categoría sin cargarlos
+    todos en memoria.
+
+    La consulta se ejecuta al llamar a la función, sobre la base activa en
+    ese momento (ver `usando_base`), y las filas se leen de a `tam_bloque`
+    con `fetchmany`. El cursor se cierra al terminar el recorrido o al
+    abandonarlo; mientras está abierto, el recorrido ve los datos tal como
+    estaban al empezar.
+
+    Args:
+        tam_bloque (int): La cantidad de filas que se leen de SQLite por vez.
+
+    Retorna:
+        un generador de registros `modelos.Producto`, ordenados por nombre.
+    """
+    conn = obtener_conexion()
+    return _en_flujo(_registros(conn.execute(_SQL_LISTADO_PRODUCTOS), modelos.fila_producto),
+                     tam_bloque)
+
+def iterar_bloques_productos_db(tam_bloque=TAM_BLOQUE_LECTURA):
+    """
+    Como `iterar_productos_db`, pero entrega los productos en listas de
+    hasta `tam_bloque` registros, para quien los procesa por lotes (por
+    ejemplo, `csv.writer.writerows`).
+
+    Args:
+        tam_bloque (int): La cantidad de productos de cada bloque.
+
+    Retorna:
+        un generador de listas de registros `modelos.Producto`, ordenados por nombre.
+    """
+    conn = obtener_conexion()
+    return _en_bloques(_registros(conn.execute(_SQL_LISTADO_PRODUCTOS), modelos.fila_producto),
+                       tam_bloque)
+
+def _columnas_por_ids(conn, ids, tam_bloque):
+    """Lee las columnas de los productos indicados, en consultas de hasta `TAM_LOTE_IDS` IDs."""
+    for i in range(0, len(ids), TAM_LOTE_IDS):
+        lote = ids[i:i + TAM_LOTE_IDS]
+        marcadores = ", ".join("?" * len(lote))
+        yield from _en_flujo(conn.execute(
+            f"SELECT id, categoria_id, precio, nombre FROM productos WHERE id IN ({marcadores})", lote),
+            tam_bloque)
+
+def iterar_columnas_productos_db(ids=None, tam_bloque=TAM_BLOQUE_LECTURA):
+    """
+    Recorre los datos de los productos sin el JOIN de categorías, tal como
+    los necesita la instantánea de `instantanea.py`.
+
+    Como en `iterar_productos_db`, la conexión se toma al llamar a la
+    función y las filas se leen de a `tam_bloque`.
+
+    Args:
+        ids: Un iterable opcional de IDs; si se indica, solo se leen esos
+            productos (los que ya no existen simplemente no aparecen).
+        tam_bloque (int): La cantidad de filas que se leen de SQLite por vez.
+
+    Retorna:
+        un generador de tuplas `(id_producto, categoria_id, precio, nombre_producto)`.
+    """
+    conn = obtener_conexion()
+    if ids is not None:
+        return _columnas_por_ids(conn, list(ids), tam_bloque)
+    # ORDER BY nombre hace que se lea el índice cubriente, más chico que la tabla
+    return _en_flujo(conn.execute(
+        "SELECT id, categoria_id, precio, nombre FROM productos ORDER BY nombre"), tam_bloque)
+
+def _filtro_productos(categoria_id=None, precio_min=None, precio_max=None):
+    """
+    Arma la cláusula WHERE de las operaciones masivas por filtro.
+
+    Args:
+        categoria_id (int): Si se indica, solo productos de esa categoría.
+        precio_min (int): Si se indica, solo productos con precio mayor o igual.
+        precio_max (int): Si se indica, solo productos con precio menor o igual.
+
+    Retorna:
+        una tupla `(where, parametros)`; `where` es una cadena vacía si no se
+        indicó ningún filtro.
+    """
+    condiciones = []
+    parametros = []
+    if categoria_id is not None:
+        condiciones.append("categoria_id = ?")
+        parametros.append(categoria_id)
+    if precio_min is not None:
+        condiciones.append("precio >= ?")
+        parametros.append(precio_min)
+    if precio_max is not None:
+        condiciones.append("precio <= ?")
+        parametros.append(precio_max)
+    where = " WHERE " + " AND ".join(condiciones) if condiciones else ""
+    return where, parametros
+
+def fijar_precio_lote_db(ids, precio):
+    """
+    Asigna el mismo precio a varios productos en una sola transacción.
+
+    Args:
+        ids: Un iterable con los IDs de los productos.
+        precio (int): El nuevo precio (entero no negativo).
+
+    Retorna:
+        int: La cantidad de productos actualizados.
+
+    Lanza:
+        ValueError: Si el precio es negativo.
+    """
+    if precio < 0:
+        raise ValueError("El precio no puede ser un número negativo")
+    ids = list(ids)
+    with transaccion() as conn:
+        _iniciar_lote(conn, f"Fijar el precio {precio} a {len(ids)} productos")
+        cursor = conn.executemany("UPDATE productos SET precio = ? WHERE id = ?",
+                                  ((precio, id_prod) for id_prod in ids))
+        _registrar_cambios(ids)
+        return cursor.rowcount
+
+def actualizar_precios_db(precios):
+    """
+    Asigna a cada producto su propio precio en una sola transacción.
+
+    Args:
+        precios: Un iterable de pares `(id_producto, nuevo_precio)`.
+
+    Retorna:
+        int: La cantidad de productos actualizados.
+
+    Lanza:
+        ValueError: Si algún precio es negativo (no se aplica ningún cambio).
+    """
+    ids = []
+
+    def _validados():
+        for id_prod, precio in precios:
+            if precio < 0:
+                raise ValueError(f"Precio negativo para el producto {id_prod}")
+            ids.append(id_prod)
+            yield precio, id_prod
+
+    with transaccion() as conn:
+        _iniciar_lote(conn, "Actualizar precios por ID")
+        cursor = conn.executemany("UPDATE productos SET precio = ? WHERE id = ?", _validados())
+        _registrar_cambios(ids)
+        return cursor.rowcount
+
+def ajustar_precio_porcentaje_db(porcentaje, ids=None, categoria_id=None):
+    """
+    Aumenta o reduce en un porcentaje el precio de varios productos.
+
+    El nuevo precio se redondea al entero más cercano y nunca baja de 0. Sin
+    `ids` se aplica con un único UPDATE sobre todos los productos (o los de
+    `categoria_id`); con `ids`, con `executemany` sobre esa lista.
+
+    Args:
+        porcentaje (float): El porcentaje a aplicar (10 sube un 10%, -10 baja un 10%).
+        ids: Un iterable opcional con los IDs de los productos a ajustar.
+        categoria_id (int): Si se indica, solo se ajustan los productos de esa categoría.
+
+    Retorna:
+        int: La cantidad de productos actualizados.
+    """
+    factor = (100 + porcentaje) / 100
+    nuevo_precio = "MAX(0, CAST(ROUND(precio * ?) AS INTEGER))"
+    with transaccion() as conn:
+        _iniciar_lote(conn, f"Ajustar precios un {porcentaje:+g}%")
+        if ids is not None:
+            ids = list(ids)
+            _registrar_cambios(ids)
+            sql = f"UPDATE productos SET precio = {nuevo_precio} WHERE id = ?"
+            if categoria_id is not None:
+                sql += " AND categoria_id = ?"
+                filas = ((factor, id_prod, categoria_id) for id_prod in ids)
+            else:
+                filas = ((factor, id_prod) for id_prod in ids)
+            return conn.executemany(sql, filas).rowcount
+        where, parametros = _filtro_productos(categoria_id=categoria_id)
+        _registrar_cambios(None)
+        sql = f"UPDATE productos SET precio = {nuevo_precio}{where}"
+        return conn.execute(sql, [factor, *parametros]).rowcount
+
+def recategorizar_lote_db(ids, nueva_cat_id):
+    """
+    Mueve varios productos a otra categoría en una sola transacción.
+
+    Args:
+        ids: Un iterable con los IDs de los productos.
+        nueva_cat_id (int): El ID de la categoría de destino.
+
+    Retorna:
+        int: La cantidad de productos actualizados.
+    """
+    ids = list(ids)
+    with transaccion() as conn:
+        _iniciar_lote(conn, f"Cambiar de categoría {len(ids)} productos")
+        cursor = conn.executemany("UPDATE productos SET categoria_id = ? WHERE id = ?",
+                                  ((nueva_cat_id, id_prod) for id_prod in ids))
+        _registrar_cambios(ids)
+        return cursor.rowcount
+
+def eliminar_productos_lote_db(ids):
+    """
+    Elimina varios productos, identificados por su ID, en una sola transacción.
+
+    Args:
+        ids: Un iterable con los IDs de los productos a eliminar.
+
+    Retorna:
+        int: La cantidad de productos eliminados.
+    """
+    ids = list(ids)
+    with transaccion() as conn:
+        _iniciar_lote(conn, f"Eliminar {len(ids)} productos")
+        cursor = conn.executemany("DELETE FROM productos WHERE id = ?",
+                                  ((id_prod,) for id_prod in ids))
+        _registrar_cambios(ids)
+        return cursor.rowcount
+
+def eliminar_productos_filtro_db(categoria_id=None, precio_min=None, precio_max=None):
+    """
+    Elimina con un único DELETE todos los productos que cumplen un filtro.
+
+    Args:
+        categoria_id (int): Si se indica, solo productos de esa categoría.
+        precio_min (int): Si se indica, solo productos con precio mayor o igual.
+        precio_max (int): Si se indica, solo productos con precio menor o igual.
+
+    Retorna:
+        int: La cantidad de productos eliminados.
+
+    Lanza:
+        ValueError: Si no se indica ningún filtro (para no vaciar la tabla por error).
+    """
+    where, parametros = _filtro_productos(categoria_id, precio_min, precio_max)
+    if not where:
+        raise ValueError("Debe indicar al menos un filtro para eliminar productos")
+    with transaccion() as conn:
+        _iniciar_lote(conn, "Eliminar productos por filtro")
+        _registrar_cambios(None)
+        return conn.execute("DELETE FROM productos" + where, parametros).rowcount
+
+def _pilas_historial(conn):
+    """
+    Reconstruye las pilas de deshacer y rehacer a partir de los últimos
+    `LIMITE_HISTORIAL` lotes del diario.
+
+    Se recorren los lotes en orden como lo haría un editor: una operación
+    del usuario se apila en "deshacer" y vacía "rehacer"; deshacer pasa el
+    lote de una pila a la otra, y rehacer lo devuelve.
+
+    Retorna:
+        una tupla `(deshacer, rehacer, descripciones)`: las dos pilas de
+        números de lote (el último elemento es el próximo a usar) y un
+        diccionario lote -> descripción.
+    """
+    filas = conn.execute("""
+        SELECT l.lote, l.origen, l.revierte, l.descripcion FROM diario_lotes l
+        WHERE l.lote > (SELECT COALESCE(MAX(lote), 0) FROM diario_lotes) - ?
+          AND EXISTS (SELECT 1 FROM diario_cambios c WHERE c.lote = l.lote)
+        ORDER BY l.lote
+    """, (LIMITE_HISTORIAL,)).fetchall()
+    deshacer, rehacer, descripciones = [], [], {}
+    for lote, origen, revierte, descripcion in filas:
+        if origen == "deshacer":
+            if deshacer and deshacer[-1] == revierte:
+                rehacer.append(deshacer.pop())
+        elif origen == "rehacer":
+            if rehacer and rehacer[-1] == revierte:
+                deshacer.append(rehacer.pop())
+        else:
+            deshacer.append(lote)
+            rehacer.clear()
+            descripciones[lote] = descripcion
+    return deshacer, rehacer, descripciones
+
+def historial_deshacer_db():
+    """
+    Indica qué operaciones se pueden deshacer y rehacer.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        una tupla `(deshacer, rehacer)` con las descripciones de las
+        operaciones, la próxima a usar primero.
+    """
+    deshacer, rehacer, descripciones = _pilas_historial(obtener_conexion())
+    return ([descripciones[lote] for lote in reversed(deshacer)],
+            [descripciones[lote] for lote in reversed(rehacer)])
+
+# Columnas de un producto en las imágenes del diario
+_CAMPOS_IMAGEN = ("nombre", "categoria_id", "precio")
+
+def _sentencias_revertir(cambios, deshacer):
+    """
+    Traduce filas `(producto_id, imagen_anterior, imagen_posterior)` del
+    diario en pares `(sql, parametros)` que dejan cada producto como su
+    imagen anterior (`deshacer`) o posterior. Cada imagen es una tupla con
+    los `_CAMPOS_IMAGEN`, o None.
+    """
+    for id_prod, antes, despues in cambios:
+        destino, origen = (antes, despues) if deshacer else (despues, antes)
+        if destino is None:
+            yield "DELETE FROM productos WHERE id = ?", (id_prod,)
+        elif origen is None:
+            yield ("INSERT INTO productos (id, nombre, categoria_id, precio) VALUES (?, ?, ?, ?)",
+                   (id_prod, *destino))
+        else:
+            cambiados = [i for i in range(len(destino)) if destino[i] != origen[i]]
+            asignaciones = ", ".join(f"{_CAMPOS_IMAGEN[i]} = ?" for i in cambiados)
+            yield (f"UPDATE productos SET {asignaciones} WHERE id = ?",
+                   (*(destino[i] for i in cambiados), id_prod))
+
+def _imagenes_lote(conn, lote, orden):
+    """Lee los cambios de un lote como `(producto_id, antes, despues)`, con las
+    imágenes JSON ya separadas en tuplas por SQLite (None si no hay imagen)."""
+    columnas = ", ".join(f"json_extract({imagen}, '$.{campo}')"
+                         for imagen in ("antes", "despues") for campo in _CAMPOS_IMAGEN)
+    sql = f"SELECT producto_id, {columnas} FROM diario_cambios WHERE lote = ? ORDER BY id {orden}"
+    # `nombre` nunca es NULL, así que un nombre NULL indica que no hay imagen
+    return [(id_prod, antes if antes[0] is not None else None,
+             despues if despues[0] is not None else None)
+            for id_prod, *valores in conn.execute(sql, (lote,))
+            for antes, despues in ((tuple(valores[:3]), tuple(valores[3:])),)]
+
+def _revertir(origen):
+    """
+    Deshace (`origen="deshacer"`) o rehace (`origen="rehacer"`) la operación
+    del tope de la pila correspondiente, aplicando sus imágenes anteriores
+    (en orden inverso) o posteriores (en orden original).
+    """
+    deshacer = origen == "deshacer"
+    with transaccion() as conn:
+        pilas = _pilas_historial(conn)
+        pila = pilas[0] if deshacer else pilas[1]
+        if not pila:
+            return None
+        lote = pila[-1]
+        descripcion = pilas[2][lote]
+        _iniciar_lote(conn, f"{'Deshacer' if deshacer else 'Rehacer'}: {descripcion}",
+                      origen, revierte=lote)
+        cambios = _imagenes_lote(conn, lote, "DESC" if deshacer else "ASC")
+        # Las filas consecutivas que llevan la misma sentencia se aplican con un
+        # solo executemany. Una modificación solo escribe las columnas que
+        # cambiaron, para no reindexar el nombre si solo cambió el precio.
+        for sql, grupo in groupby(_sentencias_revertir(cambios, deshacer), key=lambda par: par[0]):
+            conn.executemany(sql, (parametros for _, parametros in grupo))
+        _registrar_cambios({cambio[0] for cambio in cambios})
+        return descripcion
+
+def deshacer_db():
+    """
+    Deshace la última operación sobre productos que no se haya deshecho.
+
+    La operación se revierte en una sola transacción y queda registrada en
+    el diario como un lote nuevo, de modo que el historial de cambios sigue
+    siendo completo. Solo se consideran los últimos `LIMITE_HISTORIAL` lotes.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        str: La descripción de la operación deshecha, o None si no hay
+        ninguna.
+
+    Lanza:
+        sqlite3.IntegrityError: Si la operación ya no se puede revertir (por
+        ejemplo, su categoría fue eliminada). No se aplica ningún cambio.
+    """
+    return _revertir("deshacer")
+
+def rehacer_db():
+    """
+    Vuelve a aplicar la última operación deshecha.
+
+    Solo es posible mientras no se haya hecho otra operación después de
+    deshacerla.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        str: La descripción de la operación rehecha, o None si no hay
+        ninguna.
+
+    Lanza:
+        sqlite3.IntegrityError: Si la operación ya no se puede aplicar. No se
+        aplica ningún cambio.
+    """
+    return _revertir("rehacer")
+
+def cambios_desde_db(desde_id=0, limite=1000, desde_momento=None):
+    """
+    Retorna los cambios de productos registrados en el diario después de un punto.
+
+    Pensada para sincronizaciones que consultan periódicamente: se guarda el
+    `id` del último cambio recibido y se pide desde ahí. La consulta recorre
+    la clave primaria del diario, así que su costo depende de la cantidad de
+    cambios nuevos y no del tamaño del historial.
+
+    Args:
+        desde_id (int): Se retornan los cambios con `id` mayor.
+        limite (int): La cantidad máxima de cambios a retornar.
+        desde_momento (float): Si se indica (segundos desde la época Unix),
+            se omiten además los cambios de operaciones anteriores.
+
+    Retorna:
+        una lista de registros `modelos.Cambio`, en el orden en que se
+        aplicaron.
+    """
+    conn = obtener_conexion()
+    if desde_momento is not None:
+        primer_lote = conn.execute("SELECT MIN(lote) FROM diario_lotes WHERE momento >= ?",
+                                   (desde_momento,)).fetchone()[0]
+        if primer_lote is None:
+            return []
+        primer_id = conn.execute("SELECT MIN(id) FROM diario_cambios WHERE lote >= ?",
+                                 (primer_lote,)).fetchone()[0]
+        if primer_id is None:
+            return []
+        desde_id = max(desde_id, primer_id - 1)
+    sql = """
+        SELECT c.id, c.lote, l.momento, l.origen, c.operacion, c.producto_id, c.antes, c.despues
+        FROM diario_cambios c JOIN diario_lotes l ON l.lote = c.lote
+        WHERE c.id > ? ORDER BY c.id LIMIT ?
+    """
+    return _registros(conn.execute(sql, (desde_id, limite)), modelos.fila_cambio).fetchall()
+
+def historial_precio_db(id_prod, desde=None, hasta=None):
+    """
+    Retorna la evolución del precio de un producto en un rango de tiempo.
+
+    Si se indica `desde`, la primera fila es la que estaba vigente en ese
+    momento (aunque sea anterior), de modo que el resultado describe el
+    precio durante todo el rango. Se resuelve con la clave primaria de
+    `historial_precios`, sin importar cuánto historial tengan los demás
+    productos.
+
+    Args:
+        id_prod (int): El ID del producto.
+        desde (float): El comienzo del rango en segundos Unix (por defecto, todo).
+        hasta (float): El final del rango, inclusive (por defecto, hasta ahora).
+
+    Retorna:
+        una lista de registros `modelos.PrecioHistorico` en orden
+        cronológico; una fila con `precio` None indica una baja.
+    """
+    conn = obtener_conexion()
+    sql = """
+        SELECT producto_id, momento, precio, categoria_id FROM historial_precios
+        WHERE producto_id = ?
+    """
+    parametros = [id_prod]
+    if desde is not None:
+        sql += """ AND momento >= COALESCE((SELECT MAX(momento) FROM historial_precios
+                                           WHERE producto_id = ? AND momento <= ?), ?)"""
+        parametros += [id_prod, desde, desde]
+    if hasta is not None:
+        sql += " AND momento <= ?"
+        parametros.append(hasta)
+    sql += " ORDER BY momento"
+    return _registros(conn.execute(sql, parametros), modelos.fila_precio_historico).fetchall()
+
+def precio_en_db(id_prod, momento):
+    """
+    Retorna el precio que tenía un producto en un momento dado.
+
+    Args:
+        id_prod (int): El ID del producto.
+        momento (float): El momento en segundos Unix.
+
+    Retorna:
+        int: El precio vigente, o None si el producto no existía en ese momento.
+    """
+    conn = obtener_conexion()
+    fila = conn.execute("""
+        SELECT precio FROM historial_precios WHERE producto_id = ? AND momento <= ?
+        ORDER BY momento DESC LIMIT 1
+    """, (id_prod, momento)).fetchone()
+    return fila[0] if fila else None
+
+def precios_en_db(momento, categoria_id=None, tam_bloque=TAM_BLOQUE_LECTURA):
+    """
+    Recorre el catálogo tal como estaba en un momento dado.
+
+    Recorre una sola vez `historial_precios` en el orden de su clave
+    `(producto_id, momento)` y, de cada producto, se queda con la última
+    fila anterior a `momento`, sin ordenar ni agrupar en tablas temporales.
+    Los productos dados de baja en ese momento no aparecen.
+
+    Args:
+        momento (float): El momento en segundos Unix.
+        categoria_id (int): Si se indica, solo los productos que estaban en esa categoría.
+        tam_bloque (int): La cantidad de filas que se leen de SQLite por vez.
+
+    Retorna:
+        un generador de registros `modelos.PrecioHistorico` (uno por
+        producto, ordenados por ID) con la fila vigente de cada uno.
+    """
+    conn = obtener_conexion()
+    sql = """
+        SELECT producto_id, MAX(momento), precio, categoria_id FROM historial_precios
+        WHERE momento <= ? GROUP BY producto_id HAVING precio IS NOT NULL
+    """
+    parametros = [momento]
+    if categoria_id is not None:
+        sql += " AND categoria_id = ?"
+        parametros.append(categoria_id)
+    return _en_flujo(_registros(conn.execute(sql, parametros), modelos.fila_precio_historico),
+                     tam_bloque)
+
+def iterar_historial_precios_db(desde=None, hasta=None, tam_bloque=TAM_BLOQUE_LECTURA):
+    """
+    Recorre las filas de `historial_precios`, ordenadas por producto y momento.
+
+    Args:
+        desde (float): Si se indica, solo filas desde ese momento (segundos Unix).
+        hasta (float): Si se indica, solo filas hasta ese momento, inclusive.
+        tam_bloque (int): La cantidad de filas que se leen de SQLite por vez.
+
+    Retorna:
+        un generador de registros `modelos.PrecioHistorico`.
+    """
     conn = obtener_conexion()
-    cursor = conn.cursor()
-    cursor.execute(sql, (nuevo_valor, id_prod))
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    sql = "SELECT producto_id, momento, precio, categoria_id FROM historial_precios"
+    # `+momento` evita que SQLite elija el índice por momento, que obligaría
+    # a ordenar todo el resultado: se recorre la clave y se filtra al pasar
+    condiciones = []
+    parametros = []
+    if desde is not None:
+        condiciones.append("+momento >= ?")
+        parametros.append(desde)
+    if hasta is not None:
+        condiciones.append("+momento <= ?")
+        parametros.append(hasta)
+    if condiciones:
+        sql += " WHERE " + " AND ".join(condiciones)
+    sql += " ORDER BY producto_id, momento"
+    return _en_flujo(_registros(conn.execute(sql, parametros), modelos.fila_precio_historico),
+                     tam_bloque)
+
+def reducir_historial_precios_db(antes_de, intervalo):
+    """
+    Reduce la resolución del historial de precios anterior a un momento.
+
+    Divide el tiempo en intervalos de `intervalo` segundos y, de cada
+    producto, conserva solo la última fila de cada intervalo. El precio de
+    cada producto al final de cada intervalo no cambia.
+
+    Args:
+        antes_de (float): Solo se reducen las filas anteriores a este momento.
+        intervalo (float): La duración de cada intervalo en segundos (por
+            ejemplo, 86400 para conservar un precio por día).
+
+    Retorna:
+        int: La cantidad de filas eliminadas.
+    """
+    with transaccion() as conn:
+        return conn.execute("""
+            DELETE FROM historial_precios AS h WHERE momento < ?1 AND EXISTS (
+                SELECT 1 FROM historial_precios s WHERE s.producto_id = h.producto_id
+                  AND s.momento > h.momento
+                  AND s.momento < MIN(?1, (CAST(h.momento / ?2 AS INTEGER) + 1) * ?2))
+        """, (antes_de, intervalo)).rowcount
+
+def podar_historial_precios_db(antes_de):
+    """
+    Elimina el historial de precios anterior a un momento.
+
+    De cada producto se conserva la fila vigente en `antes_de`, así que las
+    consultas a partir de ese momento dan el mismo resultado que antes.
+
+    Args:
+        antes_de (float): El momento desde el que se conserva el historial.
+
+    Retorna:
+        int: La cantidad de filas eliminadas.
+    """
+    with transaccion() as conn:
+        eliminadas = conn.execute("""
+            DELETE FROM historial_precios AS h WHERE momento < ?1 AND EXISTS (
+                SELECT 1 FROM historial_precios s WHERE s.producto_id = h.producto_id
+                  AND s.momento > h.momento AND s.momento <= ?1)
+        """, (antes_de,)).rowcount
+        # Una baja vigente en `antes_de` equivale a no tener historial
+        eliminadas += conn.execute(
+            "DELETE FROM historial_precios WHERE momento < ? AND precio IS NULL",
+            (antes_de,)).rowcount
+        return eliminadas
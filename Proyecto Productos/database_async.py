@@ -0,0 +1,193 @@
+# database_async.py
+"""
+Fachada asíncrona (asyncio) de la capa de datos. ⚡
+
+Permite usar el catálogo desde un servicio asyncio sin bloquear el bucle de
+eventos: cada función de `database.py` tiene aquí una corrutina con el mismo
+nombre y los mismos argumentos, que ejecuta la llamada original en un pool
+de hilos dedicado y de tamaño acotado (`MAX_HILOS`). Como `database.py`
+mantiene una conexión por hilo, cada hilo del pool trabaja con su propia
+conexión persistente.
+
+Todas las corrutinas aceptan además el argumento `timeout` (en segundos).
+Si se agota, o si la tarea que espera se cancela, la sentencia en curso se
+interrumpe con `sqlite3.Connection.interrupt()` y una transacción a medio
+hacer se revierte; la llamada lanza `asyncio.TimeoutError` o
+`asyncio.CancelledError`, respectivamente.
+
+Ejemplo:
+    import database_async as adb
+
+    async def listar():
+        await adb.inicializar_db()
+        async for producto in adb.iterar_productos_db():
+            ...
+        print(await adb.buscar_productos_db("cafe", timeout=0.5))
+        await adb.cerrar()
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import database as db
+
+MAX_HILOS = 4
+
+# Filas que trae cada viaje al pool en los recorridos con `async for`
+TAM_BLOQUE = 500
+
+_ejecutor = None
+_lock_ejecutor = threading.Lock()
+
+def _obtener_ejecutor():
+    """Retorna el pool de hilos de la base de datos, creándolo si hace falta."""
+    global _ejecutor
+    with _lock_ejecutor:
+        if _ejecutor is None:
+            _ejecutor = ThreadPoolExecutor(max_workers=MAX_HILOS,
+                                           thread_name_prefix="productos-db")
+        return _ejecutor
+
+async def ejecutar(funcion, *args, timeout=None, **kwargs):
+    """
+    Ejecuta una función bloqueante de la capa de datos en el pool de hilos.
+
+    Sirve para operaciones que no tienen corrutina propia, por ejemplo varias
+    llamadas que deben ir en una misma `db.transaccion()`: se agrupan en una
+    función y se ejecutan aquí, de modo que toda la transacción ocurre en un
+    mismo hilo y con una misma conexión.
+
+    Args:
+        funcion: La función a ejecutar.
+        *args: Los argumentos posicionales de `funcion`.
+        timeout (float): Segundos máximos de espera; None para no limitar.
+        **kwargs: Los argumentos por nombre de `funcion`.
+
+    Retorna:
+        El valor que retorne `funcion`.
+
+    Lanza:
+        asyncio.TimeoutError: Si se agota `timeout`.
+        asyncio.CancelledError: Si la tarea que espera se cancela.
+    """
+    estado = {"conn": None, "terminada": False, "cancelada": False}
+    lock = threading.Lock()
+
+    def tarea():
+        with lock:
+            if estado["cancelada"]:
+                # Se canceló mientras esperaba un hilo libre
+                return None
+            estado["conn"] = db.obtener_conexion()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            with lock:
+                estado["terminada"] = True
+
+    futuro = asyncio.get_running_loop().run_in_executor(_obtener_ejecutor(), tarea)
+    try:
+        return await asyncio.wait_for(futuro, timeout)
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        with lock:
+            estado["cancelada"] = True
+            # Solo se interrumpe si la función sigue en curso; así no se
+            # afecta a la siguiente tarea que use la misma conexión.
+            if estado["conn"] is not None and not estado["terminada"]:
+                estado["conn"].interrupt()
+        raise
+
+def _asincrona(nombre):
+    """
+    Crea la corrutina equivalente a la función `nombre` de `database.py`.
+
+    La función se busca en el módulo al momento de cada llamada, para
+    respetar los reemplazos que hace `instrumentacion.activar()`.
+    """
+    @functools.wraps(getattr(db, nombre))
+    async def corrutina(*args, timeout=None, **kwargs):
+        return await ejecutar(getattr(db, nombre), *args, timeout=timeout, **kwargs)
+    return corrutina
+
+inicializar_db = _asincrona("inicializar_db")
+
+# Categorías
+contar_categorias_db = _asincrona("contar_categorias_db")
+obtener_categorias_db = _asincrona("obtener_categorias_db")
+existe_categoria_db = _asincrona("existe_categoria_db")
+obtener_id_categoria_db = _asincrona("obtener_id_categoria_db")
+agregar_categoria_db = _asincrona("agregar_categoria_db")
+modificar_categoria_db = _asincrona("modificar_categoria_db")
+contar_productos_en_categoria_db = _asincrona("contar_productos_en_categoria_db")
+eliminar_categoria_db = _asincrona("eliminar_categoria_db")
+
+# Productos
+obtener_productos_db = _asincrona("obtener_productos_db")
+obtener_pagina_productos_db = _asincrona("obtener_pagina_productos_db")
+obtener_productos_por_ids_db = _asincrona("obtener_productos_por_ids_db")
+existe_producto_db = _asincrona("existe_producto_db")
+agregar_producto_db = _asincrona("agregar_producto_db")
+buscar_productos_db = _asincrona("buscar_productos_db")
+eliminar_producto_db = _asincrona("eliminar_producto_db")
+modificar_producto_db = _asincrona("modificar_producto_db")
+agregar_productos_lote_db = _asincrona("agregar_productos_lote_db")
+
+# Operaciones masivas
+fijar_precio_lote_db = _asincrona("fijar_precio_lote_db")
+actualizar_precios_db = _asincrona("actualizar_precios_db")
+ajustar_precio_porcentaje_db = _asincrona("ajustar_precio_porcentaje_db")
+recategorizar_lote_db = _asincrona("recategorizar_lote_db")
+eliminar_productos_lote_db = _asincrona("eliminar_productos_lote_db")
+eliminar_productos_filtro_db = _asincrona("eliminar_productos_filtro_db")
+
+# Diario de cambios
+historial_deshacer_db = _asincrona("historial_deshacer_db")
+deshacer_db = _asincrona("deshacer_db")
+rehacer_db = _asincrona("rehacer_db")
+cambios_desde_db = _asincrona("cambios_desde_db")
+
+# Historial de precios
+historial_precio_db = _asincrona("historial_precio_db")
+precio_en_db = _asincrona("precio_en_db")
+reducir_historial_precios_db = _asincrona("reducir_historial_precios_db")
+podar_historial_precios_db = _asincrona("podar_historial_precios_db")
+
+async def iterar_productos_db(tam_bloque=TAM_BLOQUE, timeout=None):
+    """
+    Recorre todos los productos con `async for`, sin cargarlos todos en memoria.
+
+    Cada bloque se pide al pool como una página por clave `(nombre, id)`, de
+    modo que entre bloques no queda ningún cursor ni transacción de lectura
+    abiertos y el bucle de eventos atiende otras tareas mientras tanto.
+
+    Args:
+        tam_bloque (int): La cantidad de filas de cada viaje al pool.
+        timeout (float): Segundos máximos para obtener cada bloque.
+
+    Retorna:
+        un generador asíncrono de registros `modelos.Producto`, ordenados por nombre.
+    """
+    despues = None
+    hay_mas = True
+    while hay_mas:
+        filas, hay_mas = await obtener_pagina_productos_db(
+            tam_bloque, despues=despues, timeout=timeout)
+        for fila in filas:
+            yield fila
+        if filas:
+            despues = (filas[-1].nombre, filas[-1].id)
+
+async def cerrar():
+    """
+    Espera a que terminen las tareas en curso, detiene el pool de hilos y
+    cierra las conexiones de la base de datos.
+
+    La función no devuelve ningún valor.
+    """
+    global _ejecutor
+    with _lock_ejecutor:
+        ejecutor, _ejecutor = _ejecutor, None
+    if ejecutor is not None:
+        await asyncio.get_running_loop().run_in_executor(None, ejecutor.shutdown)
+    db.cerrar_conexiones()
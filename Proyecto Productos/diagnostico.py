@@ -0,0 +1,59 @@
+# diagnostico.py
+"""
+Módulo de diagnóstico de rendimiento. 🩺
+
+Controlador del menú oculto de diagnóstico (opción `D` del menú principal,
+que no aparece en pantalla). Permite activar la instrumentación de
+`instrumentacion.py`, consultar los tiempos por función y por sentencia,
+revisar las consultas lentas, guardar todas las estadísticas en JSON y ver
+el uso de las cachés de consultas y de categorías.
+"""
+import cache_consultas
+import database as db
+import instrumentacion
+import ui
+
+def gestionar_diagnostico():
+    """Bucle del menú de diagnóstico.
+    No recibe argumentos ni devuelve ningún valor."""
+    while True:
+        ui.mostrar_menu_diagnostico(instrumentacion.esta_activa())
+        opcion = ui.obtener_input("Seleccione una opción: ")
+
+        if opcion == '1':
+            if instrumentacion.esta_activa():
+                instrumentacion.desactivar()
+                ui.mostrar_mensaje_info("Instrumentación desactivada.")
+            else:
+                instrumentacion.activar()
+                ui.mostrar_mensaje_exito("Instrumentación activada.")
+        elif opcion == '2':
+            ui.mostrar_tabla_tiempos("Tiempos por función",
+                                     instrumentacion.estadisticas()["funciones"])
+        elif opcion == '3':
+            estadisticas = instrumentacion.estadisticas()
+            tiempos = dict(estadisticas["sentencias"])
+            if estadisticas["confirmaciones"]:
+                tiempos["COMMIT"] = estadisticas["confirmaciones"]
+            ui.mostrar_tabla_tiempos("Tiempos por sentencia SQL", tiempos)
+        elif opcion == '4':
+            estadisticas = instrumentacion.estadisticas()
+            ui.mostrar_consultas_lentas(estadisticas["consultas_lentas"],
+                                        estadisticas["umbral_lenta_ms"])
+        elif opcion == '5':
+            ruta = ui.obtener_input("Archivo de destino [diagnostico.json]: ") or "diagnostico.json"
+            try:
+                instrumentacion.volcar_json(ruta)
+                ui.mostrar_mensaje_exito(f"Estadísticas guardadas en '{ruta}'.")
+            except OSError as error:
+                ui.mostrar_mensaje_error(f"No se pudo guardar el archivo: {error}")
+        elif opcion == '6':
+            instrumentacion.reiniciar()
+            ui.mostrar_mensaje_info("Estadísticas reiniciadas.")
+        elif opcion == '7':
+            ui.mostrar_estadisticas_caches(cache_consultas.estadisticas(),
+                                           db.estadisticas_cache_categorias())
+        elif opcion == '8':
+            break
+        else:
+            ui.mostrar_mensaje_error("Opción inválida.")
@@ -0,0 +1,225 @@
+# escritura_diferida.py
+"""
+Escritura diferida (write-behind) de las ediciones interactivas. ⏳
+
+Mientras está activa, las operaciones que se pasan a `ejecutar` no se
+confirman en el momento: se encolan y un hilo escritor las confirma juntas
+en una sola transacción cada `INTERVALO_S` segundos (o al desactivarla, por
+ejemplo al salir del menú). Así el usuario no espera la confirmación de cada
+edición y varias ediciones seguidas comparten una sola escritura a disco.
+
+Cada operación se ejecuta dentro de su propio `SAVEPOINT`: si una falla,
+solo se descarta esa, y el error se guarda junto con la descripción que se
+pasó a `ejecutar` (por ejemplo, "Baja del producto 7") para informarlo con
+`errores()`. Por eso, cuando `ejecutar` encola, el llamador debe decir que
+el cambio quedó en cola, no que ya se guardó.
+Cada una queda además como un lote separado en el diario de cambios, de
+modo que se deshace por separado (ver `db.terminar_operacion`).
+
+Para que nunca se lean datos viejos, `database.obtener_conexion` espera a
+que se confirme la cola antes de entregar una conexión a cualquier otro
+hilo (ver `db.fijar_espera_escrituras`).
+
+Uso:
+    with escritura_diferida.diferida():
+        escritura_diferida.ejecutar("Cambio de precio del producto 7",
+                                    db.modificar_producto_db, 7, "precio", 1500)
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import database as db
+
+INTERVALO_S = 0.2
+
+_condicion = threading.Condition()
+_pendientes = []
+_en_curso = 0
+_urgente = False
+_errores = []
+_hilo = None
+_activa = False
+
+def _anotar_error(mensaje):
+    with _condicion:
+        _errores.append(mensaje)
+
+def _confirmar(operaciones):
+    """Confirma en una transacción las operaciones `(descripcion, funcion, args, kwargs)`."""
+    try:
+        with db.transaccion() as conn:
+            for descripcion, funcion, args, kwargs in operaciones:
+                db.terminar_operacion()
+                conn.execute("SAVEPOINT escritura_diferida")
+                try:
+                    funcion(*args, **kwargs)
+                except Exception as error:
+                    conn.execute("ROLLBACK TO escritura_diferida")
+                    _anotar_error(f"{descripcion}: {error}")
+                conn.execute("RELEASE escritura_diferida")
+    except sqlite3.Error as error:
+        # No se pudo comenzar o confirmar la transacción: se pierde toda la tanda
+        descripciones = "; ".join(operacion[0] for operacion in operaciones)
+        _anotar_error(f"{descripciones}: {error}")
+    except Exception as error:
+        # Falló un observador de `db.suscribir_cambios` tras confirmar: los
+        # cambios quedaron guardados y el hilo debe seguir vaciando la cola
+        descripciones = "; ".join(operacion[0] for operacion in operaciones)
+        _anotar_error(f"{descripciones}: se guardó, pero falló el aviso del cambio: {error}")
+
+def _escritor(intervalo):
+    """Bucle del hilo escritor: junta operaciones durante `intervalo` y las confirma."""
+    global _en_curso, _urgente, _activa
+    try:
+        while True:
+            with _condicion:
+                while not _pendientes and _activa:
+                    _condicion.wait()
+                if not _pendientes:
+                    return
+                # Se esperan más operaciones, salvo que alguien necesite la cola ya
+                _condicion.wait_for(lambda: _urgente or not _activa, intervalo)
+                operaciones = _pendientes[:]
+                _pendientes.clear()
+                _en_curso = len(operaciones)
+                _urgente = False
+            try:
+                _confirmar(operaciones)
+            finally:
+                with _condicion:
+                    _en_curso = 0
+                    _condicion.notify_all()
+    finally:
+        with _condicion:
+            if _pendientes:
+                # El hilo terminó por un error inesperado: lo encolado no se
+                # guardará, y nadie debe quedarse esperando por ello
+                _anotar_error("; ".join(operacion[0] for operacion in _pendientes)
+                              + ": no se guardó porque se detuvo la escritura diferida")
+                _pendientes.clear()
+            _activa = False
+            _condicion.notify_all()
+        # Cada activación crea un hilo nuevo: su conexión no debe quedar abierta
+        db.cerrar_conexiones_hilo()
+
+def confirmar():
+    """
+    Espera a que se confirmen todas las operaciones encoladas.
+
+    Si no hay nada pendiente (o la llama el propio hilo escritor) retorna
+    enseguida, por lo que se puede llamar antes de cada acceso a la base.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    La función no devuelve ningún valor.
+    """
+    global _urgente
+    if (not _pendientes and not _en_curso) or threading.current_thread() is _hilo:
+        return
+    with _condicion:
+        _urgente = True
+        _condicion.notify_all()
+        while _pendientes or _en_curso:
+            _condicion.wait()
+
+def activar(intervalo=INTERVALO_S):
+    """
+    Empieza a diferir las operaciones que se pasan a `ejecutar`.
+
+    Args:
+        intervalo (float): Segundos que se esperan para juntar operaciones
+            antes de confirmarlas.
+
+    La función no devuelve ningún valor.
+    """
+    global _hilo, _activa
+    if _activa:
+        return
+    _activa = True
+    _hilo = threading.Thread(target=_escritor, args=(intervalo,),
+                             name="productos-escritura", daemon=True)
+    _hilo.start()
+    db.fijar_espera_escrituras(confirmar)
+
+def desactivar():
+    """
+    Confirma lo que quede en cola y vuelve a ejecutar las operaciones en el momento.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    La función no devuelve ningún valor.
+    """
+    global _hilo, _activa
+    if not _activa:
+        return
+    with _condicion:
+        _activa = False
+        _condicion.notify_all()
+    _hilo.join()
+    _hilo = None
+    db.fijar_espera_escrituras(None)
+
+@contextmanager
+def diferida(intervalo=INTERVALO_S):
+    """
+    Activa la escritura diferida durante un bloque `with` y confirma todo al salir.
+
+    Args:
+        intervalo (float): Ver `activar`.
+    """
+    activar(intervalo)
+    try:
+        yield
+    finally:
+        desactivar()
+
+def esta_activa():
+    """
+    Indica si las operaciones que se pasan a `ejecutar` se encolan.
+
+    Retorna:
+        bool: True si la escritura diferida está activa.
+    """
+    return _activa
+
+def ejecutar(descripcion, funcion, *args, **kwargs):
+    """
+    Ejecuta una función de escritura de `database.py`, o la encola si la
+    escritura diferida está activa.
+
+    Args:
+        descripcion (str): Qué hace la operación, para el mensaje de error
+            si falla al confirmarse (por ejemplo, "Baja del producto 7").
+        funcion: La función a ejecutar.
+        *args: Los argumentos posicionales de `funcion`.
+        **kwargs: Los argumentos por nombre de `funcion`.
+
+    Retorna:
+        El valor que retorne `funcion`, o None si se encoló.
+    """
+    if not _activa:
+        return funcion(*args, **kwargs)
+    with _condicion:
+        _pendientes.append((descripcion, funcion, args, kwargs))
+        _condicion.notify_all()
+    return None
+
+def errores():
+    """
+    Retorna y descarta los errores de las operaciones diferidas que fallaron.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        una lista de mensajes `"descripción: error"` (vacía si no hubo
+        problemas). Si la operación se guardó pero falló un observador de
+        `db.suscribir_cambios`, el mensaje lo aclara.
+    """
+    with _condicion:
+        mensajes = _errores[:]
+        _errores.clear()
+    return mensajes
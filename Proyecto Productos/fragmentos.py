@@ -0,0 +1,514 @@
+# fragmentos.py
+"""
+Fragmentación horizontal del catálogo en varios archivos SQLite. 🧩
+
+Un catálogo fragmentado es una carpeta con varios archivos
+`fragmento-N.db`, cada uno con el esquema completo de `migraciones.py`, y
+un manifiesto `fragmentos.json` con la cantidad de fragmentos y la
+estrategia de reparto:
+- "id": cada producto va al fragmento `id % cantidad`.
+- "categoria": cada producto va al fragmento `categoria_id % cantidad`, de
+  modo que los reportes y filtros por categoría leen un solo archivo.
+
+Cada fragmento asigna IDs de una clase de resto distinta (ver
+`db.siguiente_id_producto_db`), así los IDs nunca se repiten entre
+fragmentos y, con la estrategia "id", un ID indica directamente en qué
+archivo está el producto. La tabla `categorias`, que es pequeña, se replica
+completa en todos los fragmentos con los mismos IDs; el fragmento 0 es el
+que manda.
+
+`CatalogoFragmentado` ofrece las funciones de `database.py` con los mismos
+nombres y argumentos, aplicadas sobre cada fragmento con
+`db.usando_base`. Las consultas que abarcan todo el catálogo (listados y
+búsqueda) se lanzan a la vez en todos los fragmentos, en un pool de hilos,
+y sus resultados se combinan con una mezcla de k vías (`heapq.merge`): los
+listados conservan el orden por `(nombre, id)` y la búsqueda, el de
+relevancia (ver `CatalogoFragmentado.iterar_busqueda_productos_db`).
+
+Cada operación es atómica dentro de su fragmento, pero no entre
+fragmentos. El diario de cambios, deshacer/rehacer y la instantánea de
+reportes trabajan por archivo y no se ofrecen aquí.
+
+Uso:
+    import fragmentos
+    fragmentos.rebalancear("datos", 4, "id", importar="productos.db")
+    catalogo = fragmentos.CatalogoFragmentado("datos")
+    catalogo.obtener_pagina_productos_db()
+"""
+import glob
+import heapq
+import itertools
+import json
+import os
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+
+import database as db
+
+ESTRATEGIAS = ("id", "categoria")
+MANIFIESTO = "fragmentos.json"
+
+# Filas que se piden a cada fragmento por viaje en los recorridos completos
+TAM_BLOQUE = 500
+
+# Productos que se mueven por transacción al rebalancear
+TAM_LOTE_MOVER = 5000
+
+def _clave_orden(producto):
+    """Clave del orden de los listados: `(nombre, id)`."""
+    return producto.nombre, producto.id
+
+def _ruta_fragmento(carpeta, indice):
+    return os.path.join(carpeta, f"fragmento-{indice}.db")
+
+def _fragmento_destino(estrategia, cantidad, id_prod, categoria_id):
+    """Índice del fragmento que corresponde a un producto."""
+    return (categoria_id if estrategia == "categoria" else id_prod) % cantidad
+
+def leer_manifiesto(carpeta):
+    """
+    Lee la configuración de un catálogo fragmentado.
+
+    Args:
+        carpeta (str): La carpeta del catálogo.
+
+    Retorna:
+        dict: Con las claves `cantidad` y `estrategia`.
+
+    Lanza:
+        FileNotFoundError: Si la carpeta no tiene manifiesto.
+    """
+    with open(os.path.join(carpeta, MANIFIESTO), encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+def _escribir_manifiesto(carpeta, cantidad, estrategia):
+    ruta = os.path.join(carpeta, MANIFIESTO)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:
+        json.dump({"cantidad": cantidad, "estrategia": estrategia}, archivo)
+    os.replace(ruta + ".tmp", ruta)
+
+class CatalogoFragmentado:
+    """Las funciones de `database.py` sobre un catálogo repartido en varios archivos."""
+
+    def __init__(self, carpeta):
+        manifiesto = leer_manifiesto(carpeta)
+        self.carpeta = carpeta
+        self.estrategia = manifiesto["estrategia"]
+        self.rutas = [_ruta_fragmento(carpeta, i) for i in range(manifiesto["cantidad"])]
+        self._ejecutor = ThreadPoolExecutor(max_workers=len(self.rutas),
+                                            thread_name_prefix="productos-fragmento")
+
+    def cerrar(self):
+        """Detiene el pool de hilos; las conexiones se cierran con `db.cerrar_conexiones()`."""
+        self._ejecutor.shutdown()
+
+    # --- Distribución ---
+
+    def _en(self, indice, funcion, *args, **kwargs):
+        """Ejecuta una función de `database.py` sobre un fragmento, en el hilo actual."""
+        with db.usando_base(self.rutas[indice]):
+            return funcion(*args, **kwargs)
+
+    def _en_todos(self, funcion, *args, **kwargs):
+        """Ejecuta una función en todos los fragmentos a la vez y retorna sus resultados en orden."""
+        if len(self.rutas) == 1:
+            return [self._en(0, funcion, *args, **kwargs)]
+        return list(self._ejecutor.map(lambda i: self._en(i, funcion, *args, **kwargs),
+                                       range(len(self.rutas))))
+
+    def _fragmento_de(self, id_prod):
+        """Índice del fragmento que contiene un producto, o None si no existe."""
+        if self.estrategia == "id":
+            indice = id_prod % len(self.rutas)
+            return indice if self._en(indice, db.existe_producto_db, id_prod) else None
+        existe = self._en_todos(db.existe_producto_db, id_prod)
+        return existe.index(True) if True in existe else None
+
+    def _por_fragmento(self, ids):
+        """Reparte IDs por fragmento. Con la estrategia "categoria" el ID no
+        indica el fragmento, así que cada uno recibe la lista completa."""
+        ids = list(ids)
+        if self.estrategia != "id":
+            return dict.fromkeys(range(len(self.rutas)), ids)
+        grupos = {}
+        for id_prod in ids:
+            grupos.setdefault(id_prod % len(self.rutas), []).append(id_prod)
+        return grupos
+
+    def _en_grupos(self, funcion, ids, *args):
+        """Aplica `funcion(ids_del_fragmento, *args)` en cada fragmento y suma los resultados."""
+        return sum(self._en(indice, funcion, grupo, *args)
+                   for indice, grupo in self._por_fragmento(ids).items())
+
+    def _fragmentos_para_altas(self, categorias):
+        """
+        Genera el fragmento de cada alta, en orden, a partir de las categorías.
+
+        Con la estrategia "id" se elige el fragmento que asignaría el ID más
+        bajo: cada uno toma IDs de su clase de resto por encima de los que ya
+        asignó, así que los fragmentos se turnan en el orden de los IDs. El
+        turno sale de las secuencias guardadas en cada archivo, de modo que
+        se respeta también entre procesos (cada `cli.py add` es uno nuevo).
+        """
+        cantidad = len(self.rutas)
+        if self.estrategia == "categoria":
+            for categoria_id in categorias:
+                yield categoria_id % cantidad
+            return
+        proximos = [(self._en(indice, db.siguiente_id_producto_db, cantidad, indice), indice)
+                    for indice in range(cantidad)]
+        heapq.heapify(proximos)
+        for _ in categorias:
+            id_prod, indice = proximos[0]
+            heapq.heapreplace(proximos, (id_prod + cantidad, indice))
+            yield indice
+
+    def _fragmento_para_alta(self, categoria_id):
+        return next(self._fragmentos_para_altas([categoria_id]))
+
+    def _replicar_categorias(self):
+        """Copia las categorías del fragmento 0 en los demás."""
+        categorias = self._en(0, db.obtener_categorias_db)
+        for indice in range(1, len(self.rutas)):
+            self._en(indice, db.sincronizar_categorias_db, categorias)
+
+    # --- Esquema y transacciones ---
+
+    def inicializar_db(self):
+        """Aplica las migraciones en todos los fragmentos y replica las categorías."""
+        self._en_todos(db.inicializar_db)
+        self._replicar_categorias()
+
+    @contextmanager
+    def transaccion(self):
+        """
+        Compatibilidad con `db.transaccion()`: no agrupa nada. Cada operación
+        ya es atómica en su fragmento y no hay transacciones entre archivos.
+        """
+        yield None
+
+    # --- Categorías (se leen del fragmento 0 y se replican al escribir) ---
+
+    def contar_categorias_db(self):
+        return self._en(0, db.contar_categorias_db)
+
+    def obtener_categorias_db(self):
+        return self._en(0, db.obtener_categorias_db)
+
+    def iterar_categorias_db(self):
+        return iter(self.obtener_categorias_db())
+
+    def existe_categoria_db(self, id_cat):
+        return self._en(0, db.existe_categoria_db, id_cat)
+
+    def obtener_id_categoria_db(self, nombre):
+        return self._en(0, db.obtener_id_categoria_db, nombre)
+
+    def agregar_categoria_db(self, nombre):
+        self._en(0, db.agregar_categoria_db, nombre)
+        self._replicar_categorias()
+
+    def modificar_categoria_db(self, id_cat, nuevo_nombre):
+        self._en(0, db.modificar_categoria_db, id_cat, nuevo_nombre)
+        self._replicar_categorias()
+
+    def contar_productos_en_categoria_db(self, id_cat):
+        if self.estrategia == "categoria":
+            return self._en(id_cat % len(self.rutas), db.contar_productos_en_categoria_db, id_cat)
+        return sum(self._en_todos(db.contar_productos_en_categoria_db, id_cat))
+
+    def eliminar_categoria_db(self, id_cat):
+        """Como `db.eliminar_categoria_db`: falla con `sqlite3.IntegrityError`
+        si la categoría tiene productos en cualquier fragmento."""
+        if self.contar_productos_en_categoria_db(id_cat):
+            raise sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+        self._en(0, db.eliminar_categoria_db, id_cat)
+        self._replicar_categorias()
+
+    # --- Lecturas de productos ---
+
+    def existe_producto_db(self, id_prod):
+        return self._fragmento_de(id_prod) is not None
+
+    def obtener_pagina_productos_db(self, tam_pagina=db.TAM_PAGINA, despues=None, antes=None,
+                                    desde_nombre=None):
+        """
+        Como `db.obtener_pagina_productos_db`, sobre todos los fragmentos.
+
+        Cada fragmento entrega su propia página por clave y las páginas se
+        mezclan: las `tam_pagina` filas más próximas a la clave en todo el
+        catálogo están entre las primeras `tam_pagina` de algún fragmento.
+        """
+        paginas = self._en_todos(db.obtener_pagina_productos_db, tam_pagina, despues=despues,
+                                 antes=antes, desde_nombre=desde_nombre)
+        filas = list(heapq.merge(*(filas for filas, _ in paginas), key=_clave_orden))
+        hay_mas = len(filas) > tam_pagina or any(hay_mas for _, hay_mas in paginas)
+        if antes is not None:
+            return filas[-tam_pagina:], hay_mas
+        return filas[:tam_pagina], hay_mas
+
+    def _recorrer_fragmento(self, indice, filas, hay_mas):
+        """Genera los productos de un fragmento pidiendo páginas por clave a medida que se consumen."""
+        while True:
+            yield from filas
+            if not hay_mas or not filas:
+                return
+            ultimo = filas[-1]
+            filas, hay_mas = self._en(indice, db.obtener_pagina_productos_db, TAM_BLOQUE,
+                                      despues=(ultimo.nombre, ultimo.id))
+
+    def iterar_productos_db(self):
+        """
+        Recorre todo el catálogo ordenado por `(nombre, id)` sin cargarlo en memoria.
+
+        La primera página de cada fragmento se pide a la vez a todos; luego
+        cada fragmento se lee por páginas a medida que la mezcla lo necesita.
+        """
+        primeras = self._en_todos(db.obtener_pagina_productos_db, TAM_BLOQUE)
+        yield from heapq.merge(*(self._recorrer_fragmento(i, filas, hay_mas)
+                                 for i, (filas, hay_mas) in enumerate(primeras)),
+                               key=_clave_orden)
+
+    def obtener_productos_db(self):
+        return list(self.iterar_productos_db())
+
+    def iterar_busqueda_productos_db(self, termino, limite=50):
+        """
+        Como `db.iterar_busqueda_productos_db`: los `limite` resultados más
+        relevantes, los mejores primero.
+
+        Cada fragmento aporta sus `limite` mejores resultados y se mezclan
+        por su puesto en el fragmento (los primeros de cada uno, luego los
+        segundos, etc., y a igual puesto por `(nombre, id)`). Los puntajes de
+        relevancia no se comparan entre archivos, pero como los productos se
+        reparten parejo, ningún resultado que esté entre los mejores de su
+        fragmento queda fuera por su nombre.
+        """
+        resultados = self._en_todos(db.buscar_productos_db, termino, limite)
+        mezcla = heapq.merge(*(enumerate(filas) for filas in resultados),
+                             key=lambda par: (par[0], _clave_orden(par[1])))
+        return (producto for _, producto in itertools.islice(mezcla, limite))
+
+    def buscar_productos_db(self, termino, limite=50):
+        """Como `iterar_busqueda_productos_db`, pero retorna una lista."""
+        return list(self.iterar_busqueda_productos_db(termino, limite))
+
+    # --- Escrituras de productos ---
+
+    def agregar_producto_db(self, nombre, cat_id, precio):
+        indice = self._fragmento_para_alta(cat_id)
+
+        def alta():
+            with db.transaccion():
+                id_prod = db.siguiente_id_producto_db(len(self.rutas), indice)
+                db.agregar_producto_db(nombre, cat_id, precio, id_prod=id_prod)
+
+        self._en(indice, alta)
+
+    def agregar_productos_lote_db(self, filas):
+        """Como `db.agregar_productos_lote_db`: una transacción por fragmento."""
+        filas = list(filas)
+        grupos = {}
+        for fila, indice in zip(filas, self._fragmentos_para_altas(cat_id for _, cat_id, _ in filas)):
+            grupos.setdefault(indice, []).append(fila)
+
+        def alta(indice, grupo):
+            with db.transaccion():
+                primero = db.siguiente_id_producto_db(len(self.rutas), indice)
+                return db.copiar_productos_db(
+                    (primero + i * len(self.rutas), *fila) for i, fila in enumerate(grupo))
+
+        return sum(self._en(indice, alta, indice, grupo) for indice, grupo in grupos.items())
+
+    def eliminar_producto_db(self, id_prod):
+        indice = self._fragmento_de(id_prod)
+        if indice is not None:
+            self._en(indice, db.eliminar_producto_db, id_prod)
+
+    def modificar_producto_db(self, id_prod, campo_a_modificar, nuevo_valor):
+        """
+        Como `db.modificar_producto_db`. Con la estrategia "categoria", un
+        cambio de categoría que cruza de fragmento mueve el producto (con el
+        mismo ID): primero se copia al destino y luego se elimina del origen.
+        """
+        indice = self._fragmento_de(id_prod)
+        if indice is None:
+            return
+        if campo_a_modificar == "categoria_id" and self.estrategia == "categoria":
+            destino = nuevo_valor % len(self.rutas)
+            if destino != indice:
+                _, _, precio, nombre = self._en(
+                    indice, lambda: next(db.iterar_columnas_productos_db([id_prod])))
+                self._en(destino, db.copiar_productos_db, [(id_prod, nombre, nuevo_valor, precio)])
+                self._en(indice, db.eliminar_producto_db, id_prod)
+                return
+        self._en(indice, db.modificar_producto_db, id_prod, campo_a_modificar, nuevo_valor)
+
+    # --- Operaciones masivas ---
+
+    def fijar_precio_lote_db(self, ids, precio):
+        return self._en_grupos(db.fijar_precio_lote_db, ids, precio)
+
+    def actualizar_precios_db(self, precios):
+        precios = dict(precios)
+        return sum(self._en(indice, db.actualizar_precios_db,
+                            [(id_prod, precios[id_prod]) for id_prod in grupo])
+                   for indice, grupo in self._por_fragmento(precios).items())
+
+    def ajustar_precio_porcentaje_db(self, porcentaje, ids=None, categoria_id=None):
+        if ids is not None:
+            return sum(self._en(indice, db.ajustar_precio_porcentaje_db, porcentaje, grupo, categoria_id)
+                       for indice, grupo in self._por_fragmento(ids).items())
+        return sum(self._en_todos(db.ajustar_precio_porcentaje_db, porcentaje,
+                                  categoria_id=categoria_id))
+
+    def recategorizar_lote_db(self, ids, nueva_cat_id):
+        if self.estrategia == "categoria":
+            # Puede cruzar fragmentos: se mueve producto por producto
+            ids = [id_prod for id_prod in ids if self.existe_producto_db(id_prod)]
+            for id_prod in ids:
+                self.modificar_producto_db(id_prod, "categoria_id", nueva_cat_id)
+            return len(ids)
+        return self._en_grupos(db.recategorizar_lote_db, ids, nueva_cat_id)
+
+    def eliminar_productos_lote_db(self, ids):
+        return self._en_grupos(db.eliminar_productos_lote_db, ids)
+
+    def eliminar_productos_filtro_db(self, categoria_id=None, precio_min=None, precio_max=None):
+        if categoria_id is None and precio_min is None and precio_max is None:
+            raise ValueError("Debe indicar al menos un filtro para eliminar productos")
+        return sum(self._en_todos(db.eliminar_productos_filtro_db, categoria_id,
+                                  precio_min, precio_max))
+
+def _fragmentos_existentes(carpeta):
+    """Retorna `{indice: ruta}` de los archivos `fragmento-N.db` de la carpeta."""
+    existentes = {}
+    for ruta in glob.glob(os.path.join(carpeta, "fragmento-*.db")):
+        coincidencia = re.fullmatch(r"fragmento-(\d+)\.db", os.path.basename(ruta))
+        if coincidencia:
+            existentes[int(coincidencia.group(1))] = ruta
+    return existentes
+
+def rebalancear(carpeta, cantidad, estrategia="id", importar=None, progreso=None):
+    """
+    Reparte los productos de un catálogo fragmentado en `cantidad` fragmentos
+    según `estrategia`, creando el catálogo si no existe.
+
+    Los productos que ya están en su fragmento no se tocan; los demás se
+    copian al fragmento que les corresponde (con el mismo ID) y luego se
+    eliminan del original, por lotes de `TAM_LOTE_MOVER`. Copiar es
+    idempotente, así que si el proceso se interrumpe basta con volver a
+    ejecutarlo. Los fragmentos que quedan de más se eliminan al final.
+
+    Debe ejecutarse sin otros procesos usando el catálogo.
+
+    Args:
+        carpeta (str): La carpeta del catálogo fragmentado.
+        cantidad (int): La cantidad de fragmentos deseada.
+        estrategia (str): "id" o "categoria" (ver `ESTRATEGIAS`).
+        importar (str): Una base sin fragmentar (por ejemplo `productos.db`)
+            cuyos productos y categorías se copian al catálogo. Se abre en
+            solo lectura, así que no se modifica: ni sus datos, ni su esquema
+            ni su modo de diario. Sus categorías reemplazan a las del catálogo.
+        progreso: Función opcional que recibe la cantidad de productos movidos.
+
+    Retorna:
+        dict: Resumen con `fragmentos`, `estrategia`, `movidos` e `importados`.
+
+    Lanza:
+        ValueError: Si la cantidad o la estrategia no son válidas.
+        FileNotFoundError: Si la base a importar no existe.
+    """
+    if cantidad < 1:
+        raise ValueError("La cantidad de fragmentos debe ser al menos 1")
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estrategia desconocida: {estrategia} (use {' o '.join(ESTRATEGIAS)})")
+    if importar is None:
+        return _rebalancear(carpeta, cantidad, estrategia, None, progreso)
+    with _abrir_solo_lectura(importar) as fuente:
+        return _rebalancear(carpeta, cantidad, estrategia, fuente, progreso)
+
+def _abrir_solo_lectura(ruta):
+    """
+    Abre una base en solo lectura, sin el perfil ni las migraciones de
+    `db.obtener_conexion` (que cambiarían su modo de diario o su esquema).
+    """
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"No existe la base '{ruta}'.")
+    return closing(sqlite3.connect(f"file:{os.path.abspath(ruta)}?mode=ro", uri=True))
+
+def _rebalancear(carpeta, cantidad, estrategia, fuente, progreso):
+    """Cuerpo de `rebalancear`; `fuente` es la conexión a la base a importar, o None."""
+    os.makedirs(carpeta, exist_ok=True)
+    existentes = _fragmentos_existentes(carpeta)
+    rutas = {i: _ruta_fragmento(carpeta, i) for i in range(cantidad)}
+    todas = {**existentes, **rutas}
+
+    # Esquema y categorías en todos los archivos, y secuencias de IDs por
+    # encima del mayor ID asignado en cualquiera de ellos
+    for ruta in todas.values():
+        with db.usando_base(ruta):
+            db.inicializar_db()
+    if fuente is not None:
+        categorias = fuente.execute("SELECT id, nombre FROM categorias ORDER BY nombre").fetchall()
+        mayor_id = fuente.execute(
+            "SELECT MAX(IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'productos'), 0),"
+            " IFNULL((SELECT MAX(id) FROM productos), 0))").fetchone()[0]
+    else:
+        with db.usando_base(todas[0]):
+            categorias = db.obtener_categorias_db()
+        mayor_id = 0
+    for ruta in todas.values():
+        with db.usando_base(ruta):
+            db.sincronizar_categorias_db(categorias)
+            mayor_id = max(mayor_id, db.siguiente_id_producto_db() - 1)
+    for ruta in todas.values():
+        with db.usando_base(ruta):
+            db.fijar_secuencia_productos_db(mayor_id)
+
+    movidos = importados = 0
+    fuentes = [(indice, ruta) for indice, ruta in sorted(todas.items())]
+    if fuente is not None:
+        fuentes.append((None, None))
+    for origen, ruta in fuentes:
+        # Se lee en flujo y cada lote se mueve apenas se completa; borrar del
+        # origen filas que el cursor ya pasó no altera lo que falta leer
+        if origen is None:
+            # El cursor de sqlite3 también entrega las filas a medida que se recorre
+            filas = fuente.execute("SELECT id, categoria_id, precio, nombre FROM productos")
+        else:
+            with db.usando_base(ruta):
+                filas = db.iterar_columnas_productos_db(tam_bloque=TAM_LOTE_MOVER)
+        pendientes = ((id_prod, nombre, id_cat, precio) for id_prod, id_cat, precio, nombre in filas
+                      if _fragmento_destino(estrategia, cantidad, id_prod, id_cat) != origen)
+        while True:
+            lote = list(itertools.islice(pendientes, TAM_LOTE_MOVER))
+            if not lote:
+                break
+            grupos = {}
+            for fila in lote:
+                grupos.setdefault(_fragmento_destino(estrategia, cantidad, fila[0], fila[2]), []).append(fila)
+            for destino, grupo in grupos.items():
+                with db.usando_base(rutas[destino]):
+                    db.copiar_productos_db(grupo)
+            if origen is None:
+                importados += len(lote)
+            else:
+                with db.usando_base(ruta):
+                    db.eliminar_productos_lote_db(fila[0] for fila in lote)
+                movidos += len(lote)
+                if progreso:
+                    progreso(movidos)
+
+    _escribir_manifiesto(carpeta, cantidad, estrategia)
+    sobrantes = [ruta for indice, ruta in existentes.items() if indice >= cantidad]
+    if sobrantes:
+        db.cerrar_conexiones()
+        for ruta in sobrantes:
+            for sufijo in ("", "-wal", "-shm"):
+                if os.path.exists(ruta + sufijo):
+                    os.remove(ruta + sufijo)
+    return {"fragmentos": cantidad, "estrategia": estrategia,
+            "movidos": movidos, "importados": importados}
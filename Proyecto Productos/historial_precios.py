@@ -0,0 +1,203 @@
+# historial_precios.py
+"""
+Historial de precios: valuación a una fecha, exportación columnar y retención. 📉
+
+Cada alta, cambio de precio o de categoría y baja de un producto agrega una
+fila a `historial_precios` (la completan los triggers de la migración 5),
+así que `modificar_producto_db` ya no pierde el precio anterior. Las
+consultas puntuales están en `database.py` (`historial_precio_db`,
+`precio_en_db`, `precios_en_db`); este módulo agrega lo que se arma sobre
+ellas:
+
+- `valor_catalogo`: cuánto valía cada categoría (o todo el catálogo) en una
+  fecha, con la categoría que tenía cada producto en ese momento.
+- `exportar_columnar` / `leer_columnar`: un formato compacto por columnas
+  para archivar o analizar el historial fuera de la base.
+- `aplicar_retencion`: acota el crecimiento reduciendo la resolución del
+  historial antiguo y, opcionalmente, descartando el más viejo.
+
+Formato columnar (`.hpc`): la cabecera `MAGIA` y luego grupos de hasta
+`FILAS_POR_GRUPO` filas. Cada grupo es la cantidad de filas (`<I`) seguida de
+las cuatro columnas `producto_id`, `momento` (en milisegundos), `precio` y
+`categoria_id`, cada una como su longitud (`<I`) y un bloque `zlib` de
+enteros de 64 bits. Las dos primeras se guardan como diferencias con la
+fila anterior: como las filas van ordenadas por producto y momento, casi
+todas son 0 o números chicos y se comprimen muy bien. En `precio` y
+`categoria_id` se guarda el valor más 1 (0 indica NULL, es decir, una baja).
+
+Uso:
+    import historial_precios
+    historial_precios.valor_catalogo(datetime(2026, 6, 30).timestamp())
+    historial_precios.exportar_columnar("precios.hpc")
+"""
+import struct
+import time
+import zlib
+from array import array
+from itertools import accumulate
+
+import database as db
+import modelos
+
+MAGIA = b"HPC1"
+FILAS_POR_GRUPO = 65536
+NIVEL_COMPRESION = 6
+
+# Política de retención por defecto: resolución completa durante
+# `DIAS_COMPLETOS`, luego un precio por producto cada `INTERVALO_REDUCIDO`
+# segundos. Sin límite de antigüedad salvo que se indique.
+DIAS_COMPLETOS = 90
+INTERVALO_REDUCIDO = 86400
+
+_CABECERA_GRUPO = struct.Struct("<I")
+
+def valor_catalogo(momento, categoria_id=None):
+    """
+    Calcula cuánto valía el catálogo en un momento, agrupado por categoría.
+
+    Cada producto cuenta en la categoría que tenía en `momento`, con el
+    precio de ese momento. Los nombres de las categorías son los actuales.
+
+    Args:
+        momento (float): El momento en segundos Unix.
+        categoria_id (int): Si se indica, solo esa categoría.
+
+    Retorna:
+        list: Diccionarios con las claves `categoria_id`, `categoria`,
+        `productos` y `valor` (la suma de los precios), ordenados por nombre
+        de categoría.
+    """
+    totales = {}
+    for _, _, precio, id_cat in db.precios_en_db(momento, categoria_id):
+        cantidad, valor = totales.get(id_cat, (0, 0))
+        totales[id_cat] = (cantidad + 1, valor + precio)
+    nombres = dict(db.obtener_categorias_db())
+    filas = [{"categoria_id": id_cat, "categoria": nombres.get(id_cat),
+              "productos": cantidad, "valor": valor}
+             for id_cat, (cantidad, valor) in totales.items()]
+    filas.sort(key=lambda fila: (fila["categoria"] is None, fila["categoria"] or ""))
+    return filas
+
+def _columna(valores):
+    """Comprime una columna de enteros de 64 bits."""
+    return zlib.compress(array("q", valores).tobytes(), NIVEL_COMPRESION)
+
+def _diferencias(valores):
+    """Retorna cada valor menos el anterior (el primero, menos 0)."""
+    anterior = 0
+    for valor in valores:
+        yield valor - anterior
+        anterior = valor
+
+def _escribir_grupo(archivo, filas):
+    """Escribe un grupo de filas `PrecioHistorico` en formato columnar; retorna los bytes escritos."""
+    ids, momentos, precios, categorias = zip(*filas)
+    columnas = (
+        _columna(_diferencias(ids)),
+        _columna(_diferencias(round(momento * 1000) for momento in momentos)),
+        _columna(0 if precio is None else precio + 1 for precio in precios),
+        _columna(0 if id_cat is None else id_cat + 1 for id_cat in categorias),
+    )
+    datos = _CABECERA_GRUPO.pack(len(filas)) + b"".join(
+        _CABECERA_GRUPO.pack(len(columna)) + columna for columna in columnas)
+    archivo.write(datos)
+    return len(datos)
+
+def exportar_columnar(ruta, desde=None, hasta=None):
+    """
+    Exporta el historial de precios al formato columnar comprimido.
+
+    Las filas se leen y se escriben por grupos, así que la memoria no
+    depende del tamaño del historial.
+
+    Args:
+        ruta (str): El archivo a crear (por convención, `.hpc`).
+        desde (float): Si se indica, solo filas desde ese momento (segundos Unix).
+        hasta (float): Si se indica, solo filas hasta ese momento, inclusive.
+
+    Retorna:
+        dict: Un resumen con las claves `filas`, `bytes`, `bytes_por_fila` y `segundos`.
+    """
+    inicio = time.perf_counter()
+    filas = 0
+    tamano = len(MAGIA)
+    grupo = []
+    with open(ruta, "wb") as archivo:
+        archivo.write(MAGIA)
+        for fila in db.iterar_historial_precios_db(desde, hasta):
+            grupo.append(fila)
+            if len(grupo) == FILAS_POR_GRUPO:
+                tamano += _escribir_grupo(archivo, grupo)
+                filas += len(grupo)
+                grupo = []
+        if grupo:
+            tamano += _escribir_grupo(archivo, grupo)
+            filas += len(grupo)
+    return {"filas": filas, "bytes": tamano,
+            "bytes_por_fila": round(tamano / filas, 2) if filas else 0.0,
+            "segundos": round(time.perf_counter() - inicio, 3)}
+
+def _leer_columna(archivo):
+    """Lee y descomprime una columna de un grupo."""
+    longitud, = _CABECERA_GRUPO.unpack(archivo.read(_CABECERA_GRUPO.size))
+    valores = array("q")
+    valores.frombytes(zlib.decompress(archivo.read(longitud)))
+    return valores
+
+def leer_columnar(ruta):
+    """
+    Recorre un archivo exportado con `exportar_columnar`.
+
+    Args:
+        ruta (str): El archivo a leer.
+
+    Retorna:
+        un generador de registros `modelos.PrecioHistorico`, en el orden del archivo.
+
+    Lanza:
+        ValueError: Si el archivo no tiene el formato esperado.
+    """
+    with open(ruta, "rb") as archivo:
+        if archivo.read(len(MAGIA)) != MAGIA:
+            raise ValueError(f"'{ruta}' no es un historial de precios exportado.")
+        while True:
+            cabecera = archivo.read(_CABECERA_GRUPO.size)
+            if not cabecera:
+                return
+            filas, = _CABECERA_GRUPO.unpack(cabecera)
+            ids, momentos, precios, categorias = (_leer_columna(archivo) for _ in range(4))
+            if not all(len(columna) == filas for columna in (ids, momentos, precios, categorias)):
+                raise ValueError(f"'{ruta}' está dañado: las columnas no tienen {filas} filas.")
+            for fila in zip(accumulate(ids), accumulate(momentos), precios, categorias):
+                id_prod, momento, precio, id_cat = fila
+                yield modelos.PrecioHistorico(id_prod, momento / 1000,
+                                              precio - 1 if precio else None,
+                                              id_cat - 1 if id_cat else None)
+
+def aplicar_retencion(dias_completos=DIAS_COMPLETOS, intervalo=INTERVALO_REDUCIDO,
+                      dias_maximos=None, ahora=None):
+    """
+    Acota el crecimiento del historial de precios.
+
+    Las filas de los últimos `dias_completos` días se conservan todas; en
+    las anteriores queda un precio por producto cada `intervalo` segundos
+    (el último de cada intervalo). Si se indica `dias_maximos`, además se
+    descarta lo anterior a esa antigüedad, conservando el precio vigente en
+    el límite. Las consultas a una fecha dentro del período conservado dan
+    el mismo resultado que antes.
+
+    Args:
+        dias_completos (float): Los días que se conservan con resolución completa.
+        intervalo (float): La resolución en segundos del historial más antiguo.
+        dias_maximos (float): La antigüedad máxima en días; None para no descartar.
+        ahora (float): El momento de referencia (por defecto, el actual).
+
+    Retorna:
+        dict: Las filas eliminadas, con las claves `reducidas` y `podadas`.
+    """
+    ahora = time.time() if ahora is None else ahora
+    reducidas = db.reducir_historial_precios_db(ahora - dias_completos * 86400, intervalo)
+    podadas = 0
+    if dias_maximos is not None:
+        podadas = db.podar_historial_precios_db(ahora - dias_maximos * 86400)
+    return {"reducidas": reducidas, "podadas": podadas}
@@ -0,0 +1,277 @@
+# instantanea.py
+"""
+Instantánea columnar del catálogo para reportes. 📈
+
+Carga los productos en memoria en formato de columnas, separados por
+categoría: cada categoría tiene un `array('q')` con los IDs, otro con los
+precios y una lista con los nombres (internados con `sys.intern`, de modo
+que los nombres repetidos comparten una sola cadena). Sobre esas columnas
+las agregaciones se resuelven con funciones implementadas en C (`sorted`,
+`bisect`, `heapq`) en lugar de recorrer tuplas en un bucle de Python. Cada
+categoría mantiene además la suma de sus precios y, una vez calculada, su
+columna de precios ordenada (de donde salen mínimo, máximo y percentiles),
+que solo se vuelve a calcular si la categoría cambia.
+
+La instantánea se mantiene al día sola:
+- Las escrituras de este proceso se reciben con `db.suscribir_cambios` y
+  solo se vuelven a leer los productos afectados.
+- Si escribió otro proceso (ver `db.version_externa`) o una operación pudo
+  afectar a cualquier producto, se recarga completa. Las escrituras de este
+  proceso confirmadas desde otro hilo, como las de `escritura_diferida`,
+  siguen siendo incrementales.
+
+Uso:
+    import instantanea
+    instantanea.resumen_por_categoria()
+    instantanea.histograma_precios(cubetas=10)
+"""
+import heapq
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+import database as db
+from modelos import Producto
+
+PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+_instantanea = None
+_lock = threading.Lock()
+
+# IDs modificados desde la última actualización; None si hay que recargar todo
+_pendientes = set()
+
+class _Particion:
+    """Columnas de los productos de una categoría."""
+
+    __slots__ = ("ids", "precios", "nombres", "posiciones", "total", "_ordenados")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.precios = array("q")
+        self.nombres = []
+        self.posiciones = {}
+        self.total = 0
+        self._ordenados = None
+
+    def agregar(self, id_prod, precio, nombre):
+        self.posiciones[id_prod] = len(self.ids)
+        self.ids.append(id_prod)
+        self.precios.append(precio)
+        self.nombres.append(sys.intern(nombre))
+        self.total += precio
+        self._ordenados = None
+
+    def quitar(self, id_prod):
+        # Se mueve la última fila al hueco para no desplazar las columnas
+        posicion = self.posiciones.pop(id_prod)
+        self.total -= self.precios[posicion]
+        ultima = len(self.ids) - 1
+        if posicion != ultima:
+            id_movido = self.ids[ultima]
+            self.ids[posicion] = id_movido
+            self.precios[posicion] = self.precios[ultima]
+            self.nombres[posicion] = self.nombres[ultima]
+            self.posiciones[id_movido] = posicion
+        del self.ids[ultima], self.precios[ultima], self.nombres[ultima]
+        self._ordenados = None
+
+    def precios_ordenados(self):
+        """Retorna los precios ordenados (se calcula una vez por cada cambio)."""
+        if self._ordenados is None:
+            self._ordenados = array("q", sorted(self.precios))
+        return self._ordenados
+
+class Instantanea:
+    """Productos del catálogo en columnas, agrupados por categoría."""
+
+    __slots__ = ("particiones", "categorias", "clave", "_ordenados")
+
+    def __init__(self, clave):
+        self.particiones = {}
+        self.categorias = {}
+        self.clave = clave
+        self._ordenados = None
+
+    def cargar(self, filas):
+        """Agrega filas `(id, categoria_id, precio, nombre)` a la instantánea."""
+        particiones = self.particiones
+        for id_prod, id_cat, precio, nombre in filas:
+            particion = particiones.get(id_cat)
+            if particion is None:
+                particion = particiones[id_cat] = _Particion()
+            particion.agregar(id_prod, precio, nombre)
+        self._ordenados = None
+
+    def actualizar(self, ids):
+        """Vuelve a leer de la base los productos indicados."""
+        for id_prod in ids:
+            for particion in self.particiones.values():
+                if id_prod in particion.posiciones:
+                    particion.quitar(id_prod)
+                    break
+        self.cargar(db.iterar_columnas_productos_db(ids))
+
+    def cantidad(self):
+        return sum(len(particion.ids) for particion in self.particiones.values())
+
+    def precios_ordenados(self, categoria_id=None):
+        """Precios ordenados de una categoría, o de todo el catálogo con None."""
+        if categoria_id is not None:
+            particion = self.particiones.get(categoria_id)
+            return particion.precios_ordenados() if particion else array("q")
+        if self._ordenados is None:
+            self._ordenados = array("q", sorted(chain.from_iterable(
+                particion.precios for particion in self.particiones.values())))
+        return self._ordenados
+
+def _al_cambiar(ids):
+    """Observador de `database`: acumula los IDs que hay que volver a leer."""
+    global _pendientes
+    with _lock:
+        if ids is None or _pendientes is None:
+            _pendientes = None
+        else:
+            _pendientes.update(ids)
+
+def obtener_instantanea():
+    """
+    Retorna la instantánea del catálogo, cargándola o actualizándola si hace falta.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        Instantanea: La instantánea al día con la base de datos.
+    """
+    global _instantanea, _pendientes
+    db.suscribir_cambios(_al_cambiar)
+    clave = (db.DB_NAME, db.version_externa())
+    with _lock:
+        pendientes, _pendientes = _pendientes, set()
+    if _instantanea is None or _instantanea.clave != clave or pendientes is None:
+        nueva = Instantanea(clave)
+        nueva.cargar(db.iterar_columnas_productos_db())
+        _instantanea = nueva
+    elif pendientes:
+        _instantanea.actualizar(pendientes)
+    _instantanea.categorias = dict(db.obtener_categorias_db())
+    return _instantanea
+
+def descartar_instantanea():
+    """
+    Libera la instantánea y deja de seguir los cambios de la base.
+
+    La función no devuelve ningún valor.
+    """
+    global _instantanea, _pendientes
+    db.cancelar_suscripcion_cambios(_al_cambiar)
+    with _lock:
+        _instantanea = None
+        _pendientes = set()
+
+def _percentil(valores_ordenados, p):
+    """Percentil `p` (0-100) por interpolación lineal sobre valores ya ordenados."""
+    if not valores_ordenados:
+        return None
+    posicion = (len(valores_ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(valores_ordenados) - 1)
+    fraccion = posicion - inferior
+    return valores_ordenados[inferior] * (1 - fraccion) + valores_ordenados[superior] * fraccion
+
+def resumen_por_categoria():
+    """
+    Calcula cantidad, total, promedio, mínimo, máximo y mediana de precios por categoría.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        una lista de tuplas `(categoria, cantidad, total, promedio, minimo,
+        maximo, mediana)` ordenada por nombre de categoría. Las categorías sin
+        productos tienen cantidad y total 0 y None en el resto.
+    """
+    inst = obtener_instantanea()
+    resumen = []
+    for id_cat, nombre in sorted(inst.categorias.items(), key=lambda par: par[1]):
+        particion = inst.particiones.get(id_cat)
+        if not particion or not particion.ids:
+            resumen.append((nombre, 0, 0, None, None, None, None))
+            continue
+        ordenados = particion.precios_ordenados()
+        cantidad = len(ordenados)
+        resumen.append((nombre, cantidad, particion.total, particion.total / cantidad,
+                        ordenados[0], ordenados[-1], _percentil(ordenados, 50)))
+    return resumen
+
+def percentiles_precio(categoria_id=None, percentiles=PERCENTILES):
+    """
+    Calcula percentiles del precio.
+
+    Args:
+        categoria_id (int): Si se indica, solo los productos de esa categoría.
+        percentiles: Los percentiles a calcular (0-100).
+
+    Retorna:
+        dict: Percentil -> precio (None si no hay productos).
+    """
+    ordenados = obtener_instantanea().precios_ordenados(categoria_id)
+    return {p: _percentil(ordenados, p) for p in percentiles}
+
+def histograma_precios(categoria_id=None, cubetas=10):
+    """
+    Reparte los precios en intervalos de igual ancho entre el mínimo y el máximo.
+
+    Cada intervalo se cuenta con dos búsquedas binarias sobre los precios
+    ordenados, sin recorrer los productos.
+
+    Args:
+        categoria_id (int): Si se indica, solo los productos de esa categoría.
+        cubetas (int): La cantidad de intervalos.
+
+    Retorna:
+        una lista de tuplas `(desde, hasta, cantidad)`; el último intervalo
+        incluye su límite superior. Vacía si no hay productos.
+    """
+    ordenados = obtener_instantanea().precios_ordenados(categoria_id)
+    if not ordenados:
+        return []
+    minimo, maximo = ordenados[0], ordenados[-1]
+    ancho = max((maximo - minimo) / cubetas, 1)
+    histograma = []
+    for i in range(cubetas):
+        desde = minimo + ancho * i
+        hasta = minimo + ancho * (i + 1)
+        ultima = i == cubetas - 1 or hasta > maximo
+        fin = bisect_right(ordenados, maximo) if ultima else bisect_left(ordenados, hasta)
+        histograma.append((round(desde), round(min(hasta, maximo)), fin - bisect_left(ordenados, desde)))
+        if ultima:
+            break
+    return histograma
+
+def productos_mas_caros(cantidad=10, categoria_id=None):
+    """
+    Retorna los productos de mayor precio.
+
+    Args:
+        cantidad (int): La cantidad de productos a retornar.
+        categoria_id (int): Si se indica, solo los productos de esa categoría.
+
+    Retorna:
+        una lista de registros `modelos.Producto`, del más caro al más barato.
+    """
+    inst = obtener_instantanea()
+    candidatos = []
+    for id_cat, particion in inst.particiones.items():
+        if categoria_id is not None and id_cat != categoria_id:
+            continue
+        categoria = inst.categorias.get(id_cat, "")
+        for precio, id_prod, nombre in heapq.nlargest(
+                cantidad, zip(particion.precios, particion.ids, particion.nombres)):
+            candidatos.append((precio, id_prod, nombre, categoria))
+    candidatos.sort(reverse=True)
+    return [Producto(id_prod, nombre, categoria, precio)
+            for precio, id_prod, nombre, categoria in candidatos[:cantidad]]
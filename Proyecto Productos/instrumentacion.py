@@ -0,0 +1,359 @@
+# instrumentacion.py
+"""
+Módulo de instrumentación de la capa de datos. 📊
+
+Mide dónde se va el tiempo dentro de `database.py`:
+
+- Por función `*_db`: cantidad de llamadas e histograma de duración.
+- Por sentencia SQL: histograma de duración de `execute`/`executemany` y
+  filas devueltas (contadas a medida que el código las lee del cursor).
+- Confirmaciones (`COMMIT`): histograma de latencia.
+- Registro de consultas lentas: las sentencias que superan un umbral
+  configurable se guardan con sus parámetros, la función que las ejecutó y
+  la salida de `EXPLAIN QUERY PLAN`.
+
+Las conexiones de `database.py` se crean siempre con `ConexionInstrumentada`,
+pero mientras la instrumentación está desactivada (el estado por defecto)
+solo agrega una comprobación de un booleano por sentencia. Se activa con
+`activar()`, desde el menú oculto de diagnóstico (opción `D` del menú
+principal) o iniciando `main.py` con la variable de entorno
+`PRODUCTOS_INSTRUMENTACION=1`.
+"""
+import functools
+import os
+import sqlite3
+import threading
+import time
+import types
+from collections import deque
+from datetime import datetime
+
+# Límites superiores (en milisegundos) de las cubetas de los histogramas
+LIMITES_MS = (0.05, 0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+UMBRAL_LENTA_MS = float(os.environ.get("PRODUCTOS_UMBRAL_LENTA_MS", 50))
+MAX_CONSULTAS_LENTAS = 100
+
+_activa = False
+_lock = threading.Lock()
+_local = threading.local()
+_funciones = {}
+_sentencias = {}
+_confirmaciones = None
+_consultas_lentas = deque(maxlen=MAX_CONSULTAS_LENTAS)
+_originales = {}
+
+class Histograma:
+    """Acumula la cantidad, el total, el máximo y la distribución de duraciones."""
+
+    __slots__ = ("cantidad", "total_ms", "maximo_ms", "filas", "cubetas")
+
+    def __init__(self):
+        self.cantidad = 0
+        self.total_ms = 0.0
+        self.maximo_ms = 0.0
+        self.filas = 0
+        self.cubetas = [0] * (len(LIMITES_MS) + 1)
+
+    def registrar(self, ms):
+        self.cantidad += 1
+        self.total_ms += ms
+        if ms > self.maximo_ms:
+            self.maximo_ms = ms
+        for i, limite in enumerate(LIMITES_MS):
+            if ms <= limite:
+                self.cubetas[i] += 1
+                return
+        self.cubetas[-1] += 1
+
+    def como_dict(self):
+        etiquetas = [f"<={limite}ms" for limite in LIMITES_MS] + [f">{LIMITES_MS[-1]}ms"]
+        return {
+            "cantidad": self.cantidad,
+            "total_ms": round(self.total_ms, 3),
+            "media_ms": round(self.total_ms / self.cantidad, 4) if self.cantidad else 0.0,
+            "maximo_ms": round(self.maximo_ms, 3),
+            "filas": self.filas,
+            "histograma": {e: n for e, n in zip(etiquetas, self.cubetas) if n},
+        }
+
+def _normalizar_sql(sql):
+    """Colapsa los espacios de una sentencia para agrupar sus estadísticas."""
+    return " ".join(sql.split())
+
+def _funcion_actual():
+    """Retorna la función `*_db` que se está ejecutando en este hilo, si hay una."""
+    pila = getattr(_local, "funciones", None)
+    return pila[-1] if pila else None
+
+def _registrar_sentencia(conn, sql, parametros, ms, es_lote=False):
+    """Suma una ejecución a las estadísticas de la sentencia y la anota si fue lenta."""
+    clave = _normalizar_sql(sql)
+    with _lock:
+        estadistica = _sentencias.get(clave)
+        if estadistica is None:
+            estadistica = _sentencias[clave] = Histograma()
+        estadistica.registrar(ms)
+    if ms >= UMBRAL_LENTA_MS:
+        _consultas_lentas.append({
+            "momento": datetime.now().isoformat(timespec="seconds"),
+            "ms": round(ms, 3),
+            "funcion": _funcion_actual(),
+            "sql": clave,
+            "parametros": None if es_lote else repr(parametros)[:200],
+            "plan": [] if es_lote else _plan(conn, sql, parametros),
+        })
+    return estadistica
+
+def _plan(conn, sql, parametros):
+    """Obtiene `EXPLAIN QUERY PLAN` de una sentencia sin pasar por la instrumentación."""
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")):
+        return []
+    try:
+        filas = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, parametros)
+        return [fila[3] for fila in filas]
+    except sqlite3.Error:
+        return []
+
+class _CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que mide cada ejecución y cuenta las filas que se leen de él."""
+
+    _estadistica = None
+
+    def execute(self, sql, parametros=()):
+        inicio = time.perf_counter()
+        super().execute(sql, parametros)
+        ms = (time.perf_counter() - inicio) * 1000
+        self._estadistica = _registrar_sentencia(self.connection, sql, parametros, ms)
+        return self
+
+    def executemany(self, sql, filas):
+        inicio = time.perf_counter()
+        super().executemany(sql, filas)
+        ms = (time.perf_counter() - inicio) * 1000
+        self._estadistica = _registrar_sentencia(self.connection, sql, None, ms, es_lote=True)
+        return self
+
+    def _contar(self, cantidad):
+        if self._estadistica is not None:
+            self._estadistica.filas += cantidad
+
+    def fetchone(self):
+        fila = super().fetchone()
+        if fila is not None:
+            self._contar(1)
+        return fila
+
+    def fetchmany(self, *args, **kwargs):
+        filas = super().fetchmany(*args, **kwargs)
+        self._contar(len(filas))
+        return filas
+
+    def fetchall(self):
+        filas = super().fetchall()
+        self._contar(len(filas))
+        return filas
+
+    def __next__(self):
+        fila = super().__next__()
+        self._contar(1)
+        return fila
+
+class ConexionInstrumentada(sqlite3.Connection):
+    """
+    Conexión de SQLite que, con la instrumentación activa, mide sus sentencias
+    y sus confirmaciones. Desactivada, se comporta como `sqlite3.Connection`.
+    """
+
+    def execute(self, sql, parametros=()):
+        if not _activa:
+            return super().execute(sql, parametros)
+        return self.cursor(_CursorInstrumentado).execute(sql, parametros)
+
+    def executemany(self, sql, filas):
+        if not _activa:
+            return super().executemany(sql, filas)
+        return self.cursor(_CursorInstrumentado).executemany(sql, filas)
+
+    def commit(self):
+        if not _activa:
+            return super().commit()
+        global _confirmaciones
+        inicio = time.perf_counter()
+        super().commit()
+        ms = (time.perf_counter() - inicio) * 1000
+        with _lock:
+            if _confirmaciones is None:
+                _confirmaciones = Histograma()
+            _confirmaciones.registrar(ms)
+
+def _filas_de(resultado):
+    """Cuenta las filas de un resultado: una lista o tupla de registros, o una
+    página `(filas, hay_mas)`. Un registro suelto cuenta como 0."""
+    if type(resultado) is tuple and resultado and type(resultado[0]) in (list, tuple):
+        resultado = resultado[0]
+    return len(resultado) if type(resultado) in (list, tuple) else 0
+
+def _envolver(nombre, funcion):
+    """Retorna una versión de `funcion` que registra su duración bajo `nombre`."""
+    def registrar(inicio, filas):
+        ms = (time.perf_counter() - inicio) * 1000
+        # Se quita la última aparición (un generador puede terminar después
+        # de que empezaran otras funciones)
+        pila = _local.funciones
+        for i in range(len(pila) - 1, -1, -1):
+            if pila[i] == nombre:
+                del pila[i]
+                break
+        with _lock:
+            estadistica = _funciones.get(nombre)
+            if estadistica is None:
+                estadistica = _funciones[nombre] = Histograma()
+            estadistica.registrar(ms)
+            estadistica.filas += filas
+
+    def entrar():
+        if not hasattr(_local, "funciones"):
+            _local.funciones = []
+        _local.funciones.append(nombre)
+        return time.perf_counter()
+
+    def recorrer(inicio, filas_o_bloques):
+        # Los bloques (listas) cuentan por la cantidad de filas que traen
+        filas = 0
+        try:
+            for elemento in filas_o_bloques:
+                filas += len(elemento) if isinstance(elemento, list) else 1
+                yield elemento
+        finally:
+            registrar(inicio, filas)
+
+    import inspect
+    if inspect.isgeneratorfunction(funcion):
+        # En los generadores se mide el recorrido completo, no solo su creación
+        @functools.wraps(funcion)
+        def envoltura_generador(*args, **kwargs):
+            yield from recorrer(entrar(), funcion(*args, **kwargs))
+        return envoltura_generador
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        inicio = entrar()
+        try:
+            resultado = funcion(*args, **kwargs)
+        except BaseException:
+            registrar(inicio, 0)
+            raise
+        if isinstance(resultado, types.GeneratorType):
+            # Ejecuta la consulta y retorna un generador (`iterar_*_db`): se
+            # mide hasta que termina el recorrido
+            return recorrer(inicio, resultado)
+        registrar(inicio, _filas_de(resultado))
+        return resultado
+    return envoltura
+
+def activar_si_configurado():
+    """
+    Activa la instrumentación si la variable de entorno
+    `PRODUCTOS_INSTRUMENTACION` vale `1`.
+
+    La función no devuelve ningún valor.
+    """
+    if os.environ.get("PRODUCTOS_INSTRUMENTACION") == "1":
+        activar()
+
+def esta_activa():
+    """
+    Indica si la instrumentación está activa.
+
+    Retorna:
+        bool: True si se están registrando estadísticas.
+    """
+    return _activa
+
+def activar(umbral_lenta_ms=None):
+    """
+    Activa la instrumentación y envuelve las funciones públicas de `database`.
+
+    Args:
+        umbral_lenta_ms (float): Si se indica, reemplaza el umbral a partir del
+            cual una sentencia se guarda en el registro de consultas lentas.
+
+    La función no devuelve ningún valor.
+    """
+    global _activa, UMBRAL_LENTA_MS
+    # `inspect` es lento de importar y solo se necesita al activar
+    import inspect
+    import database
+    if umbral_lenta_ms is not None:
+        UMBRAL_LENTA_MS = umbral_lenta_ms
+    if not _activa:
+        for nombre, funcion in inspect.getmembers(database, inspect.isfunction):
+            if nombre.endswith("_db") and funcion.__module__ == database.__name__:
+                _originales[nombre] = funcion
+                setattr(database, nombre, _envolver(nombre, funcion))
+    _activa = True
+
+def desactivar():
+    """
+    Desactiva la instrumentación y restaura las funciones originales.
+    Las estadísticas acumuladas se conservan hasta llamar a `reiniciar()`.
+
+    La función no devuelve ningún valor.
+    """
+    global _activa
+    import database
+    for nombre, funcion in _originales.items():
+        setattr(database, nombre, funcion)
+    _originales.clear()
+    _activa = False
+
+def reiniciar():
+    """
+    Borra todas las estadísticas y el registro de consultas lentas.
+
+    La función no devuelve ningún valor.
+    """
+    global _confirmaciones
+    with _lock:
+        _funciones.clear()
+        _sentencias.clear()
+        _consultas_lentas.clear()
+        _confirmaciones = None
+
+def estadisticas():
+    """
+    Retorna una copia de todas las estadísticas recolectadas.
+
+    Retorna:
+        dict: Con las claves `activa`, `umbral_lenta_ms`, `funciones`,
+        `sentencias`, `confirmaciones` y `consultas_lentas`. Funciones y
+        sentencias vienen ordenadas por tiempo total, de mayor a menor.
+    """
+    def ordenar(tabla):
+        return dict(sorted(((k, v.como_dict()) for k, v in tabla.items()),
+                           key=lambda par: par[1]["total_ms"], reverse=True))
+
+    with _lock:
+        return {
+            "activa": _activa,
+            "umbral_lenta_ms": UMBRAL_LENTA_MS,
+            "funciones": ordenar(_funciones),
+            "sentencias": ordenar(_sentencias),
+            "confirmaciones": _confirmaciones.como_dict() if _confirmaciones else None,
+            "consultas_lentas": list(_consultas_lentas),
+        }
+
+def volcar_json(ruta):
+    """
+    Guarda las estadísticas en un archivo JSON.
+
+    Args:
+        ruta (str): El archivo de destino.
+
+    La función no devuelve ningún valor.
+    """
+    import json
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(estadisticas(), archivo, indent=2, ensure_ascii=False)
+
@@ -9,17 +9,22 @@ Este script actúa como el orquestador central del sistema. Es responsable de:
 - Delegar las acciones del usuario a los módulos especializados (`productos`, `categorias`).
 
 Dependencias:
-- colorama: Para dar formato de color a la salida en la consola.
 - database: Módulo de bajo nivel para la interacción con la base de datos.
-- ui: Módulo para todos los elementos de la interfaz de usuario (menús, mensajes).
+- ui: Módulo para todos los elementos de la interfaz de usuario (menús, mensajes),
+  que carga `colorama` recién al escribir el primer texto con color.
 - productos: Módulo de lógica de negocio para la gestión de productos.
 - categorias: Módulo de lógica de negocio para la gestión de categorías.
+- reportes: Módulo de reportes sobre la instantánea columnar del catálogo.
+- menu_respaldos: Menú de respaldo y restauración en línea de la base (`respaldo.py`).
+- diagnostico / instrumentacion: Menú oculto (opción `D`) con estadísticas de rendimiento.
+
+Para que el primer menú aparezca cuanto antes, los módulos de cada opción
+se importan recién cuando el usuario la elige (`python benchmark.py arranque`
+mide el tiempo de arranque).
 """
-from colorama import init
 import database as db
+import instrumentacion
 import ui
-import productos
-import categorias
 
 def main():
     """
@@ -29,32 +34,51 @@ def main():
     bucle infinito que presenta el menú principal. Antes de mostrar el menú,
     verifica si existe al menos una categoría en el sistema; si no es así,
     fuerza al usuario a crear una para garantizar la integridad de los datos
-    al añadir productos.
-    
+    al añadir productos. Al salir (normalmente o por una excepción) cierra
+    las conexiones persistentes a la base de datos.
+
     No recibe argumentos ni devuelve ningún valor.
     """
-    init(autoreset=True)
+    ui.preparar_consola()
+    instrumentacion.activar_si_configurado()
     db.inicializar_db()
 
-    while True:
-        if db.contar_categorias_db() == 0:
-            ui.mostrar_mensaje_error("¡ATENCIÓN! No hay categorías en el sistema.")
-            ui.mostrar_mensaje_info(" Se necesita crear al menos UNA categoría para poder avanzar.")
-            categorias.gestionar_categorias()
-            continue
-
-        ui.mostrar_menu_principal()
-        opcion = ui.obtener_input(" Seleccione una opción: ")
-
-        if opcion == '1':
-            productos.gestionar_productos()
-        elif opcion == '2':
-            categorias.gestionar_categorias()
-        elif opcion == '3':
-            ui.mostrar_mensaje_exito("Saliendo del programa. ¡Gracias!")
-            break
-        else:
-            ui.mostrar_mensaje_error("Opción inválida.")
+    try:
+        while True:
+            if db.contar_categorias_db() == 0:
+                import categorias
+                ui.mostrar_mensaje_error("¡ATENCIÓN! No hay categorías en el sistema.")
+                ui.mostrar_mensaje_info(" Se necesita crear al menos UNA categoría para poder avanzar.")
+                categorias.gestionar_categorias()
+                continue
+
+            ui.mostrar_menu_principal()
+            opcion = ui.obtener_input(" Seleccione una opción: ")
+
+            if opcion == '1':
+                import productos
+                productos.gestionar_productos()
+            elif opcion == '2':
+                import categorias
+                categorias.gestionar_categorias()
+            elif opcion == '3':
+                import reportes
+                reportes.gestionar_reportes()
+            elif opcion == '4':
+                import menu_respaldos
+                menu_respaldos.gestionar_respaldos()
+            elif opcion == '5':
+                ui.mostrar_mensaje_exito("Saliendo del programa. ¡Gracias!")
+                break
+            elif opcion.upper() == 'D':
+                # Opción oculta: no se muestra en el menú principal
+                import diagnostico
+                diagnostico.gestionar_diagnostico()
+            else:
+                ui.mostrar_mensaje_error("Opción inválida.")
+    finally:
+        # Cierre ordenado de las conexiones persistentes, incluso ante Ctrl+C
+        db.cerrar_conexiones()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,106 @@
+# menu_respaldos.py
+"""
+Módulo de gestión de respaldos. 💾
+
+Controlador del menú "Respaldos": crear un respaldo en línea de la base,
+verificar uno existente y restaurarlo. El trabajo lo hace `respaldo.py`;
+aquí solo se piden los archivos y se muestran los resultados. Los
+respaldos se guardan por defecto comprimidos en `CARPETA_RESPALDOS`.
+"""
+import os
+import sqlite3
+from datetime import datetime
+
+import respaldo
+import ui
+
+CARPETA_RESPALDOS = "respaldos"
+
+def _nombre_por_defecto(prefijo="productos"):
+    """Arma la ruta de un respaldo nuevo con la fecha y hora actuales."""
+    momento = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(CARPETA_RESPALDOS, f"{prefijo}-{momento}.db{respaldo.EXTENSION_COMPRIMIDA}")
+
+def _respaldos_existentes():
+    """Retorna las rutas de los respaldos de `CARPETA_RESPALDOS`, el más reciente primero."""
+    if not os.path.isdir(CARPETA_RESPALDOS):
+        return []
+    rutas = [os.path.join(CARPETA_RESPALDOS, nombre) for nombre in os.listdir(CARPETA_RESPALDOS)
+             if nombre.endswith((".db", ".db" + respaldo.EXTENSION_COMPRIMIDA))]
+    return sorted(rutas, key=os.path.getmtime, reverse=True)
+
+def _elegir_respaldo():
+    """Muestra los respaldos numerados y pide uno (por número o por ruta).
+    Retorna la ruta elegida, o None si el usuario cancela con Enter."""
+    rutas = _respaldos_existentes()
+    if rutas:
+        ui.mostrar_lista_seleccion([(ruta, os.path.basename(ruta)) for ruta in rutas])
+    else:
+        ui.mostrar_mensaje_info(f"No hay respaldos en la carpeta '{CARPETA_RESPALDOS}'.")
+    texto = ui.obtener_input("Número o ruta del respaldo (Enter para cancelar): ")
+    if texto.isdigit() and 1 <= int(texto) <= len(rutas):
+        return rutas[int(texto) - 1]
+    return texto or None
+
+def crear_un_respaldo():
+    """Pide el destino y crea un respaldo de la base sin detener el programa.
+    No recibe argumentos ni devuelve ningún valor."""
+    por_defecto = _nombre_por_defecto()
+    destino = ui.obtener_input(f"Archivo de destino (.gz para comprimir) [{por_defecto}]: ")
+    try:
+        ui.mostrar_resumen_respaldo(respaldo.crear_respaldo(destino or por_defecto))
+    except (OSError, sqlite3.Error) as error:
+        ui.mostrar_mensaje_error(f"No se pudo crear el respaldo: {error}")
+
+def verificar_un_respaldo():
+    """Pide un respaldo y muestra si está sano.
+    No recibe argumentos ni devuelve ningún valor."""
+    ruta = _elegir_respaldo()
+    if ruta is None:
+        return
+    try:
+        ui.mostrar_verificacion_respaldo(ruta, respaldo.verificar_respaldo(ruta))
+    except (OSError, ValueError) as error:
+        ui.mostrar_mensaje_error(str(error))
+
+def restaurar_un_respaldo():
+    """Pide un respaldo y, tras confirmar, reemplaza la base actual por él.
+    Antes se guarda un respaldo de la base actual, por si hay que volver atrás.
+    No recibe argumentos ni devuelve ningún valor."""
+    ruta = _elegir_respaldo()
+    if ruta is None:
+        return
+    if ui.obtener_input("Se reemplazarán todos los datos actuales. ¿Confirma? (S/N): ").upper() != 'S':
+        ui.mostrar_mensaje_info("Restauración cancelada.")
+        return
+    try:
+        verificacion = respaldo.verificar_respaldo(ruta)
+        if not verificacion["ok"]:
+            ui.mostrar_verificacion_respaldo(ruta, verificacion)
+            return
+        previo = respaldo.crear_respaldo(_nombre_por_defecto("antes-de-restaurar"))
+        ui.mostrar_mensaje_info(f"La base anterior quedó guardada en '{previo['destino']}'.")
+        resultado = respaldo.restaurar_respaldo(ruta)
+    except (OSError, ValueError, RuntimeError, sqlite3.Error) as error:
+        ui.mostrar_mensaje_error(f"No se pudo restaurar el respaldo: {error}")
+        return
+    ui.mostrar_mensaje_exito(f"Base restaurada desde '{ruta}' ({ui.formatear_cantidad(resultado['productos'])} productos, "
+                             f"{resultado['segundos']:.2f} s).")
+
+def gestionar_respaldos():
+    """Bucle del menú de respaldos.
+    No recibe argumentos ni devuelve ningún valor."""
+    while True:
+        ui.mostrar_menu_respaldos()
+        opcion = ui.obtener_input("Seleccione una opción: ")
+
+        if opcion == '1':
+            crear_un_respaldo()
+        elif opcion == '2':
+            verificar_un_respaldo()
+        elif opcion == '3':
+            restaurar_un_respaldo()
+        elif opcion == '4':
+            break
+        else:
+            ui.mostrar_mensaje_error("Opción inválida.")
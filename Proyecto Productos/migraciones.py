@@ -0,0 +1,232 @@
+# migraciones.py
+"""
+Módulo de migraciones del esquema de la base de datos. 🧱
+
+Cada migración es una función que recibe la conexión y lleva el esquema de
+una versión a la siguiente. La versión aplicada se guarda en el propio
+archivo con `PRAGMA user_version`, de modo que una base existente se
+actualiza en el lugar al iniciar el programa y una base al día no ejecuta
+ninguna sentencia de esquema.
+
+Para cambiar el esquema se agrega una función nueva al final de
+`MIGRACIONES`; nunca se modifican las ya publicadas.
+"""
+import busqueda
+
+def _crear_tablas(conn):
+    """Versión 1: tablas `categorias` y `productos`."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS categorias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL UNIQUE
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS productos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            categoria_id INTEGER NOT NULL,
+            precio INTEGER NOT NULL,
+            FOREIGN KEY (categoria_id) REFERENCES categorias (id) ON DELETE RESTRICT
+        )
+    """)
+
+def _crear_indices(conn):
+    """
+    Versión 2: índices de `productos`.
+
+    - `idx_productos_categoria` resuelve el conteo por categoría y la
+      verificación `ON DELETE RESTRICT` al eliminar una categoría.
+    - `idx_productos_nombre` entrega los productos ya ordenados por
+      `(nombre, id)` e incluye `categoria_id` y `precio`, por lo que el
+      listado se responde sin leer la tabla ni ordenar en un B-tree temporal.
+    """
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_productos_categoria
+        ON productos (categoria_id)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_productos_nombre
+        ON productos (nombre, id, categoria_id, precio)
+    """)
+
+def _crear_indice_busqueda(conn):
+    """Versión 3: índice de texto completo de `busqueda.py` (si hay FTS5)."""
+    busqueda.preparar_indice(conn, None)
+
+def _crear_diario(conn):
+    """
+    Versión 4: diario de cambios de `productos`.
+
+    - `diario_lotes` registra cada operación (quién la originó y cuándo); las
+      funciones de escritura de `database.py` agregan una fila al comenzar.
+    - `diario_cambios` guarda, por cada fila afectada, su imagen anterior y
+      posterior en JSON (NULL en un alta o una baja). La completan los
+      triggers, así que ninguna escritura queda fuera, sin importar si
+      modifica un producto o miles. Cada cambio se asocia al último lote
+      registrado.
+
+    Ambas tablas solo reciben inserciones: deshacer una operación agrega un
+    lote nuevo con las imágenes anteriores en lugar de borrar la original.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS diario_lotes (
+            lote INTEGER PRIMARY KEY AUTOINCREMENT,
+            momento REAL NOT NULL,
+            origen TEXT NOT NULL,
+            revierte INTEGER,
+            descripcion TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_diario_lotes_momento
+        ON diario_lotes (momento)
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS diario_cambios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lote INTEGER NOT NULL,
+            operacion TEXT NOT NULL,
+            producto_id INTEGER NOT NULL,
+            antes TEXT,
+            despues TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_diario_cambios_lote
+        ON diario_cambios (lote)
+    """)
+    lote = "(SELECT COALESCE(MAX(lote), 0) FROM diario_lotes)"
+    imagen = ("json_object('nombre', {0}.nombre, 'categoria_id', {0}.categoria_id,"
+              " 'precio', {0}.precio)")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS diario_productos_ai AFTER INSERT ON productos BEGIN
+            INSERT INTO diario_cambios (lote, operacion, producto_id, antes, despues)
+            VALUES ({lote}, 'alta', new.id, NULL, {imagen.format('new')});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS diario_productos_au AFTER UPDATE ON productos
+        WHEN old.nombre IS NOT new.nombre OR old.categoria_id IS NOT new.categoria_id
+          OR old.precio IS NOT new.precio BEGIN
+            INSERT INTO diario_cambios (lote, operacion, producto_id, antes, despues)
+            VALUES ({lote}, 'modificacion', new.id, {imagen.format('old')}, {imagen.format('new')});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS diario_productos_ad AFTER DELETE ON productos BEGIN
+            INSERT INTO diario_cambios (lote, operacion, producto_id, antes, despues)
+            VALUES ({lote}, 'baja', old.id, {imagen.format('old')}, NULL);
+        END
+    """)
+
+def _crear_historial_precios(conn):
+    """
+    Versión 5: historial de precios de `productos`.
+
+    `historial_precios` recibe una fila por cada alta, cambio de precio o de
+    categoría y baja de un producto (en una baja, `precio` y `categoria_id`
+    son NULL). Como el diario, la completan los triggers y solo recibe
+    inserciones; lo único que la achica es la retención de
+    `historial_precios.py`.
+
+    La tabla es `WITHOUT ROWID` con clave `(producto_id, momento)`: las filas
+    de cada producto quedan contiguas y ordenadas en el archivo, así que el
+    precio a una fecha es una sola búsqueda en la clave y el catálogo a una
+    fecha es un único recorrido en orden. `idx_historial_precios_momento`
+    resuelve la retención por antigüedad. Si un producto cambia dos veces en
+    el mismo milisegundo, queda solo el último valor.
+
+    Los productos existentes arrancan con su precio actual.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS historial_precios (
+            producto_id INTEGER NOT NULL,
+            momento REAL NOT NULL,
+            precio INTEGER,
+            categoria_id INTEGER,
+            PRIMARY KEY (producto_id, momento)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_historial_precios_momento
+        ON historial_precios (momento)
+    """)
+    # Segundos Unix con milisegundos (`unixepoch('subsec')` requiere SQLite 3.42)
+    ahora = "(julianday('now') - 2440587.5) * 86400.0"
+    registrar = "INSERT OR REPLACE INTO historial_precios (producto_id, momento, precio, categoria_id)"
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS historial_precios_ai AFTER INSERT ON productos BEGIN
+            {registrar} VALUES (new.id, {ahora}, new.precio, new.categoria_id);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS historial_precios_au
+        AFTER UPDATE OF precio, categoria_id ON productos
+        WHEN old.precio IS NOT new.precio OR old.categoria_id IS NOT new.categoria_id BEGIN
+            {registrar} VALUES (new.id, {ahora}, new.precio, new.categoria_id);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS historial_precios_ad AFTER DELETE ON productos BEGIN
+            {registrar} VALUES (old.id, {ahora}, NULL, NULL);
+        END
+    """)
+    conn.execute(f"""
+        {registrar} SELECT id, {ahora}, precio, categoria_id FROM productos
+    """)
+
+MIGRACIONES = [
+    _crear_tablas,
+    _crear_indices,
+    _crear_indice_busqueda,
+    _crear_diario,
+    _crear_historial_precios,
+]
+
+VERSION_ACTUAL = len(MIGRACIONES)
+
+def version_esquema(conn):
+    """
+    Retorna la versión del esquema registrada en la base.
+
+    Args:
+        conn (sqlite3.Connection): Una conexión abierta.
+
+    Retorna:
+        int: El valor de `PRAGMA user_version` (0 en una base nueva).
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def aplicar_migraciones(conn):
+    """
+    Aplica en orden las migraciones pendientes.
+
+    Cada migración se ejecuta en su propia transacción junto con la
+    actualización de `user_version`, así que una falla deja la base en la
+    última versión completa. La transacción toma el bloqueo de escritura al
+    comenzar y vuelve a leer la versión, de modo que si varios procesos
+    inician a la vez cada migración se aplica una sola vez.
+
+    Args:
+        conn (sqlite3.Connection): Una conexión abierta sin transacción en curso.
+
+    Retorna:
+        list: Los números de versión aplicados (vacía si la base ya estaba al día).
+    """
+    aplicadas = []
+    for version in range(version_esquema(conn) + 1, VERSION_ACTUAL + 1):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version_esquema(conn) >= version:
+                # Otro proceso la aplicó mientras esperábamos el bloqueo
+                conn.rollback()
+                continue
+            MIGRACIONES[version - 1](conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        aplicadas.append(version)
+    return aplicadas
@@ -0,0 +1,70 @@
+# modelos.py
+"""
+Registros de datos del catálogo. 🧾
+
+Define los tipos con que viajan los datos entre `database.py`, los
+controladores y `ui.py`, en lugar de tuplas anónimas cuya forma cambiaba
+según la función que las devolvía.
+
+Son `NamedTuple`: inmutables (se pueden guardar en cachés y compartir sin
+copiarlos), con `__slots__ = ()` (no tienen `__dict__` por instancia, así que
+ocupan lo mismo que una tupla) y con acceso por nombre (`producto.precio`)
+sin dejar de poder desempaquetarse como antes.
+
+Las funciones `fila_*` se usan como `row_factory` de los cursores de SQLite,
+de modo que cada fila se crea directamente como registro.
+"""
+from typing import NamedTuple
+
+class Producto(NamedTuple):
+    """Un producto junto con el nombre de su categoría."""
+    id: int
+    nombre: str
+    categoria: str
+    precio: int
+
+class Categoria(NamedTuple):
+    """Una categoría de productos."""
+    id: int
+    nombre: str
+
+class Cambio(NamedTuple):
+    """Un cambio de un producto registrado en el diario de cambios."""
+    id: int
+    lote: int
+    momento: float
+    origen: str
+    operacion: str
+    producto_id: int
+    antes: dict
+    despues: dict
+
+class PrecioHistorico(NamedTuple):
+    """El precio y la categoría de un producto desde un momento (None tras una baja)."""
+    producto_id: int
+    momento: float
+    precio: int
+    categoria_id: int
+
+# Crea la tupla sin pasar por el `__new__` generado, que valida argumentos
+_nueva_tupla = tuple.__new__
+
+def fila_producto(cursor, fila):
+    """`row_factory` que convierte `(id, nombre, categoria, precio)` en un `Producto`."""
+    return _nueva_tupla(Producto, fila)
+
+def fila_categoria(cursor, fila):
+    """`row_factory` que convierte `(id, nombre)` en una `Categoria`."""
+    return _nueva_tupla(Categoria, fila)
+
+def fila_precio_historico(cursor, fila):
+    """`row_factory` que convierte una fila de `historial_precios` en un `PrecioHistorico`."""
+    return _nueva_tupla(PrecioHistorico, fila)
+
+def fila_cambio(cursor, fila):
+    """`row_factory` que convierte una fila del diario en un `Cambio`,
+    decodificando las imágenes JSON `antes` y `despues` (None si no hay)."""
+    import json
+    *datos, antes, despues = fila
+    return _nueva_tupla(Cambio, (*datos, antes and json.loads(antes),
+                                 despues and json.loads(despues)))
@@ -10,32 +10,63 @@ usuario (`ui`) y la capa de acceso a datos (`database`).
 
 """
 
+import sqlite3
+import time
+
+import autocompletado
 import database as db
+import escritura_diferida
 import ui
 
+def _elegir(sugerir, existe, mensaje):
+    """Selector con autocompletado: muestra las primeras coincidencias con lo
+    escrito y se acota a medida que el usuario escribe un comienzo más largo.
+    Se elige con el número de la lista o con `#ID`.
+    Retorna el ID elegido, o None si el usuario deja la entrada vacía."""
+    prefijo = ""
+    while True:
+        candidatos, total = sugerir(prefijo)
+        ui.mostrar_sugerencias(candidatos, total, prefijo)
+        texto = ui.obtener_input(f"{mensaje} (número, comienzo del nombre, #ID o vacío para cancelar): ")
+        if not texto:
+            return None
+        if texto.isdigit() and 1 <= int(texto) <= len(candidatos):
+            return candidatos[int(texto) - 1].id
+        if texto.startswith("#"):
+            try:
+                id_item = int(texto[1:])
+            except ValueError:
+                ui.mostrar_mensaje_error("Después de '#' debe ir un ID numérico.")
+                continue
+            if existe(id_item):
+                return id_item
+            ui.mostrar_mensaje_error("ID no válido.")
+            continue
+        if not sugerir(texto)[1]:
+            ui.mostrar_mensaje_error(f"Ningún nombre comienza con '{texto}'.")
+            continue
+        prefijo = texto
+
+def _elegir_categoria(mensaje="Categoría"):
+    """Selector con autocompletado de categorías (ver `_elegir`)."""
+    return _elegir(autocompletado.sugerir_categorias, db.existe_categoria_db, mensaje)
+
+def _elegir_producto(mensaje="Producto"):
+    """Selector con autocompletado de productos (ver `_elegir`)."""
+    return _elegir(autocompletado.sugerir_productos, db.existe_producto_db, mensaje)
+
 def agregar_nuevo_producto():
     """Orquesta la adición de un nuevo producto con validaciones.
     No recibe argumentos ni devuelve ningún valor."""
-    categorias = db.obtener_categorias_db()
-    if not categorias:
+    if not db.contar_categorias_db():
         ui.mostrar_mensaje_error("No hay categorías. Agregue una desde 'Gestionar Categorías'.")
         return
-        
+
     print("\nPor favor, elija una categoría:")
-    ui.mostrar_lista_seleccion(categorias)
-    
-    # Bucle para la selección de categoría
-    while True:
-        try:
-            num_cat_str = ui.obtener_input("Seleccione el número de la categoría: ")
-            num_cat = int(num_cat_str)
-            if 1 <= num_cat <= len(categorias):
-                categoria_id = categorias[num_cat - 1][0]
-                break
-            else:
-                ui.mostrar_mensaje_error("Número fuera de rango.")
-        except ValueError:
-            ui.mostrar_mensaje_error("Debe ingresar un número.")
+    categoria_id = _elegir_categoria()
+    if categoria_id is None:
+        ui.mostrar_mensaje_info("Alta cancelada.")
+        return
 
     # Bucle para el nombre del producto
     while True:
@@ -56,27 +87,19 @@ def agregar_nuevo_producto():
         except ValueError:
             ui.mostrar_mensaje_error("El precio debe ser un número entero.")
         
-    db.agregar_producto_db(nombre, categoria_id, precio)
-    ui.mostrar_mensaje_exito(f"Producto '{nombre}' agregado.")
+    _guardar(f"Alta del producto '{nombre}'", db.agregar_producto_db, nombre, categoria_id, precio)
 
 def modificar_un_producto():
     """Orquesta la modificación de un producto con validaciones.
     No recibe argumentos ni devuelve ningún valor. """
-    productos = db.obtener_productos_db()
-    if not ui.mostrar_lista_productos(productos):
+    if not db.obtener_pagina_productos_db(1)[0]:
+        ui.mostrar_mensaje_info(" No hay productos registrados.")
         return
 
-    # Bucle para obtener un ID de producto válido
-    while True:
-        try:
-            id_prod_str = ui.obtener_input("Ingrese el ID del producto a modificar: ")
-            id_prod = int(id_prod_str)
-            if id_prod in [p[0] for p in productos]:
-                break
-            else:
-                ui.mostrar_mensaje_error("ID de producto no válido.")
-        except ValueError:
-            ui.mostrar_mensaje_error("Debe ingresar un ID numérico.")
+    id_prod = _elegir_producto("Producto a modificar")
+    if id_prod is None:
+        ui.mostrar_mensaje_info("Modificación cancelada.")
+        return
 
     while True:
         ui.mostrar_menu_modificar_producto()
@@ -86,29 +109,18 @@ def modificar_un_producto():
             while True:
                 nuevo_nombre = ui.obtener_input("Ingrese el nuevo nombre del producto: ")
                 if nuevo_nombre:
-                    db.modificar_producto_db(id_prod, 'nombre', nuevo_nombre)
-                    ui.mostrar_mensaje_exito("Nombre actualizado.")
+                    _guardar(f"Modificación del nombre del producto {id_prod}",
+                             db.modificar_producto_db, id_prod, 'nombre', nuevo_nombre)
                     break
                 else:
                     ui.mostrar_mensaje_error("El nombre no puede estar vacío.")
 
         elif opcion == '2': # Modificar Categoría
-            categorias = db.obtener_categorias_db()
             print("\nElija la nueva categoría:")
-            ui.mostrar_lista_seleccion(categorias)
-            while True:
-                try:
-                    num_cat_str = ui.obtener_input("Seleccione el número de la nueva categoría: ")
-                    num_cat = int(num_cat_str)
-                    if 1 <= num_cat <= len(categorias):
-                        nueva_cat_id = categorias[num_cat - 1][0]
-                        db.modificar_producto_db(id_prod, 'categoria_id', nueva_cat_id)
-                        ui.mostrar_mensaje_exito("Categoría actualizada.")
-                        break
-                    else:
-                        ui.mostrar_mensaje_error("Número fuera de rango.")
-                except ValueError:
-                    ui.mostrar_mensaje_error("Debe ingresar un número.")
+            nueva_cat_id = _elegir_categoria("Nueva categoría")
+            if nueva_cat_id is not None:
+                _guardar(f"Modificación de la categoría del producto {id_prod}",
+                         db.modificar_producto_db, id_prod, 'categoria_id', nueva_cat_id)
 
         elif opcion == '3': # Modificar Precio
             while True:
@@ -116,8 +128,8 @@ def modificar_un_producto():
                     precio_str = ui.obtener_input("Ingrese el nuevo precio (entero): ")
                     nuevo_precio = int(precio_str)
                     if nuevo_precio >= 0:
-                        db.modificar_producto_db(id_prod, 'precio', nuevo_precio)
-                        ui.mostrar_mensaje_exito("Precio actualizado.")
+                        _guardar(f"Modificación del precio del producto {id_prod}",
+                                 db.modificar_producto_db, id_prod, 'precio', nuevo_precio)
                         break
                     else:
                         ui.mostrar_mensaje_error("El precio no puede ser un número negativo.")
@@ -133,10 +145,9 @@ def modificar_un_producto():
 def eliminar_un_producto():
     """Orquesta la eliminación de un producto con validaciones. 
     No recibe argumentos ni devuelve ningún valor. """
-    productos = db.obtener_productos_db()
-    if not ui.mostrar_lista_productos(productos):
+    if not visualizar_productos("Continuar"):
         return
-        
+
     while True:
         id_prod_str = ui.obtener_input("Ingrese el ID del producto a eliminar (o 'S' para salir): ")
         if id_prod_str.upper() == 'S':
@@ -145,15 +156,71 @@ def eliminar_un_producto():
 
         try:
             id_prod = int(id_prod_str)
-            if id_prod in [p[0] for p in productos]:
-                db.eliminar_producto_db(id_prod)
-                ui.mostrar_mensaje_exito("Producto eliminado.")
+            if db.existe_producto_db(id_prod):
+                _guardar(f"Baja del producto {id_prod}", db.eliminar_producto_db, id_prod)
                 return
             else:
                 ui.mostrar_mensaje_error("ID de producto no válido.")
         except ValueError:
             ui.mostrar_mensaje_error("Entrada no válida. Ingrese un ID numérico o 'S'.")
 
+def visualizar_productos(texto_salida="Volver"):
+    """Muestra el listado de productos página por página.
+
+    Cada página se obtiene con paginación por clave (ver
+    `db.obtener_pagina_productos_db`), así que nunca se carga el catálogo
+    completo. Permite avanzar, retroceder, saltar a la primera página
+    que comienza con una letra o mostrar el catálogo entero de corrido
+    (leído en flujo con `db.iterar_productos_db`).
+
+    Args:
+        texto_salida (str): El texto de la opción que cierra el listado.
+
+    Retorna:
+        bool: False si no hay productos registrados, True en otro caso."""
+    productos, hay_siguiente = db.obtener_pagina_productos_db()
+    if not productos:
+        ui.mostrar_mensaje_info(" No hay productos registrados.")
+        return False
+    num_pagina = 1
+    hay_anterior = False
+
+    while True:
+        ui.mostrar_pagina_productos(productos, num_pagina)
+        ui.mostrar_menu_paginacion(hay_anterior, hay_siguiente, texto_salida)
+        opcion = ui.obtener_input("Seleccione una opción: ").upper()
+
+        if opcion == 'S' and hay_siguiente:
+            ultimo = productos[-1]
+            productos, hay_siguiente = db.obtener_pagina_productos_db(despues=(ultimo.nombre, ultimo.id))
+            num_pagina = num_pagina and num_pagina + 1
+            hay_anterior = True
+        elif opcion == 'A' and hay_anterior:
+            primero = productos[0]
+            productos, hay_anterior = db.obtener_pagina_productos_db(antes=(primero.nombre, primero.id))
+            num_pagina = num_pagina and num_pagina - 1
+            hay_siguiente = True
+        elif opcion == 'I':
+            letra = ui.obtener_input("Ingrese la letra inicial: ")
+            if not letra:
+                ui.mostrar_mensaje_error("Debe ingresar una letra.")
+                continue
+            pagina, hay_mas = db.obtener_pagina_productos_db(desde_nombre=letra[0].upper())
+            if not pagina:
+                ui.mostrar_mensaje_error(f"No hay productos desde la letra '{letra[0].upper()}'.")
+                continue
+            productos, hay_siguiente = pagina, hay_mas
+            primero = productos[0]
+            hay_anterior = bool(db.obtener_pagina_productos_db(1, antes=(primero.nombre, primero.id))[0])
+            # Tras un salto no se sabe la posición absoluta (contarla recorrería el índice)
+            num_pagina = None if hay_anterior else 1
+        elif opcion == 'T':
+            ui.mostrar_lista_productos(db.iterar_productos_db())
+        elif opcion == 'V':
+            return True
+        else:
+            ui.mostrar_mensaje_error("Opción inválida.")
+
 def buscar_un_producto():
     """Orquesta la búsqueda de productos.
     No recibe argumentos ni devuelve ningún valor."""
@@ -164,10 +231,179 @@ def buscar_un_producto():
     else:
         ui.mostrar_resultados_busqueda(resultados)
 
+def _pedir_ids(mensaje):
+    """Pide una lista de IDs separados por comas, que admite rangos como `10-20`.
+    Retorna la lista de IDs, o None si el usuario deja la entrada vacía."""
+    while True:
+        texto = ui.obtener_input(mensaje)
+        if not texto:
+            return None
+        try:
+            ids = []
+            for parte in texto.split(","):
+                desde, _, hasta = parte.strip().partition("-")
+                if hasta:
+                    ids.extend(range(int(desde), int(hasta) + 1))
+                else:
+                    ids.append(int(desde))
+            return ids
+        except ValueError:
+            ui.mostrar_mensaje_error("Use IDs numéricos separados por comas (ej: 1,2,10-20).")
+
+def _pedir_entero(mensaje, minimo=None, opcional=False):
+    """Pide un número entero, opcionalmente con un mínimo.
+    Retorna el número, o None si `opcional` es True y la entrada queda vacía."""
+    while True:
+        texto = ui.obtener_input(mensaje)
+        if not texto and opcional:
+            return None
+        try:
+            valor = int(texto)
+            if minimo is None or valor >= minimo:
+                return valor
+            ui.mostrar_mensaje_error(f"El número debe ser mayor o igual a {minimo}.")
+        except ValueError:
+            ui.mostrar_mensaje_error("Debe ingresar un número entero.")
+
+def _pedir_categoria(mensaje):
+    """Muestra las categorías numeradas y retorna el ID de la elegida."""
+    categorias = db.obtener_categorias_db()
+    ui.mostrar_lista_seleccion(categorias)
+    while True:
+        num_cat = _pedir_entero(mensaje, minimo=1)
+        if num_cat <= len(categorias):
+            return categorias[num_cat - 1].id
+        ui.mostrar_mensaje_error("Número fuera de rango.")
+
+def _informar_lote(accion, cantidad, inicio):
+    """Informa cuántos productos afectó una operación masiva y a qué ritmo."""
+    segundos = time.perf_counter() - inicio
+    ritmo = cantidad / segundos if segundos > 0 else 0
+    ui.mostrar_mensaje_exito(f"{cantidad} productos {accion} en {segundos:.3f} s "
+                             f"({ritmo:,.0f} filas/s).")
+
+def _ejecutar_operacion_masiva(opcion):
+    """Pide los datos de la operación masiva elegida y la ejecuta.
+    Retorna False si la opción no es válida."""
+    if opcion == '1':
+        ids = _pedir_ids("IDs de los productos: ")
+        if ids:
+            precio = _pedir_entero("Nuevo precio (entero): ", minimo=0)
+            inicio = time.perf_counter()
+            _informar_lote("actualizados", db.fijar_precio_lote_db(ids, precio), inicio)
+    elif opcion == '2':
+        try:
+            porcentaje = float(ui.obtener_input("Porcentaje a aplicar (ej: 10 o -5): "))
+        except ValueError:
+            ui.mostrar_mensaje_error("Debe ingresar un número.")
+            return True
+        ids = _pedir_ids("IDs de los productos (vacío = todos): ")
+        categoria_id = None
+        if ids is None and ui.obtener_input("¿Limitar a una categoría? (S/N): ").upper() == 'S':
+            categoria_id = _pedir_categoria("Seleccione el número de la categoría: ")
+        alcance = "todos los productos" if categoria_id is None else "todos los productos de la categoría"
+        if ids is None and ui.obtener_input(
+                f"¿Aplicar {porcentaje:g}% a {alcance}? (S/N): ").upper() != 'S':
+            ui.mostrar_mensaje_info("Ajuste cancelado.")
+            return True
+        inicio = time.perf_counter()
+        cantidad = db.ajustar_precio_porcentaje_db(porcentaje, ids, categoria_id)
+        _informar_lote("actualizados", cantidad, inicio)
+    elif opcion == '3':
+        texto = ui.obtener_input("Pares ID=precio separados por comas: ")
+        try:
+            precios = [tuple(int(v) for v in par.split("=")) for par in texto.split(",") if par.strip()]
+            if any(len(par) != 2 for par in precios):
+                raise ValueError
+            inicio = time.perf_counter()
+            _informar_lote("actualizados", db.actualizar_precios_db(precios), inicio)
+        except ValueError:
+            ui.mostrar_mensaje_error("Use el formato ID=precio con precios no negativos (ej: 3=1500, 7=200).")
+    elif opcion == '4':
+        ids = _pedir_ids("IDs de los productos: ")
+        if ids:
+            categoria_id = _pedir_categoria("Seleccione el número de la nueva categoría: ")
+            inicio = time.perf_counter()
+            _informar_lote("recategorizados", db.recategorizar_lote_db(ids, categoria_id), inicio)
+    elif opcion == '5':
+        ids = _pedir_ids("IDs de los productos a eliminar: ")
+        if ids and ui.obtener_input(f"¿Eliminar {len(ids)} IDs? (S/N): ").upper() == 'S':
+            inicio = time.perf_counter()
+            _informar_lote("eliminados", db.eliminar_productos_lote_db(ids), inicio)
+    elif opcion == '6':
+        categoria_id = None
+        if ui.obtener_input("¿Filtrar por categoría? (S/N): ").upper() == 'S':
+            categoria_id = _pedir_categoria("Seleccione el número de la categoría: ")
+        precio_min = _pedir_entero("Precio mínimo (vacío = sin mínimo): ", minimo=0, opcional=True)
+        precio_max = _pedir_entero("Precio máximo (vacío = sin máximo): ", minimo=0, opcional=True)
+        if categoria_id is None and precio_min is None and precio_max is None:
+            ui.mostrar_mensaje_error("Debe indicar al menos un filtro.")
+        elif ui.obtener_input("¿Confirma la eliminación? (S/N): ").upper() == 'S':
+            inicio = time.perf_counter()
+            cantidad = db.eliminar_productos_filtro_db(categoria_id, precio_min, precio_max)
+            _informar_lote("eliminados", cantidad, inicio)
+    else:
+        return False
+    return True
+
+def gestionar_operaciones_masivas():
+    """Bucle del submenú de operaciones sobre varios productos a la vez.
+
+    Cada operación se ejecuta en una única transacción (ver las funciones
+    `*_lote_db` de `database`) y al terminar se informa la cantidad de
+    productos afectados y las filas por segundo.
+    No recibe argumentos ni devuelve ningún valor."""
+    while True:
+        ui.mostrar_menu_operaciones_masivas()
+        opcion = ui.obtener_input("Seleccione una opción: ")
+        if opcion == '7':
+            break
+        if not _ejecutar_operacion_masiva(opcion):
+            ui.mostrar_mensaje_error(" Opción inválida.")
+
+def deshacer_o_rehacer(deshacer=True):
+    """Deshace o rehace la última operación sobre productos e informa cuál fue.
+    No devuelve ningún valor."""
+    try:
+        descripcion = db.deshacer_db() if deshacer else db.rehacer_db()
+    except sqlite3.IntegrityError as error:
+        ui.mostrar_mensaje_error(f"No se puede {'deshacer' if deshacer else 'rehacer'}: {error}")
+        return
+    if descripcion is None:
+        ui.mostrar_mensaje_info(f"No hay operaciones para {'deshacer' if deshacer else 'rehacer'}.")
+    else:
+        ui.mostrar_mensaje_exito(f"{'Deshecho' if deshacer else 'Rehecho'}: {descripcion}")
+
+def _guardar(descripcion, funcion, *args):
+    """Guarda una edición con `escritura_diferida.ejecutar` y lo informa.
+    Si la edición quedó en cola, se dice eso y no que ya se guardó: un error
+    al confirmarla se muestra después con la misma descripción."""
+    escritura_diferida.ejecutar(descripcion, funcion, *args)
+    if escritura_diferida.esta_activa():
+        ui.mostrar_mensaje_info(f"{descripcion} encolada; se guardará en unos instantes.")
+    else:
+        ui.mostrar_mensaje_exito(f"{descripcion} guardada.")
+
+def _informar_errores_diferidos():
+    """Muestra los errores de las ediciones diferidas, con su descripción."""
+    for mensaje in escritura_diferida.errores():
+        ui.mostrar_mensaje_error(f"Error en una edición diferida: {mensaje}.")
+
 def gestionar_productos():
     """Bucle principal para la gestión de productos.
+
+    Las altas, modificaciones y bajas individuales se guardan con escritura
+    diferida (ver `escritura_diferida.py`): se confirman juntas cada pocos
+    instantes y, a más tardar, al volver al menú principal.
     No recibe argumentos ni devuelve ningún valor."""
+    with escritura_diferida.diferida():
+        _bucle_productos()
+    _informar_errores_diferidos()
+
+def _bucle_productos():
+    """Muestra el menú de productos y despacha cada opción hasta que se elige volver."""
     while True:
+        _informar_errores_diferidos()
         ui.mostrar_menu_productos()
         opcion = ui.obtener_input("Seleccione una opción: ")
         
@@ -176,12 +412,18 @@ def gestionar_productos():
         elif opcion == '2':
             modificar_un_producto()
         elif opcion == '3':
-            ui.mostrar_lista_productos(db.obtener_productos_db())
+            visualizar_productos()
         elif opcion == '4':
             buscar_un_producto()
         elif opcion == '5':
             eliminar_un_producto()
         elif opcion == '6':
+            gestionar_operaciones_masivas()
+        elif opcion == '7':
+            deshacer_o_rehacer(deshacer=True)
+        elif opcion == '8':
+            deshacer_o_rehacer(deshacer=False)
+        elif opcion == '9':
             break
         else:
             ui.mostrar_mensaje_error(" Opción inválida.")
\ No newline at end of file
@@ -0,0 +1,63 @@
+# reportes.py
+"""
+Módulo de reportes del catálogo. 📈
+
+Controlador del menú "Reportes": resumen de precios por categoría,
+percentiles, histograma y productos más caros. Los cálculos se hacen sobre
+la instantánea columnar de `instantanea.py`, que se carga la primera vez
+que se pide un reporte y luego se actualiza solo con los productos que
+cambiaron.
+"""
+import database as db
+import instantanea
+import ui
+
+def _pedir_categoria_opcional():
+    """Muestra las categorías numeradas y pide una; Enter elige todo el catálogo.
+    Retorna el par `(id_categoria, titulo)`; el ID es None para todo el catálogo."""
+    categorias = db.obtener_categorias_db()
+    ui.mostrar_lista_seleccion(categorias)
+    while True:
+        texto = ui.obtener_input("Número de categoría (Enter para todo el catálogo): ")
+        if not texto:
+            return None, "todo el catálogo"
+        if texto.isdigit() and 1 <= int(texto) <= len(categorias):
+            id_cat, nombre = categorias[int(texto) - 1]
+            return id_cat, nombre
+        ui.mostrar_mensaje_error("Número fuera de rango.")
+
+def _pedir_cantidad(mensaje, por_defecto):
+    """Pide un entero positivo; Enter usa `por_defecto`."""
+    while True:
+        texto = ui.obtener_input(f"{mensaje} [{por_defecto}]: ")
+        if not texto:
+            return por_defecto
+        if texto.isdigit() and int(texto) > 0:
+            return int(texto)
+        ui.mostrar_mensaje_error("Debe ingresar un número entero mayor que 0.")
+
+def gestionar_reportes():
+    """Bucle del menú de reportes.
+    No recibe argumentos ni devuelve ningún valor."""
+    while True:
+        ui.mostrar_menu_reportes()
+        opcion = ui.obtener_input("Seleccione una opción: ")
+
+        if opcion == '1':
+            ui.mostrar_resumen_categorias(instantanea.resumen_por_categoria())
+        elif opcion == '2':
+            id_cat, titulo = _pedir_categoria_opcional()
+            ui.mostrar_percentiles(titulo, instantanea.percentiles_precio(id_cat))
+        elif opcion == '3':
+            id_cat, titulo = _pedir_categoria_opcional()
+            cubetas = _pedir_cantidad("Cantidad de intervalos", 10)
+            ui.mostrar_histograma(titulo, instantanea.histograma_precios(id_cat, cubetas))
+        elif opcion == '4':
+            id_cat, titulo = _pedir_categoria_opcional()
+            cantidad = _pedir_cantidad("Cantidad de productos", 10)
+            ui.mostrar_productos_destacados(f"Productos más caros: {titulo}",
+                                            instantanea.productos_mas_caros(cantidad, id_cat))
+        elif opcion == '5':
+            break
+        else:
+            ui.mostrar_mensaje_error("Opción inválida.")
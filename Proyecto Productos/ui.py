@@ -8,8 +8,71 @@ estado (éxito, error, información). Utiliza la librería `colorama` para
 dar estilo y color a la salida, mejorando la legibilidad y la experiencia
 de usuario.
 
+Los listados de productos se escriben con `escribir_tabla`, que consume las
+filas de a bloques (pueden venir de un generador), formatea cada bloque en
+una sola cadena y la envía a la consola con una única escritura. Los colores
+se omiten cuando la salida no es una terminal.
+
+`colorama` recién se importa (y se inicializa, si se llamó a
+`preparar_consola`) la primera vez que se usa un color, de modo que importar
+este módulo no demora el arranque del programa.
 """
-from colorama import Fore, Style, Back
+import itertools
+import sys
+
+_inicializar_consola = False
+_colorama = None
+
+def preparar_consola():
+    """
+    Pide inicializar la consola de `colorama` (con `autoreset`, y en Windows la
+    traducción de códigos ANSI) al escribir el primer texto con color.
+
+    Args:
+        Esta función no recibe parámetros.
+    La función no devuelve ningún valor.
+    """
+    global _inicializar_consola
+    _inicializar_consola = True
+
+def _cargar_colorama():
+    """Importa `colorama` la primera vez y lo inicializa si se pidió con `preparar_consola`."""
+    global _colorama
+    if _colorama is None:
+        import colorama
+        if _inicializar_consola:
+            colorama.init(autoreset=True)
+        _colorama = colorama
+    return _colorama
+
+class _CodigosDiferidos:
+    """
+    Sustituto de `Fore`, `Style` y `Back` de colorama que lo carga en el primer uso.
+
+    Al primer acceso copia todos los códigos del objeto original, así que los
+    accesos siguientes son lecturas de atributo comunes.
+    """
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+
+    def __getattr__(self, codigo):
+        if codigo.startswith("__"):
+            raise AttributeError(codigo)
+        vars(self).update(vars(getattr(_cargar_colorama(), self._nombre)))
+        return vars(self)[codigo]
+
+Fore = _CodigosDiferidos("Fore")
+Style = _CodigosDiferidos("Style")
+Back = _CodigosDiferidos("Back")
+
+# Filas que se formatean juntas antes de cada escritura en la consola
+TAM_BLOQUE_SALIDA = 1000
+
+# Columnas de los listados: (etiqueta, alineación, prefijo del valor)
+# (en el orden de los campos de `modelos.Producto`)
+COLUMNAS_PRODUCTO = (("ID", ">", ""), ("Nombre", "<", ""),
+                     ("Categoría", "<", ""), ("Precio", ">", "$"))
 
 def mostrar_menu_principal():
     """
@@ -22,7 +85,9 @@ def mostrar_menu_principal():
     print(Fore.CYAN + "\n====== MENÚ PRINCIPAL ======")
     print("1.📦 Gestionar Productos")
     print("2.📋 Gestionar Categorías")
-    print("3.🔚 Salir del programa")
+    print("3.📈 Reportes")
+    print("4.💾 Respaldos")
+    print("5.🔚 Salir del programa")
     print(Fore.CYAN + "==========================\n")
 
 def mostrar_menu_productos():
@@ -39,9 +104,46 @@ def mostrar_menu_productos():
     print("3. 👁️  Visualizar productos")
     print("4. 🔍 Buscar producto")
     print("5. ❌ Eliminar producto")
-    print("6. 🔙 Volver al menú principal")
+    print("6. 🧮 Operaciones masivas")
+    print("7. ↩️ Deshacer")
+    print("8. ↪️ Rehacer")
+    print("9. 🔙 Volver al menú principal")
     print(Fore.CYAN + "-------------------------\n")
 
+def mostrar_menu_operaciones_masivas():
+    """
+    Imprime el submenú de operaciones sobre varios productos a la vez.
+
+    Args:
+        Esta función no recibe parámetros.
+    La función no devuelve ningún valor.
+    """
+    print(Fore.CYAN + "\n--- Operaciones Masivas ---")
+    print("1. 💲 Fijar un precio a varios productos")
+    print("2. 📈 Ajustar precios por porcentaje")
+    print("3. 🧾 Asignar precios por ID (ID=precio)")
+    print("4. 🔀 Cambiar la categoría de varios productos")
+    print("5. ❌ Eliminar productos por ID")
+    print("6. 🧹 Eliminar productos por filtro")
+    print("7. 🔙 Volver al menú de productos")
+    print(Fore.CYAN + "---------------------------\n")
+
+def mostrar_menu_reportes():
+    """
+    Imprime el submenú de reportes del catálogo.
+
+    Args:
+        Esta función no recibe parámetros.
+    La función no devuelve ningún valor.
+    """
+    print(Fore.CYAN + "\n--- Reportes ---")
+    print("1. 📊 Resumen por categoría")
+    print("2. 📐 Percentiles de precio")
+    print("3. 📶 Histograma de precios")
+    print("4. 💎 Productos más caros")
+    print("5. 🔙 Volver al menú principal")
+    print(Fore.CYAN + "----------------\n")
+
 def mostrar_menu_categorias():
     """
     Imprime el submenú de gestión de categorías.
@@ -58,6 +160,21 @@ def mostrar_menu_categorias():
     print("5. 🔙 Volver al menú principal")
     print(Fore.CYAN + "--------------------------\n")
 
+def mostrar_menu_respaldos():
+    """
+    Imprime el submenú de respaldos de la base de datos.
+
+    Args:
+        Esta función no recibe parámetros.
+    La función no devuelve ningún valor.
+    """
+    print(Fore.CYAN + "\n--- Respaldos ---")
+    print("1. 💾 Crear respaldo")
+    print("2. 🩺 Verificar un respaldo")
+    print("3. ♻️  Restaurar un respaldo")
+    print("4. 🔙 Volver al menú principal")
+    print(Fore.CYAN + "-----------------\n")
+
 def obtener_input(mensaje_prompt):
     """
     Obtiene una entrada del usuario con un estilo y color consistentes.
@@ -108,46 +225,148 @@ def mostrar_lista_seleccion(items):
     for i, item in enumerate(items):
         print(f"{Fore.YELLOW}{i + 1}.{Style.RESET_ALL} {item[1]}") # item[1] es el nombre
 
+def _usar_color(salida):
+    """Indica si la salida es una terminal, y por lo tanto admite colores."""
+    try:
+        return salida.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+def _formato_fila(columnas, anchos, color):
+    """Arma la plantilla de `str.format` de una fila con los anchos dados."""
+    inicio, fin = (Fore.YELLOW, Style.RESET_ALL) if color else ("", "")
+    return " | ".join(f"{inicio}{etiqueta}: {fin}{prefijo}{{:{alineacion}{ancho}}}"
+                      for (etiqueta, alineacion, prefijo), ancho in zip(columnas, anchos))
+
+def escribir_tabla(filas, columnas, salida=None, tam_bloque=TAM_BLOQUE_SALIDA):
+    """
+    Escribe filas alineadas en columnas, de a bloques y a medida que llegan.
+
+    El ancho de cada columna se calcula una sola vez, con el primer bloque,
+    así que la primera parte del listado aparece sin esperar a que se lean
+    todas las filas (un valor posterior más largo solo desplaza su fila).
+
+    Args:
+        filas: Un iterable de tuplas (una lista o un generador).
+        columnas: Tuplas `(etiqueta, alineación, prefijo)`, una por valor de la fila.
+        salida: El archivo de salida; por defecto, la consola.
+        tam_bloque (int): Las filas que se formatean por cada escritura.
+
+    Retorna:
+        int: La cantidad de filas escritas.
+    """
+    salida = salida or sys.stdout
+    plantilla = None
+    filas = iter(filas)
+    total = 0
+    while True:
+        bloque = list(itertools.islice(filas, tam_bloque))
+        if not bloque:
+            return total
+        if plantilla is None:
+            anchos = [max(len(str(valor)) for valor in columna) for columna in zip(*bloque)]
+            plantilla = _formato_fila(columnas, anchos, _usar_color(salida)).format
+        salida.write("\n".join([plantilla(*fila) for fila in bloque]) + "\n")
+        salida.flush()
+        total += len(bloque)
+
 def mostrar_lista_productos(productos):
     """
     Muestra una lista formateada de productos con todos sus detalles.
 
-    Incluye ID, nombre, categoría y precio. Si la lista está vacía,
-    muestra un mensaje informativo y retorna False.
+    Incluye ID, nombre, categoría y precio. Los productos pueden venir de un
+    generador (por ejemplo, `db.iterar_productos_db()`): se muestran a medida
+    que se leen. Si no hay ninguno, muestra un mensaje informativo y
+    retorna False.
 
     Args:
-        productos: Una lista de tuplas con los datos del producto,
+        productos: Un iterable de tuplas con los datos del producto,
             en el formato `(id, nombre, categoria, precio)`.
 
     Retorna:
         un booleano: `True` si se mostraron productos, `False` si la lista estaba vacía.
     """
-    if not productos:
+    productos = iter(productos)
+    primero = next(productos, None)
+    if primero is None:
         mostrar_mensaje_info(" No hay productos registrados.")
         return False
     print(Fore.MAGENTA + "\n--- Productos Registrados ---")
-    for id_prod, nombre, categoria, precio in productos:
-        print(f"{Fore.YELLOW}ID: {Style.RESET_ALL}{id_prod} | "
-              f"{Fore.YELLOW}Nombre: {Style.RESET_ALL}{nombre} | "
-              f"{Fore.YELLOW}Categoría: {Style.RESET_ALL}{categoria} | "
-              f"{Fore.YELLOW}Precio: {Style.RESET_ALL}${precio}")
-    print(Fore.MAGENTA + "---------------------------\n")
+    total = escribir_tabla(itertools.chain([primero], productos), COLUMNAS_PRODUCTO)
+    print(Fore.MAGENTA + f"--- {total} productos ---\n")
     return True
 
+def mostrar_pagina_productos(productos, num_pagina=None):
+    """
+    Muestra una página del listado de productos con su número de página.
+
+    Args:
+        productos: Una lista de tuplas con los datos del producto,
+            en el formato `(id, nombre, categoria, precio)`.
+        num_pagina (int): El número de la página mostrada (desde 1), o None
+            si no se conoce (por ejemplo, tras saltar a una letra).
+
+    La función no devuelve ningún valor.
+    """
+    titulo = "Productos Registrados" if num_pagina is None else f"Productos Registrados (página {num_pagina})"
+    print(Fore.MAGENTA + f"\n--- {titulo} ---")
+    escribir_tabla(productos, COLUMNAS_PRODUCTO)
+    print(Fore.MAGENTA + "---------------------------\n")
+
+def mostrar_menu_paginacion(hay_anterior, hay_siguiente, texto_salida="Volver"):
+    """
+    Muestra las opciones de navegación entre páginas del listado.
+
+    Args:
+        hay_anterior (bool): Si existe una página anterior.
+        hay_siguiente (bool): Si existe una página siguiente.
+        texto_salida (str): El texto de la opción `V` que sale del listado.
+
+    La función no devuelve ningún valor.
+    """
+    opciones = []
+    if hay_siguiente:
+        opciones.append("S. Siguiente")
+    if hay_anterior:
+        opciones.append("A. Anterior")
+    opciones.append("I. Ir a una letra")
+    opciones.append("T. Mostrar todos")
+    opciones.append(f"V. {texto_salida}")
+    print(Fore.CYAN + " | ".join(opciones))
+
 def mostrar_resultados_busqueda(resultados):
     """
     Muestra los resultados de una búsqueda de productos.
 
     Args:
-        resultados: Una lista de tuplas con los productos
-            encontrados, en el formato `(nombre, categoria, precio)`.
+        resultados: Una lista de registros `modelos.Producto` con los
+            productos encontrados.
     La función no devuelve ningún valor.
     """
     print(Fore.MAGENTA + "\n--- Resultados de la búsqueda ---")
-    for nombre, categoria, precio in resultados:
-        print(f"Nombre: {nombre}, Categoría: {categoria}, Precio: ${precio}")
+    escribir_tabla(resultados, COLUMNAS_PRODUCTO)
     print(Fore.MAGENTA + "-------------------------------\n")
 
+def mostrar_sugerencias(candidatos, total, prefijo):
+    """
+    Muestra numeradas las coincidencias de un selector con autocompletado.
+
+    Args:
+        candidatos: Registros `modelos.Producto` o `modelos.Categoria` a mostrar.
+        total (int): La cantidad total de coincidencias (puede superar a las mostradas).
+        prefijo (str): El texto escrito hasta ahora.
+    La función no devuelve ningún valor.
+    """
+    filtro = f"que comienzan con '{prefijo}'" if prefijo else "en orden alfabético"
+    print(Fore.MAGENTA + f"\n--- {len(candidatos)} de {total} {filtro} ---")
+    for i, item in enumerate(candidatos, start=1):
+        detalle = (f" (ID {item.id}, {item.categoria}, ${item.precio})"
+                   if hasattr(item, "precio") else "")
+        print(f"{Fore.YELLOW}{i}.{Style.RESET_ALL} {item.nombre}{detalle}")
+    if total > len(candidatos):
+        print(f"... y {total - len(candidatos)} más: escriba más letras para acotar.")
+    print(Fore.MAGENTA + "-" * 30)
+
 def mostrar_mensaje_exito(mensaje):
     """
     Muestra un mensaje de éxito con formato (color verde y un check).
@@ -193,4 +412,203 @@ def mostrar_menu_modificar_producto():
     print("2. Categoría")
     print("3. Precio")
     print("4. Finalizar modificación")
-    print(Fore.CYAN + "----------------------------\n")
\ No newline at end of file
+    print(Fore.CYAN + "----------------------------\n")
+
+def mostrar_menu_diagnostico(activa):
+    """
+    Imprime el menú oculto de diagnóstico de rendimiento.
+
+    Args:
+        activa (bool): Si la instrumentación está activa.
+    La función no devuelve ningún valor.
+    """
+    estado = "ACTIVA" if activa else "inactiva"
+    print(Fore.CYAN + f"\n--- Diagnóstico (instrumentación {estado}) ---")
+    print(f"1. {'Desactivar' if activa else 'Activar'} instrumentación")
+    print("2. Tiempos por función")
+    print("3. Tiempos por sentencia SQL")
+    print("4. Consultas lentas")
+    print("5. Guardar estadísticas en JSON")
+    print("6. Reiniciar estadísticas")
+    print("7. Uso de las cachés")
+    print("8. Volver al menú principal")
+    print(Fore.CYAN + "---------------------------------------------\n")
+
+def mostrar_tabla_tiempos(titulo, tiempos, limite=15):
+    """
+    Muestra una tabla de estadísticas de tiempo ordenada por tiempo total.
+
+    Args:
+        titulo (str): El título de la tabla.
+        tiempos (dict): Nombre -> diccionario con `cantidad`, `media_ms`,
+            `maximo_ms`, `total_ms` y `filas`.
+        limite (int): La cantidad máxima de filas a mostrar.
+    La función no devuelve ningún valor.
+    """
+    print(Fore.MAGENTA + f"\n--- {titulo} ---")
+    if not tiempos:
+        print("Sin datos. Active la instrumentación y use el programa.")
+    for nombre, datos in list(tiempos.items())[:limite]:
+        print(f"{Fore.YELLOW}{nombre[:70]}{Style.RESET_ALL}\n"
+              f"    llamadas: {datos['cantidad']} | media: {datos['media_ms']:.3f} ms | "
+              f"máx: {datos['maximo_ms']:.3f} ms | total: {datos['total_ms']:.1f} ms | "
+              f"filas: {datos['filas']}")
+    print(Fore.MAGENTA + "-" * (len(titulo) + 8) + "\n")
+
+def mostrar_estadisticas_caches(consultas, categorias):
+    """
+    Muestra el uso de la caché de consultas y de la caché de categorías.
+
+    Args:
+        consultas (dict): El resultado de `cache_consultas.estadisticas()`.
+        categorias (dict): El resultado de `db.estadisticas_cache_categorias()`.
+    La función no devuelve ningún valor.
+    """
+    print(Fore.MAGENTA + "\n--- Uso de las cachés ---")
+    print(f"{Fore.YELLOW}Consultas (listados y búsquedas){Style.RESET_ALL}\n"
+          f"    aciertos: {consultas['aciertos']} | fallos: {consultas['fallos']} | "
+          f"tasa de aciertos: {consultas['tasa_aciertos']:.1%}\n"
+          f"    entradas: {consultas['entradas']}/{consultas['max_entradas']} | "
+          f"memoria: {consultas['bytes'] / 2**20:.2f}/{consultas['max_bytes'] / 2**20:.0f} MiB | "
+          f"invalidaciones: {consultas['invalidaciones']} | descartes: {consultas['descartes']}")
+    print(f"{Fore.YELLOW}Categorías{Style.RESET_ALL}\n"
+          f"    aciertos: {categorias['aciertos']} | fallos: {categorias['fallos']}")
+    print(Fore.MAGENTA + "-------------------------\n")
+
+def mostrar_consultas_lentas(consultas, umbral_ms):
+    """
+    Muestra el registro de consultas lentas con su plan de ejecución.
+
+    Args:
+        consultas (list): Diccionarios con `momento`, `ms`, `funcion`, `sql` y `plan`.
+        umbral_ms (float): El umbral usado para considerar lenta una consulta.
+    La función no devuelve ningún valor.
+    """
+    print(Fore.MAGENTA + f"\n--- Consultas lentas (>= {umbral_ms:g} ms) ---")
+    if not consultas:
+        print("No se registraron consultas lentas.")
+    for consulta in consultas:
+        print(f"{Fore.YELLOW}{consulta['momento']} | {consulta['ms']:.1f} ms | "
+              f"{consulta['funcion'] or '-'}{Style.RESET_ALL}\n    {consulta['sql']}")
+        for paso in consulta["plan"]:
+            print(f"      plan: {paso}")
+    print(Fore.MAGENTA + "----------------------------------\n")
+
+def mostrar_resumen_categorias(resumen):
+    """
+    Muestra la cantidad de productos y las estadísticas de precio de cada categoría.
+
+    Args:
+        resumen (list): Tuplas `(categoria, cantidad, total, promedio, minimo,
+            maximo, mediana)`.
+    La función no devuelve ningún valor.
+    """
+    print(Fore.MAGENTA + "\n--- Resumen por categoría ---")
+    filas = [(categoria, cantidad, f"${total:,}",
+              "-" if promedio is None else f"${promedio:,.2f}",
+              "-" if minimo is None else f"${minimo:,}",
+              "-" if maximo is None else f"${maximo:,}",
+              "-" if mediana is None else f"${mediana:,.0f}")
+             for categoria, cantidad, total, promedio, minimo, maximo, mediana in resumen]
+    escribir_tabla(filas, (("Categoría", "<", ""), ("Productos", ">", ""), ("Total", ">", ""),
+                           ("Promedio", ">", ""), ("Mín", ">", ""), ("Máx", ">", ""),
+                           ("Mediana", ">", "")))
+    print(Fore.MAGENTA + "-----------------------------\n")
+
+def mostrar_percentiles(titulo, percentiles):
+    """
+    Muestra los percentiles de precio calculados.
+
+    Args:
+        titulo (str): A qué productos corresponden (por ejemplo, una categoría).
+        percentiles (dict): Percentil -> precio (None si no hay productos).
+    La función no devuelve ningún valor.
+    """
+    print(Fore.MAGENTA + f"\n--- Percentiles de precio: {titulo} ---")
+    if all(valor is None for valor in percentiles.values()):
+        print("No hay productos.")
+    for p, valor in percentiles.items():
+        if valor is not None:
+            print(f"{Fore.YELLOW}p{p:<3}{Style.RESET_ALL} ${valor:,.0f}")
+    print(Fore.MAGENTA + "-------------------------------\n")
+
+def mostrar_histograma(titulo, histograma, ancho_barra=40):
+    """
+    Muestra un histograma de precios con barras de texto.
+
+    Args:
+        titulo (str): A qué productos corresponde (por ejemplo, una categoría).
+        histograma (list): Tuplas `(desde, hasta, cantidad)`.
+        ancho_barra (int): El largo de la barra del intervalo más poblado.
+    La función no devuelve ningún valor.
+    """
+    print(Fore.MAGENTA + f"\n--- Histograma de precios: {titulo} ---")
+    if not histograma:
+        print("No hay productos.")
+    mayor = max((cantidad for _, _, cantidad in histograma), default=0) or 1
+    for desde, hasta, cantidad in histograma:
+        barra = "█" * round(cantidad * ancho_barra / mayor)
+        intervalo = f"{f'${desde:,}':>12} - {f'${hasta:,}':>12}"
+        print(f"{Fore.YELLOW}{intervalo}{Style.RESET_ALL} {barra} {cantidad}")
+    print(Fore.MAGENTA + "-------------------------------\n")
+
+def mostrar_productos_destacados(titulo, productos):
+    """
+    Muestra una lista de productos con un título (por ejemplo, los más caros).
+
+    Args:
+        titulo (str): El título del listado.
+        productos (list): Registros `modelos.Producto`.
+    La función no devuelve ningún valor.
+    """
+    print(Fore.MAGENTA + f"\n--- {titulo} ---")
+    if not productos:
+        print("No hay productos.")
+    escribir_tabla(productos, COLUMNAS_PRODUCTO)
+    print(Fore.MAGENTA + "-" * (len(titulo) + 8) + "\n")
+
+def mostrar_resumen_respaldo(resumen):
+    """
+    Muestra el resultado de `respaldo.crear_respaldo`.
+
+    Args:
+        resumen (dict): Con las claves `destino`, `paginas`, `bytes`,
+            `comprimido`, `reinicios` y `segundos`.
+    La función no devuelve ningún valor.
+    """
+    comprimido = " (comprimido)" if resumen["comprimido"] else ""
+    mostrar_mensaje_exito(f"Respaldo guardado en '{resumen['destino']}'{comprimido}.")
+    print(f"    {resumen['paginas']:,} páginas | {resumen['bytes'] / 2**20:.2f} MiB | "
+          f"{resumen['segundos']:.2f} s | reinicios por escrituras: {resumen['reinicios']}")
+
+def formatear_cantidad(cantidad):
+    """
+    Formatea una cantidad con separador de miles.
+
+    Args:
+        cantidad (int): La cantidad, o None si no se conoce.
+
+    Retorna:
+        str: La cantidad formateada, o "desconocido" si es None.
+    """
+    return "desconocido" if cantidad is None else f"{cantidad:,}"
+
+def mostrar_verificacion_respaldo(ruta, verificacion):
+    """
+    Muestra el resultado de `respaldo.verificar_respaldo`.
+
+    Args:
+        ruta (str): El archivo verificado.
+        verificacion (dict): Con las claves `ok`, `problemas`,
+            `version_esquema`, `productos` y `categorias`.
+    La función no devuelve ningún valor.
+    """
+    if verificacion["ok"]:
+        mostrar_mensaje_exito(f"'{ruta}' está sano.")
+        print(f"    esquema: {verificacion['version_esquema']} | "
+              f"productos: {formatear_cantidad(verificacion['productos'])} | "
+              f"categorías: {formatear_cantidad(verificacion['categorias'])}")
+    else:
+        mostrar_mensaje_error(f"'{ruta}' no se puede restaurar:")
+        for problema in verificacion["problemas"][:10]:
+            print(f"    {problema}")
@@ -0,0 +1,171 @@
+# verificar_planes.py
+"""
+Verificación de planes de consulta (EXPLAIN QUERY PLAN). 🔎
+
+Ejecuta cada función de `database.py` sobre una base temporal con datos de
+ejemplo, registra las sentencias SQL que realmente se envían a SQLite y pide
+el plan de cada una. Una consulta se considera correcta si no recorre una
+tabla completa (`SCAN tabla` sin índice) ni necesita ordenar en un B-tree
+temporal.
+
+Uso:
+    python verificar_planes.py
+
+Termina con código 1 si alguna consulta no está respaldada por un índice.
+"""
+import os
+import sys
+import tempfile
+
+import database as db
+
+# Recorridos completos aceptados: las categorías son como máximo 10 filas y
+# `sqlite_master` solo se consulta para detectar el esquema.
+TABLAS_PEQUENAS = {"categorias", "c", "sqlite_master"}
+
+# Tablas `WITHOUT ROWID` que se recorren completas a propósito: recorrerlas es
+# leer su clave primaria en orden, como un índice cubriente. El catálogo a
+# una fecha y la exportación del historial necesitan todas sus filas.
+RECORRIDOS_EN_ORDEN = {"historial_precios"}
+
+def _poblar():
+    """Crea algunas categorías y productos para que las funciones tengan datos."""
+    db.agregar_categoria_db("Bebidas")
+    db.agregar_categoria_db("Limpieza")
+    db.agregar_categoria_db("Vacía")
+    db.agregar_productos_lote_db([(f"Producto {i}", 1 + i % 2, i) for i in range(200)])
+    # Historial en el diario de cambios, como el que deja el uso normal
+    for i in range(1, 201):
+        db.modificar_producto_db(i, "precio", i + 1)
+    db.obtener_conexion().execute("ANALYZE")
+
+def _operaciones():
+    """
+    Retorna las llamadas a verificar como pares `(nombre, función sin argumentos)`.
+
+    Las operaciones de escritura se ejecutan al final, sobre filas de ejemplo.
+    """
+    return [
+        ("contar_categorias_db", db.contar_categorias_db),
+        ("obtener_categorias_db", db.obtener_categorias_db),
+        ("contar_productos_en_categoria_db", lambda: db.contar_productos_en_categoria_db(1)),
+        ("obtener_productos_db", db.obtener_productos_db),
+        ("iterar_productos_db", lambda: list(db.iterar_productos_db())),
+        ("iterar_bloques_productos_db", lambda: list(db.iterar_bloques_productos_db())),
+        ("obtener_pagina_productos_db", db.obtener_pagina_productos_db),
+        ("obtener_pagina_productos_db (siguiente)",
+         lambda: db.obtener_pagina_productos_db(despues=("Producto 5", 6))),
+        ("obtener_pagina_productos_db (anterior)",
+         lambda: db.obtener_pagina_productos_db(antes=("Producto 5", 6))),
+        ("obtener_pagina_productos_db (letra)",
+         lambda: db.obtener_pagina_productos_db(desde_nombre="P")),
+        ("iterar_columnas_productos_db", lambda: list(db.iterar_columnas_productos_db())),
+        ("iterar_columnas_productos_db (ids)",
+         lambda: list(db.iterar_columnas_productos_db([1, 2, 3]))),
+        ("buscar_productos_db", lambda: db.buscar_productos_db("producto 1")),
+        ("iterar_busqueda_productos_db",
+         lambda: list(db.iterar_busqueda_productos_db("producto", 10**6))),
+        ("obtener_productos_por_ids_db", lambda: db.obtener_productos_por_ids_db([3, 1, 2])),
+        ("existe_producto_db", lambda: db.existe_producto_db(1)),
+        ("agregar_producto_db", lambda: db.agregar_producto_db("Nuevo", 1, 10)),
+        ("modificar_producto_db", lambda: db.modificar_producto_db(1, "precio", 5)),
+        ("eliminar_producto_db", lambda: db.eliminar_producto_db(2)),
+        ("fijar_precio_lote_db", lambda: db.fijar_precio_lote_db([3, 4], 7)),
+        ("ajustar_precio_porcentaje_db",
+         lambda: db.ajustar_precio_porcentaje_db(10, categoria_id=1)),
+        ("recategorizar_lote_db", lambda: db.recategorizar_lote_db([5, 6], 2)),
+        ("eliminar_productos_lote_db", lambda: db.eliminar_productos_lote_db([7, 8])),
+        ("eliminar_productos_filtro_db",
+         lambda: db.eliminar_productos_filtro_db(categoria_id=2, precio_min=150)),
+        ("deshacer_db", db.deshacer_db),
+        ("rehacer_db", db.rehacer_db),
+        ("cambios_desde_db", lambda: db.cambios_desde_db(3)),
+        ("cambios_desde_db (momento)", lambda: db.cambios_desde_db(desde_momento=0)),
+        ("historial_precio_db", lambda: db.historial_precio_db(1)),
+        ("historial_precio_db (rango)", lambda: db.historial_precio_db(1, 0, 2e9)),
+        ("precio_en_db", lambda: db.precio_en_db(1, 2e9)),
+        ("precios_en_db", lambda: list(db.precios_en_db(2e9))),
+        ("precios_en_db (categoría)", lambda: list(db.precios_en_db(2e9, 1))),
+        ("iterar_historial_precios_db", lambda: list(db.iterar_historial_precios_db(0))),
+        ("reducir_historial_precios_db", lambda: db.reducir_historial_precios_db(2e9, 86400)),
+        ("podar_historial_precios_db", lambda: db.podar_historial_precios_db(0)),
+        ("modificar_categoria_db", lambda: db.modificar_categoria_db(2, "Hogar")),
+        ("eliminar_categoria_db", lambda: db.eliminar_categoria_db(3)),
+    ]
+
+def _capturar_sentencias(funcion):
+    """Ejecuta `funcion` y retorna las sentencias SQL que envió a SQLite."""
+    conn = db.obtener_conexion()
+    sentencias = []
+    conn.set_trace_callback(sentencias.append)
+    try:
+        funcion()
+    finally:
+        conn.set_trace_callback(None)
+    # Los triggers hacen que una misma sentencia se informe más de una vez
+    unicas = dict.fromkeys(sentencias)
+    return [s for s in unicas
+            if s.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH"))]
+
+def _problemas_del_plan(plan):
+    """Retorna los pasos del plan que indican un recorrido completo o un ordenamiento."""
+    problemas = []
+    for _, _, _, detalle in plan:
+        if (detalle.startswith("SCAN ") and "INDEX" not in detalle
+                and "VIRTUAL TABLE" not in detalle and detalle != "SCAN CONSTANT ROW"):
+            if detalle.split()[1] not in TABLAS_PEQUENAS | RECORRIDOS_EN_ORDEN:
+                problemas.append(detalle)
+        if "USE TEMP B-TREE" in detalle:
+            problemas.append(detalle)
+    return problemas
+
+def verificar():
+    """
+    Revisa el plan de todas las consultas de `database.py`.
+
+    Además de las sentencias capturadas, se revisa la búsqueda de productos
+    por categoría que SQLite realiza para aplicar `ON DELETE RESTRICT`, que no
+    aparece en el plan del `DELETE`.
+
+    Args:
+        Esta función no recibe parámetros.
+
+    Retorna:
+        list: Tuplas `(funcion, sql, plan, problemas)`, una por sentencia.
+    """
+    resultados = []
+    conn = db.obtener_conexion()
+    for nombre, funcion in _operaciones():
+        for sql in _capturar_sentencias(funcion):
+            plan = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+            resultados.append((nombre, sql, plan, _problemas_del_plan(plan)))
+    sql_fk = "SELECT 1 FROM productos WHERE categoria_id = 1"
+    plan = conn.execute("EXPLAIN QUERY PLAN " + sql_fk).fetchall()
+    resultados.append(("ON DELETE RESTRICT", sql_fk, plan, _problemas_del_plan(plan)))
+    return resultados
+
+def main():
+    """Ejecuta la verificación sobre una base temporal e informa el resultado."""
+    nombre_original = db.DB_NAME
+    with tempfile.TemporaryDirectory() as carpeta:
+        db.DB_NAME = os.path.join(carpeta, "planes.db")
+        try:
+            db.inicializar_db()
+            _poblar()
+            resultados = verificar()
+        finally:
+            db.cerrar_conexiones()
+            db.DB_NAME = nombre_original
+
+    fallos = 0
+    for nombre, sql, plan, problemas in resultados:
+        estado = "FALLA" if problemas else "OK"
+        fallos += bool(problemas)
+        print(f"[{estado}] {nombre}: {' '.join(sql.split())}")
+        for _, _, _, detalle in plan:
+            print(f"        {detalle}")
+    print(f"\n{len(resultados) - fallos} de {len(resultados)} consultas usan índices.")
+    return 1 if fallos else 0
+
+if __name__ == "__main__":
+    sys.exit(main())